@@ -5,19 +5,47 @@ Oferece uma API REST para predição de viabilidade de hepatócitos criopreserva
 e uma interface web interativa.
 """
 
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import (
+    Flask, Response, render_template, request, jsonify, send_file, send_from_directory, has_request_context,
+    stream_with_context
+)
+import hashlib
+import io
 import joblib
-import pandas as pd
+import json
+import numpy as np
+from scipy import sparse
 from pathlib import Path
-from functools import lru_cache
 import logging
 import os
+import threading
 
 from src.constants import (
-    VALID_CELL_TYPES, VALID_CRYOPROTECTORS, FEATURE_MAP, MODEL_FEATURES, FLOAT_TOLERANCE
+    VALID_CELL_TYPES, VALID_CRYOPROTECTORS, FEATURE_MAP, MODEL_FEATURES, FLOAT_TOLERANCE,
+    BATCH_WINDOW_MS, BATCH_MAX_SIZE, CRYOPROTECTOR_COLUMNS, MULTI_VARIANT,
+    CELL_TYPES_LIST, CONCENTRATION_MIN, CONCENTRATION_MAX, JOINT_MODEL, MAX_COMPARE_FORMULATIONS,
+    MODEL_VARIANTS, MAX_EXPLAIN_INPUTS, MODEL_CACHE_BUDGET_MB, SURFACE_DEFAULT_RESOLUTION,
+    SURFACE_MAX_RESOLUTION, CONCENTRATION_STEP, CURVE_MIN_RESOLUTION, CURVE_DEFAULT_MAX_POINTS,
+    CURVE_MIN_POINTS, CURVE_MAX_POINTS, MANIFEST_POLL_S, GRAPH_WORKERS, GRAPH_WAIT_S
 )
+from src.model.backends import BACKENDS, backend_of, predict_batch
+from src.model.batcher import PredictionBatcher
+from src.model.bundle import BUNDLE_FILENAME, open_bundle
+from src.model.cache import ModelCache
+from src.model.drift import VIABILITY_KEY, DriftMonitor, get_training_statistics
+from src.model.explain import ContributionCache, explain_rows
+from src.model.jobs import TrainingJobRunner
+from src.model.registry import ManifestWatcher, published_entry, read_published
+from src.model.joint import build_compare_frame, formulation_context, get_joint_categories
+from src.model.surface import DTYPES as SURFACE_DTYPES, SurfaceCache, encode_surface, evaluate_surface
+from src.model.trainer import get_sparse_model_features
+from src.utils.audit import POLICIES as AUDIT_POLICIES, open_audit_log
+from src.utils.downsample import downsample_curve
+from src.utils.log import configure_logging
+from src.utils.responses import init_compression, json_response
+from src.visualization.graph_cache import DIGEST_LENGTH, GraphCache, figure_of, graph_sources, parse_graph_key
 from src.utils.helpers import (
-    build_feature_row, clamp_viability,
+    build_feature_row, build_feature_matrix, build_sparse_feature_matrix, clamp_viability, concentration_grid,
     validate_input, validate_cell_type, validate_cryoprotector, validate_concentration,
     get_available_both_combinations, get_min_nonzero_feature
 )
@@ -26,6 +54,9 @@ from src.utils.helpers import (
 BASE_DIR = Path(__file__).parent.resolve()
 CELL_TYPES = ['hepg2', 'rat', 'mice']
 MODELS_DIR = Path(os.getenv('MODELS_DIR', BASE_DIR / "models"))
+MODEL_BUNDLE_PATH = Path(os.getenv('MODEL_BUNDLE', MODELS_DIR / BUNDLE_FILENAME))
+# Com MODEL_BUNDLE definido, o pacote é sempre esse arquivo (não o do manifesto)
+BUNDLE_PINNED = 'MODEL_BUNDLE' in os.environ
 GRAPHS_DIR = Path(os.getenv('GRAPHS_DIR', BASE_DIR / "static" / "graphs"))
 CONCENTRATION_RANGES = {
     'DMSO': list(range(0, 101, 5)),
@@ -34,13 +65,128 @@ CONCENTRATION_RANGES = {
 
 app = Flask(__name__)
 app.config['DEBUG'] = True
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s %(levelname)s %(message)s')
+# gzip para respostas >= GZIP_MIN_SIZE bytes quando o cliente aceita
+init_compression(app)
+
+
+def _current_route() -> str | None:
+    """Rota da requisição atual, usada na amostragem de logs."""
+    return request.path if has_request_context() else None
+
+
+# Logs em JSON via fila + thread escritor (LOG_LEVEL, LOG_SAMPLING)
+configure_logging(route_getter=_current_route)
 logger = logging.getLogger(__name__)
 
+# Histogramas ao vivo das entradas e saídas por (cell_type, variante), expostos em /developer/drift
+drift_monitor = DriftMonitor()
+
+# Auditoria das predições servidas: fila em memória + escritor em lotes gzip
+# (AUDIT_LOG=0 desliga; AUDIT_LOG_DIR; AUDIT_BACKPRESSURE=drop|block)
+AUDIT_LOG_DIR = Path(os.getenv('AUDIT_LOG_DIR', BASE_DIR / "logs" / "audit"))
+AUDIT_BACKPRESSURE = os.getenv('AUDIT_BACKPRESSURE', 'drop')
+if AUDIT_BACKPRESSURE not in AUDIT_POLICIES:
+    # Um valor inválido não pode desligar a auditoria em silêncio
+    logger.error("AUDIT_BACKPRESSURE inválido: %r (use %s); usando 'drop'",
+                 AUDIT_BACKPRESSURE, ', '.join(AUDIT_POLICIES))
+    AUDIT_BACKPRESSURE = 'drop'
+audit_log = (
+    open_audit_log(AUDIT_LOG_DIR, policy=AUDIT_BACKPRESSURE)
+    if os.getenv('AUDIT_LOG', '1') == '1' else None
+)
+
+# Micro-batching opcional das predições de uma linha (PREDICTION_BATCHING=1)
+prediction_batcher = (
+    PredictionBatcher(
+        window_ms=float(os.getenv('BATCH_WINDOW_MS', BATCH_WINDOW_MS)),
+        max_batch_size=int(os.getenv('BATCH_MAX_SIZE', BATCH_MAX_SIZE))
+    )
+    if os.getenv('PREDICTION_BATCHING', '0') == '1' else None
+)
+
+
+def _predict_drop(model, rows, key: tuple | None = None) -> list[float]:
+    """Prediz a % de queda da viabilidade para uma ou mais linhas de features.
+    
+    `rows` é uma lista de linhas densas ou uma matriz esparsa (modelos 'multi').
+    Linhas únicas com `key` (cell_type, variante servida, versão) passam pelo
+    micro-batcher quando habilitado; as demais são avaliadas em uma única chamada.
+    """
+    is_sparse = sparse.issparse(rows)
+    n_rows = rows.shape[0] if is_sparse else len(rows)
+    if prediction_batcher is not None and key is not None and n_rows == 1:
+        return [prediction_batcher.submit(key, model, rows if is_sparse else rows[0])]
+    X = rows if is_sparse else np.asarray(rows, dtype=float)
+    return [float(p) for p in predict_batch(model, X)]
+
+
+def _curve_drops(model, cell_type: str, variant: str | None, cryoprotector: str,
+                 concentrations: list) -> list[float]:
+    """% de queda ao longo de uma curva de um crioprotetor.
+    
+    Usa a tabela pré-calculada do pacote de modelos quando ela cobre todas as
+    concentrações pedidas; caso contrário avalia o modelo em um único lote
+    (grades densas, como as de `resolution`, caem sempre neste caso).
+    """
+    bundle = published_models[1]
+    if bundle is not None:
+        key = variant if variant and bundle.has(cell_type, variant) else 'default'
+        table = bundle.table(cell_type, key, cryoprotector)
+        if table is not None:
+            drops = dict(zip(table[0], table[1].tolist()))
+            if all(c in drops for c in concentrations):
+                return [drops[c] for c in concentrations]
+    
+    return _predict_drop(model, build_feature_matrix(cryoprotector, concentrations))
+
+
+def _parse_curve_options(data: dict) -> tuple[float | None, int, str | None]:
+    """Lê `resolution` (passo em %) e `max_points` de /predict; retorna (passo, pontos, erro)."""
+    try:
+        resolution = data.get('resolution')
+        resolution = float(resolution) if resolution is not None else None
+        max_points = int(data.get('max_points') or CURVE_DEFAULT_MAX_POINTS)
+    except (TypeError, ValueError):
+        return None, 0, 'resolution e max_points devem ser numéricos.'
+    if resolution is not None and not CURVE_MIN_RESOLUTION <= resolution <= CONCENTRATION_MAX - CONCENTRATION_MIN:
+        return None, 0, f'resolution deve estar entre {CURVE_MIN_RESOLUTION} e {CONCENTRATION_MAX - CONCENTRATION_MIN}.'
+    if not CURVE_MIN_POINTS <= max_points <= CURVE_MAX_POINTS:
+        return None, 0, f'max_points deve estar entre {CURVE_MIN_POINTS} e {CURVE_MAX_POINTS}.'
+    return resolution, max_points, None
+
+
+def _curve_payload(concentrations: list, viability: list[float], model_variant: str | None,
+                   max_points: int, resolution: float | None = None) -> dict:
+    """Resposta de /predict: ótimo na grade completa e curva reduzida a `max_points` (LTTB).
+    
+    O ponto ótimo é sempre mantido na curva enviada.
+    """
+    evaluated = len(concentrations)
+    opt_index = int(np.argmax(viability))
+    optimal = {'concentration': concentrations[opt_index], 'value': float(viability[opt_index])}
+    if evaluated > max_points:
+        x, y = downsample_curve(np.asarray(concentrations), np.asarray(viability), max_points, keep=(opt_index,))
+        concentrations, viability = x.tolist(), y.tolist()
+    payload = {
+        'concentrations': concentrations,
+        'viability': viability,
+        'optimal': optimal,
+        'model_variant': model_variant
+    }
+    if resolution is not None:
+        payload['resolution'] = resolution
+        payload['points_evaluated'] = evaluated
+    return payload
+
 
 @app.route('/predict-mixture', methods=['POST'])
 def predict_mixture():
-    """Prediz viabilidade para mistura de crioprotetores (2-5)."""
+    """Prediz viabilidade para mistura de crioprotetores (2-5).
+    
+    Misturas apenas de DMSO/TREHALOSE usam os modelos densos por variante;
+    qualquer outro agente (CRYOPROTECTOR_COLUMNS) usa o modelo 'multi' com
+    entrada esparsa.
+    """
     try:
         data = request.json or {}
         cell_type = str(data.get('cell_type', '')).lower()
@@ -52,43 +198,184 @@ def predict_mixture():
         if not (2 <= len(mixture) <= 5):
             return jsonify({'error': 'Mistura deve conter 2-5 crioprotetores'}), 400
         
-        # Preparar features
-        input_dict = {col: 0.0 for col in MODEL_FEATURES}
+        formulation = {}
         for item in mixture:
             cp = str(item.get('cryoprotector', '')).upper()
-            if cp not in FEATURE_MAP:
+            if cp not in CRYOPROTECTOR_COLUMNS:
                 return jsonify({'error': f'Crioprotetor inválido: {cp}'}), 400
-            input_dict[FEATURE_MAP[cp]] = float(item.get('concentration', 0))
+            formulation[cp] = float(item.get('concentration', 0))
+        
+        if not set(formulation) <= set(FEATURE_MAP):
+            return _predict_multi_mixture(cell_type, formulation)
+        
+        # Preparar features
+        input_dict = {col: 0.0 for col in MODEL_FEATURES}
+        for cp, conc in formulation.items():
+            input_dict[FEATURE_MAP[cp]] = conc
         
         # Determinar variante
         has_dmso = input_dict.get(FEATURE_MAP['DMSO'], 0) > 0
         has_tre = input_dict.get(FEATURE_MAP['TREHALOSE'], 0) > 0
         variant = 'both' if (has_dmso and has_tre) else ('dmso_only' if has_dmso else 'trehalose_only')
         
-        model = try_load_model(cell_type, variant=variant)
+        model, served, version = try_load_model_versioned(cell_type, variant=variant)
         if not model:
             return jsonify({'error': f'Modelo não encontrado: {cell_type}'}), 404
         
-        pred = 100 - model.predict(pd.DataFrame([[input_dict.get(col, 0.0) for col in MODEL_FEATURES]], columns=MODEL_FEATURES).values, validate_features=False)[0]
-        return jsonify({'viability': clamp_viability(pred), 'model_variant': variant})
+        row_values = [input_dict.get(col, 0.0) for col in MODEL_FEATURES]
+        pred = 100 - _predict_drop(model, [row_values], key=(cell_type, served, version))[0]
+        viability = clamp_viability(pred)
+        _record_prediction(cell_type, variant, input_dict, viability, served, version)
+        return json_response({'viability': viability, 'model_variant': variant})
     except Exception as e:
-        logger.error(f"Erro /predict-mixture: {e}")
+        logger.error("Erro /predict-mixture: %s", e)
         return jsonify({'error': 'Erro ao prever mistura'}), 500
 
-# Cache simples para modelos
-@lru_cache(maxsize=32)
+
+def _predict_multi_mixture(cell_type: str, formulation: dict[str, float]) -> object:
+    """Prediz uma mistura com agentes além de DMSO/TREHALOSE (modelo 'multi')."""
+    model, served, version = try_load_model_versioned(cell_type, variant=MULTI_VARIANT)
+    features = get_sparse_model_features(model) if model is not None else None
+    if features is None:
+        return jsonify({'error': f'Modelo multi-crioprotetor não encontrado: {cell_type}'}), 404
+    
+    try:
+        X = build_sparse_feature_matrix([formulation], features=features)
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
+    
+    pred = 100 - _predict_drop(model, X, key=(cell_type, served, version))[0]
+    viability = clamp_viability(pred)
+    _record_prediction(cell_type, MULTI_VARIANT, {CRYOPROTECTOR_COLUMNS[cp]: c for cp, c in formulation.items()},
+                       viability, served, version)
+    return json_response({'viability': viability, 'model_variant': MULTI_VARIANT})
+
+# Conjunto de modelos publicado pelo treino (src.model.registry), verificado a cada requisição
+manifest_watcher = ManifestWatcher(MODELS_DIR, interval=float(os.getenv('MANIFEST_POLL_S', MANIFEST_POLL_S)))
+
+
+def _bundle_path(manifest: dict | None) -> Path:
+    """Pacote publicado no manifesto, senão MODEL_BUNDLE_PATH."""
+    entry = (manifest or {}).get('bundle')
+    if entry is None or BUNDLE_PINNED:
+        return MODEL_BUNDLE_PATH
+    return MODELS_DIR / entry['path']
+
+
+def _open_published() -> tuple[dict | None, object]:
+    """(manifesto, pacote de modelos) publicados agora."""
+    manifest = manifest_watcher.sync()
+    return manifest, open_bundle(_bundle_path(manifest))
+
+
+# Conjunto em uso: manifesto e pacote único de modelos (mmap, gerado ao final
+# de train_models.py). É trocado inteiro por reload_models; quem precisa dos
+# dois lê a tupla uma única vez, nunca um manifesto novo com um pacote antigo.
+published_models = _open_published()
+_reload_lock = threading.Lock()
+
+
+def _model_file(cell_type: str, variant: str, manifest: dict | None = None) -> Path:
+    """`.pkl` de (cell_type, variante): a versão publicada no manifesto, senão o de models/."""
+    entry = published_entry(manifest or published_models[0], cell_type, variant)
+    if entry is not None:
+        return MODELS_DIR / entry['path']
+    suffix = '' if variant == 'default' else f"_{variant}"
+    return MODELS_DIR / f"xgboost_{cell_type}{suffix}.pkl"
+
+
+def _load_model_file(cell_type: str, variant: str, manifest: dict | None = None) -> tuple[object, int, str]:
+    """Carrega o `.pkl` de (cell_type, variante), conferindo o hash da versão publicada.
+
+    Returns:
+        tuple: (modelo, tamanho do arquivo em bytes, sha256 do arquivo)
+    """
+    manifest = manifest or published_models[0]
+    entry = published_entry(manifest, cell_type, variant)
+    if entry is None:
+        raw = _model_file(cell_type, variant, manifest).read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+    else:
+        raw, digest = read_published(MODELS_DIR, entry), entry['sha256']
+    return joblib.load(io.BytesIO(raw)), len(raw), digest
+
+
+def _resolve_variant(cell_type: str, variant: str | None) -> str:
+    """Variante efetivamente servida: a pedida se existir, senão 'default'.
+    
+    Raises:
+        FileNotFoundError: Se nem a variante nem o modelo padrão existirem
+    """
+    manifest, bundle = published_models
+    if bundle is not None:
+        key = variant if variant and bundle.has(cell_type, variant) else 'default'
+        if not bundle.has(cell_type, key):
+            raise FileNotFoundError(f"Modelo não encontrado no pacote: {cell_type}/{key}")
+        return key
+    
+    if variant and _model_file(cell_type, variant, manifest).exists():
+        return variant
+    model_path = _model_file(cell_type, 'default', manifest)
+    if not model_path.exists():
+        raise FileNotFoundError(f"Modelo não encontrado: {model_path}")
+    return 'default'
+
+
+def _load_model(key: tuple[str, str]) -> tuple[object, int, str]:
+    """Carrega (cell_type, variante efetiva) do pacote ou do `.pkl` (o modelo conjunto, sempre do `.pkl`).
+
+    A versão é o hash do artefato publicado no manifesto (o mesmo dos
+    gráficos e da auditoria); fora do manifesto, o do pacote ou do arquivo.
+
+    Returns:
+        tuple: (modelo, tamanho serializado em bytes, versão)
+    """
+    cell_type, variant = key
+    manifest, bundle = published_models
+    try:
+        if bundle is not None and cell_type != JOINT_MODEL:
+            entry = None if BUNDLE_PINNED else published_entry(manifest, cell_type, variant)
+            digest = entry['sha256'] if entry else bundle.meta(cell_type, variant)['sha256']
+            model, size = bundle.load_model(cell_type, variant), bundle.size(cell_type, variant)
+        else:
+            model, size, digest = _load_model_file(cell_type, variant, manifest)
+        return model, size, digest[:DIGEST_LENGTH]
+    except Exception as e:
+        logger.error("Erro ao carregar modelo %s/%s: %s", cell_type, variant, e)
+        raise RuntimeError(f"Falha ao carregar modelo: {e}") from e
+
+
+# Modelos carregados, limitados por memória (MODEL_CACHE_BUDGET_MB)
+model_cache = ModelCache(
+    _load_model,
+    budget_bytes=int(float(os.getenv('MODEL_CACHE_BUDGET_MB', MODEL_CACHE_BUDGET_MB)) * 1024 * 1024)
+)
+
+
 def get_model(cell_type: str, variant: str | None = None):
-    """Carrega o modelo XGBoost para o tipo celular dado.
+    """Carrega o modelo (de qualquer backend) para o tipo celular dado (ver `get_model_versioned`)."""
+    return get_model_versioned(cell_type, variant)[0]
+
+
+def get_model_versioned(cell_type: str, variant: str | None = None) -> tuple[object, str, str]:
+    """Carrega o modelo (de qualquer backend) para o tipo celular dado.
     
     Se `variant` for especificado, tenta carregar o modelo variant primeiro.
-    Se não encontrado, volta ao modelo padrão.
+    Se não encontrado, volta ao modelo padrão. Com o pacote de modelos
+    presente, os modelos vêm exclusivamente dele; sem ele, dos `.pkl`.
+    Os modelos ficam em `model_cache`, sob a variante efetiva (variantes
+    ausentes compartilham a entrada do modelo padrão).
+    
+    A versão vem da mesma consulta a `model_cache` que entrega o modelo:
+    é a do modelo que atende a requisição, mesmo que ele seja removido do
+    cache ou substituído por uma recarga logo depois.
     
     Args:
         cell_type: Um de {'hepg2', 'mice', 'rat'}
         variant: Um de {'default', 'dmso_only', 'trehalose_only', 'both'}, ou None
         
     Returns:
-        Modelo joblib carregado
+        tuple: (modelo carregado, variante efetiva, versão)
         
     Raises:
         FileNotFoundError: Se nenhuma variante for encontrada
@@ -97,40 +384,64 @@ def get_model(cell_type: str, variant: str | None = None):
     cell_type = str(cell_type).lower()
     if cell_type not in VALID_CELL_TYPES:
         raise FileNotFoundError(f"Tipo celular inválido: {cell_type}")
+    served = _resolve_variant(cell_type, variant)
+    model, version = model_cache.get_versioned((cell_type, served))
+    return model, served, version
+
+
+def get_joint_model_versioned() -> tuple[object, str | None]:
+    """(modelo conjunto `xgboost_joint.pkl`, versão), ou (None, None) se não existir.
     
-    # Tenta carregar variante específica se pedida
-    if variant:
-        suffix = f"_{variant}"
-        model_path = MODELS_DIR / f"xgboost_{cell_type}{suffix}.pkl"
-        if model_path.exists():
-            try:
-                return joblib.load(model_path)
-            except Exception as e:
-                logger.error(f"Erro ao carregar modelo {model_path}: {e}")
-                raise RuntimeError(f"Falha ao carregar modelo: {e}") from e
-    
-    # Fallback: modelo padrão
-    model_path = MODELS_DIR / f"xgboost_{cell_type}.pkl"
-    if not model_path.exists():
-        raise FileNotFoundError(f"Modelo não encontrado: {model_path}")
-    
+    O modelo conjunto não faz parte do pacote de modelos: suas entradas
+    categóricas não se aplicam às tabelas pré-calculadas por tipo celular.
+    Fica em `model_cache` como os demais, sob (JOINT_MODEL, 'default').
+    """
+    if not _model_file(JOINT_MODEL, 'default').exists():
+        return None, None
     try:
-        return joblib.load(model_path)
+        return model_cache.get_versioned((JOINT_MODEL, 'default'))
     except Exception as e:
-        logger.error(f"Erro ao carregar modelo {model_path}: {e}")
-        raise RuntimeError(f"Falha ao carregar modelo: {e}") from e
+        logger.error("Erro ao carregar modelo conjunto: %s", e)
+        return None, None
 
 
 def try_load_model(cell_type: str, variant: str | None = None):
     """Tenta carregar modelo; retorna None em caso de erro."""
+    return try_load_model_versioned(cell_type, variant)[0]
+
+
+def try_load_model_versioned(cell_type: str, variant: str | None = None) -> tuple[object, str | None, str | None]:
+    """Como `get_model_versioned`; retorna (None, None, None) em caso de erro."""
     try:
-        return get_model(cell_type, variant=variant)
+        return get_model_versioned(cell_type, variant=variant)
     except FileNotFoundError as fe:
         logger.warning(str(fe))
-        return None
+        return None, None, None
     except Exception as e:
-        logger.error(f"Erro ao carregar modelo: {e}")
-        return None
+        logger.error("Erro ao carregar modelo: %s", e)
+        return None, None, None
+
+
+def _audit_prediction(cell_type: str | None, variant: str | None, result: dict,
+                      model_version: str | dict | None) -> None:
+    """Registra a predição servida no log de auditoria (se habilitado).
+
+    `variant` e `model_version` são os do modelo que atendeu, obtidos junto
+    com ele (`get_model_versioned`); resolvê-los depois da predição poderia
+    apontar para um modelo já removido do cache ou recarregado. O registro é
+    só enfileirado; a serialização e a escrita ficam com o thread de `audit_log`.
+    """
+    if audit_log is None:
+        return
+    audit_log.record(route=request.path, params=request.get_json(silent=True), cell_type=cell_type,
+                     model_variant=variant, model_version=model_version, result=result)
+
+
+def _record_prediction(cell_type: str, variant: str, inputs: dict[str, float], viability: float,
+                       served_variant: str, model_version: str) -> None:
+    """Registra uma predição de uma linha no monitor de drift (variante pedida) e na auditoria (modelo servido)."""
+    drift_monitor.observe(cell_type, variant, inputs, viability)
+    _audit_prediction(cell_type, served_variant, {'viability': viability}, model_version)
 
 @app.route('/')
 def index() -> str:
@@ -149,17 +460,176 @@ def developer_area() -> str:
     """Área do desenvolvedor."""
     selected_cell_type = CELL_TYPES[0] if CELL_TYPES else ''
     return render_template('developer.html', 
-        config={'CELL_TYPES': CELL_TYPES},
+        config={'CELL_TYPES': CELL_TYPES, 'VARIANTS': sorted(MODEL_VARIANTS)},
         selected_cell_type=selected_cell_type
     )
 
 
+def reload_models() -> None:
+    """Publica no servidor os modelos recém-gravados, sem reiniciar.
+    
+    Relê o manifesto, reabre o pacote de modelos e esvazia os caches de
+    modelos carregados. O mapa anterior não é fechado explicitamente:
+    requisições em andamento podem ainda ler suas tabelas, e ele é liberado
+    quando deixa de ser usado.
+    """
+    global published_models
+    # Recargas simultâneas (hook de requisição e thread de treino) se serializam.
+    # Primeiro a troca, depois os caches: cargas que leram o conjunto antigo
+    # terminam com a geração já vencida e são descartadas.
+    with _reload_lock:
+        published_models = manifest, bundle = _open_published()
+        model_cache.clear()
+        explain_cache.clear()
+        surface_cache.clear()
+    logger.info("Modelos recarregados (manifesto: v%s, pacote: %s)",
+                manifest.get('version') if manifest else None, bundle.version if bundle else None)
+
+
+@app.before_request
+def _pick_up_published_models() -> None:
+    """Recarrega os modelos quando outro processo (treino) publica um novo manifesto."""
+    if manifest_watcher.changed():
+        reload_models()
+
+
+# Retreinamento em processo separado, disparado pela área de desenvolvedor
+training_jobs = TrainingJobRunner('train_models:train_all_models', on_success=reload_models)
+SSE_HEARTBEAT_S = 15.0
+
+
+@app.route('/developer/model-cache')
+def model_cache_status() -> object:
+    """API: Diagnóstico do cache de modelos (conjunto residente, remoções, recargas, versão publicada)."""
+    manifest, bundle = published_models
+    return jsonify({**model_cache.stats(),
+                    'manifest_version': manifest.get('version') if manifest else None,
+                    'bundle_version': bundle.version if bundle else None})
+
+
+@app.route('/developer/drift', methods=['GET', 'DELETE'])
+def drift_status() -> object:
+    """API: Distribuição das predições servidas comparada com a do treino.
+    
+    Por (cell_type, variante) e por crioprotetor: resumo ao vivo e de treino
+    (n, min, max, média, quantis), consultas abaixo do menor valor > 0 ou
+    acima do máximo do treino e PSI; o mesmo para a viabilidade prevista.
+    Modelos sem estatísticas de treino (treinados antes do monitor) retornam
+    `training: null`. DELETE zera os histogramas ao vivo.
+    """
+    if request.method == 'DELETE':
+        drift_monitor.reset()
+        return jsonify({'reset': True})
+    
+    report = []
+    for cell_type, variant in drift_monitor.keys():
+        model = try_load_model(cell_type, variant=variant)
+        training = get_training_statistics(model) if model is not None else None
+        entries = drift_monitor.report(cell_type, variant, training)
+        viability = entries.pop(VIABILITY_KEY, None)
+        report.append({
+            'cell_type': cell_type,
+            'model_variant': variant,
+            'requests': viability['live']['n'] if viability else 0,
+            'viability': viability,
+            'features': {FEATURE_AGENTS.get(col, col): entry for col, entry in entries.items()},
+        })
+    return json_response({'drift': report}, places=4)
+
+
+@app.route('/developer/audit')
+def audit_status() -> object:
+    """API: Contadores do log de auditoria (fila, gravados, descartados, arquivo atual)."""
+    if audit_log is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, 'directory': str(AUDIT_LOG_DIR), **audit_log.stats()})
+
+
+@app.route('/developer/jobs', methods=['GET', 'POST'])
+def training_jobs_api() -> object:
+    """API: Lista os jobs de retreinamento (GET) ou inicia um novo (POST).
+    
+    Corpo do POST: {"cell_types": [...], "variants": [...], "incremental": bool,
+    "backends": {"tipo/variante" | "*": backend}} (listas vazias ou ausentes =
+    todos; `incremental` continua o boosting dos modelos salvos com as linhas
+    novas; `backends` escolhe o backend de regressão, como `--backend` de
+    train_models.py). Responde 409 se já houver um job em andamento.
+    """
+    if request.method == 'GET':
+        return jsonify({'jobs': [job.to_dict(include_events=False) for job in training_jobs.list()]})
+    
+    data = request.json or {}
+    cell_types = [str(ct).lower() for ct in data.get('cell_types') or []]
+    variants = [str(v).lower() for v in data.get('variants') or []]
+    errors = [f'Tipo celular inválido: {ct}' for ct in cell_types if ct not in VALID_CELL_TYPES]
+    errors += [f'Variante inválida: {v}' for v in variants if v not in MODEL_VARIANTS]
+    backends = data.get('backends') or {}
+    if not isinstance(backends, dict):
+        errors.append('backends deve ser um objeto {"tipo/variante": backend}.')
+        backends = {}
+    errors += [f'Backend inválido: {name}' for name in backends.values()
+               if not isinstance(name, str) or name not in BACKENDS]
+    if errors:
+        return jsonify({'errors': errors}), 400
+    
+    try:
+        job = training_jobs.submit(cell_types=cell_types or None, variants=variants or None,
+                                   incremental=bool(data.get('incremental')), backends=backends or None)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify({**job.to_dict(), 'events_url': f'/developer/jobs/{job.id}/events'}), 202
+
+
+@app.route('/developer/jobs/<job_id>')
+def training_job_status(job_id: str) -> object:
+    """API: Estado e eventos de um job de retreinamento."""
+    job = training_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/developer/jobs/<job_id>/events')
+def training_job_events(job_id: str) -> object:
+    """API: Progresso do job via Server-Sent Events.
+    
+    Cada evento leva seu índice como `id`; reconexões com `Last-Event-ID`
+    retomam do evento seguinte. O stream termina com um evento `end`.
+    """
+    job = training_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    try:
+        start = int(request.headers.get('Last-Event-ID', -1)) + 1
+    except ValueError:
+        start = 0
+    
+    def stream():
+        index = start
+        while True:
+            events, finished = job.wait_events(index, timeout=SSE_HEARTBEAT_S)
+            for event in events:
+                yield f"id: {index}\ndata: {json.dumps(event)}\n\n"
+                index += 1
+            if finished:
+                yield f"event: end\ndata: {json.dumps({'status': job.status})}\n\n"
+                return
+            if not events:
+                yield ": keepalive\n\n"
+    
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 @app.route('/predict', methods=['POST'])
 def predict() -> object:
     """API: Retorna viabilidade para todas as concentrações de um crioprotetor.
     
     Retorna concentrações testadas, viabilidades correspondentes e
-    a concentração ótima (maior viabilidade).
+    a concentração ótima (maior viabilidade). Com `resolution` (passo em %,
+    ex.: 0.1), a grade densa é avaliada em uma única chamada ao modelo; a
+    curva enviada é reduzida a `max_points` pontos (LTTB) e o ótimo vem da
+    grade completa. BOTH com pares do dataset ignora `resolution`.
     """
     try:
         data = request.json
@@ -169,54 +639,61 @@ def predict() -> object:
         cryoprotector = data.get('cryoprotector', '').upper()
         
         errors = validate_input(cell_type, cryoprotector)
+        resolution, max_points, curve_error = _parse_curve_options(data)
+        if curve_error:
+            errors.append(curve_error)
         if errors:
             return jsonify({'errors': errors}), 400
         
         # Carregar modelo
-        model = try_load_model(cell_type)
+        model, served, version = try_load_model_versioned(cell_type)
         if model is None:
             return jsonify({'error': f"Modelo não encontrado para: {cell_type}"}), 404
         
         # Caso especial: BOTH (mistura com pares do dataset)
         if cryoprotector == 'BOTH':
-            return _predict_both_from_dataset(model, cell_type)
+            return _predict_both_from_dataset(model, cell_type, resolution, max_points, (served, version))
         
         # Caso normal: DMSO ou TREHALOSE isolados
-        return _predict_single_cryoprotector(model, cell_type, cryoprotector)
+        return _predict_single_cryoprotector(model, cell_type, cryoprotector, resolution, max_points,
+                                             (served, version))
         
     except Exception as e:
-        logger.error(f"Erro em /predict: {str(e)}", exc_info=True)
+        logger.error("Erro em /predict: %s", e, exc_info=True)
         return jsonify({'error': 'Erro interno ao prever viabilidade.'}), 500
 
 
-def _predict_both_from_dataset(model, cell_type: str) -> object:
-    """Prediz viabilidade para combinações DMSO+TREHALOSE encontradas no dataset."""
+def _predict_both_from_dataset(model, cell_type: str, resolution: float | None = None,
+                               max_points: int = CURVE_DEFAULT_MAX_POINTS,
+                               served: tuple[str | None, str | None] = (None, None)) -> object:
+    """Prediz viabilidade para combinações DMSO+TREHALOSE encontradas no dataset.
+
+    `served` é (variante efetiva, versão) de `model`, para a auditoria.
+    """
     pairs = get_available_both_combinations(cell_type)
     
     if not pairs:
-        # Fallback: grade uniforme (ambos iguais, incrementos de 5)
-        return _predict_both_fallback(model, cell_type)
+        # Fallback: grade uniforme (ambos iguais, incrementos de 5 ou `resolution`)
+        return _predict_both_fallback(model, cell_type, resolution, max_points, served)
     
     # Calcular viabilidade para cada par
     concentrations = [f"{int(d)}% + {int(t)}%" for d, t in pairs]
-    viability = []
+    rows = []
     
     for d, t in pairs:
         input_dict = {col: 0.0 for col in MODEL_FEATURES}
         input_dict[FEATURE_MAP['DMSO']] = float(d)
         input_dict[FEATURE_MAP['TREHALOSE']] = float(t)
-        row_values = [input_dict.get(col, 0.0) for col in MODEL_FEATURES]
-        input_data = pd.DataFrame([row_values], columns=MODEL_FEATURES)
-        
-        pred = 100 - model.predict(input_data.values, validate_features=False)[0]
-        viability.append(clamp_viability(pred))
+        rows.append([input_dict.get(col, 0.0) for col in MODEL_FEATURES])
+    
+    viability = [clamp_viability(100 - pred) for pred in _predict_drop(model, rows)]
     
     max_viab = max(viability)
     opt_index = viability.index(max_viab)
     
-    logger.info(f"BOTH: {cell_type} ótimo={concentrations[opt_index]} ({max_viab})")
+    logger.info("BOTH: %s ótimo=%s (%s)", cell_type, concentrations[opt_index], max_viab)
     
-    return jsonify({
+    payload = {
         'concentrations': concentrations,
         'viability': viability,
         'optimal': {
@@ -224,53 +701,54 @@ def _predict_both_from_dataset(model, cell_type: str) -> object:
             'value': float(max_viab)
         },
         'model_variant': 'both'
-    })
+    }
+    # A curva BOTH é avaliada com o modelo padrão (carregado em /predict)
+    _audit_prediction(cell_type, served[0], payload, served[1])
+    return json_response(payload)
 
 
-def _predict_both_fallback(model, cell_type: str) -> object:
-    """Fallback para BOTH: grid uniforme com incrementos de 5."""
-    concentrations = CONCENTRATION_RANGES.get('BOTH', list(range(0, 101, 5)))
-    viability = []
+def _predict_both_fallback(model, cell_type: str, resolution: float | None = None,
+                           max_points: int = CURVE_DEFAULT_MAX_POINTS,
+                           served: tuple[str | None, str | None] = (None, None)) -> object:
+    """Fallback para BOTH: grid uniforme com incrementos de 5 (ou `resolution`)."""
+    if resolution is None:
+        concentrations = CONCENTRATION_RANGES.get('BOTH', list(range(0, 101, 5)))
+    else:
+        concentrations = concentration_grid(resolution).tolist()
+    drops = _curve_drops(model, cell_type, None, 'BOTH', concentrations)
+    viability = [clamp_viability(100 - pred) for pred in drops]
     
-    for conc in concentrations:
-        row_dict = build_feature_row('BOTH', conc)
-        row_values = [row_dict.get(col, 0.0) for col in MODEL_FEATURES]
-        input_data = pd.DataFrame([row_values], columns=MODEL_FEATURES)
-        pred = 100 - model.predict(input_data.values, validate_features=False)[0]
-        viability.append(clamp_viability(pred))
-    
-    max_viab = max(viability)
-    opt_index = viability.index(max_viab)
-    
-    logger.info(f"BOTH (fallback): {cell_type} ótimo={concentrations[opt_index]} ({max_viab})")
-    
-    return jsonify({
-        'concentrations': concentrations,
-        'viability': viability,
-        'optimal': {
-            'concentration': concentrations[opt_index],
-            'value': float(max_viab)
-        },
-        'model_variant': 'both (fallback)'
-    })
+    payload = _curve_payload(concentrations, viability, 'both (fallback)', max_points, resolution)
+    logger.info("BOTH (fallback): %s ótimo=%s (%s)", cell_type,
+                payload['optimal']['concentration'], payload['optimal']['value'])
+    _audit_prediction(cell_type, served[0], payload, served[1])
+    return json_response(payload)
 
 
-def _predict_single_cryoprotector(model, cell_type: str, cryoprotector: str) -> object:
-    """Prediz viabilidade para um crioprotetor isolado (DMSO ou TREHALOSE)."""
+def _predict_single_cryoprotector(model, cell_type: str, cryoprotector: str, resolution: float | None = None,
+                                  max_points: int = CURVE_DEFAULT_MAX_POINTS,
+                                  served: tuple[str | None, str | None] = (None, None)) -> object:
+    """Prediz viabilidade para um crioprotetor isolado (DMSO ou TREHALOSE).
+
+    `served` é (variante efetiva, versão) de `model`, para a auditoria.
+    """
     # Selecionar modelo por variante se disponível
     variant_map = {'DMSO': 'dmso_only', 'TREHALOSE': 'trehalose_only'}
     preferred_variant = variant_map.get(cryoprotector)
     
     if preferred_variant:
-        model = try_load_model(cell_type, variant=preferred_variant)
+        model, *served = try_load_model_versioned(cell_type, variant=preferred_variant)
         if model is None:
             # Fallback para modelo padrão
-            model = try_load_model(cell_type)
+            model, *served = try_load_model_versioned(cell_type)
             if model is None:
                 return jsonify({'error': f"Modelo não encontrado para: {cell_type}"}), 404
     
     # Preparar grade de concentrações
-    base_concs = CONCENTRATION_RANGES.get(cryoprotector, list(range(0, 101, 5)))
+    if resolution is None:
+        base_concs = CONCENTRATION_RANGES.get(cryoprotector, list(range(0, 101, 5)))
+    else:
+        base_concs = concentration_grid(resolution).tolist()
     
     # Limitar ao intervalo observado nos dados se usando modelo específico
     if preferred_variant:
@@ -278,34 +756,19 @@ def _predict_single_cryoprotector(model, cell_type: str, cryoprotector: str) ->
         min_obs = get_min_nonzero_feature(cell_type, feature_col)
         if min_obs is not None and min_obs > 0:
             base_concs = [c for c in base_concs if c >= min_obs]
-            logger.info(f"{cryoprotector}: limitando a partir de {min_obs}")
+            logger.info("%s: limitando a partir de %s", cryoprotector, min_obs)
     
     # Calcular viabilidade para cada concentração
     concentrations = base_concs
-    viability = []
+    drops = _curve_drops(model, cell_type, preferred_variant, cryoprotector, concentrations)
+    viability = [clamp_viability(100 - pred) for pred in drops]
     
-    for conc in concentrations:
-        row_dict = build_feature_row(cryoprotector, conc)
-        # Criar DataFrame com valores na ordem correta das colunas
-        row_values = [row_dict.get(col, 0.0) for col in MODEL_FEATURES]
-        input_data = pd.DataFrame([row_values], columns=MODEL_FEATURES)
-        pred = 100 - model.predict(input_data.values, validate_features=False)[0]
-        viability.append(clamp_viability(pred))
+    payload = _curve_payload(concentrations, viability, preferred_variant, max_points, resolution)
+    logger.info("%s: %s ótimo=%s (%s)", cryoprotector, cell_type,
+                payload['optimal']['concentration'], payload['optimal']['value'])
     
-    max_viab = max(viability)
-    opt_index = viability.index(max_viab)
-    
-    logger.info(f"{cryoprotector}: {cell_type} ótimo={concentrations[opt_index]} ({max_viab})")
-    
-    return jsonify({
-        'concentrations': concentrations,
-        'viability': viability,
-        'optimal': {
-            'concentration': concentrations[opt_index],
-            'value': float(max_viab)
-        },
-        'model_variant': preferred_variant
-    })
+    _audit_prediction(cell_type, served[0], payload, served[1])
+    return json_response(payload)
 
 
 
@@ -313,7 +776,9 @@ def _predict_single_cryoprotector(model, cell_type: str, cryoprotector: str) ->
 def specific_predict() -> object:
     """API: Retorna viabilidade para uma concentração específica de um crioprotetor.
     
-    Não funciona para BOTH (use a página de mistura para isso).
+    Não funciona para BOTH (use a página de mistura para isso). A
+    concentração deve estar na grade de 5%, ou na de `resolution` (passo em
+    %, ex.: 0.1) quando informada.
     """
     try:
         data = request.json
@@ -323,18 +788,22 @@ def specific_predict() -> object:
         concentration = data.get('concentration')
         
         errors = validate_input(cell_type, cryoprotector)
+        resolution, _, curve_error = _parse_curve_options(data)
+        if curve_error:
+            errors.append(curve_error)
         
         # BOTH não é permitido aqui
         if cryoprotector == 'BOTH':
             errors.append('Para DMSO + TREHALOSE, use a página de Mistura.')
         
         # Validar concentração
-        if concentration is not None:
-            is_valid, error = validate_concentration(concentration, cryoprotector)
+        if concentration is None:
+            errors.append('Concentração não informada.')
+        elif not curve_error:
+            is_valid, error = validate_concentration(concentration, cryoprotector,
+                                                     step=resolution or CONCENTRATION_STEP)
             if not is_valid:
                 errors.append(error)
-        else:
-            errors.append('Concentração não informada.')
         
         if errors:
             return jsonify({'errors': errors}), 400
@@ -343,27 +812,27 @@ def specific_predict() -> object:
         variant_map = {'DMSO': 'dmso_only', 'TREHALOSE': 'trehalose_only'}
         preferred_variant = variant_map.get(cryoprotector)
         
-        model = try_load_model(cell_type, variant=preferred_variant)
+        model, served, version = try_load_model_versioned(cell_type, variant=preferred_variant)
         if model is None:
             return jsonify({'error': f"Modelo não encontrado para: {cell_type}"}), 404
         
         # Fazer predição
         row_dict = build_feature_row(cryoprotector, concentration)
         row_values = [row_dict.get(col, 0.0) for col in MODEL_FEATURES]
-        input_data = pd.DataFrame([row_values], columns=MODEL_FEATURES)
-        predicted_drop = model.predict(input_data.values, validate_features=False)[0]
+        predicted_drop = _predict_drop(model, [row_values], key=(cell_type, served, version))[0]
         viability = clamp_viability(100 - predicted_drop)
+        _record_prediction(cell_type, preferred_variant or 'default', row_dict, viability, served, version)
         
-        logger.info(f"Específica: {cell_type}, {cryoprotector}, {concentration} -> {viability}")
+        logger.info("Específica: %s, %s, %s -> %s", cell_type, cryoprotector, concentration, viability)
         
-        return jsonify({
+        return json_response({
             'viability': viability,
             'cell_type': cell_type.upper(),
             'cryoprotector': cryoprotector,
             'concentration': concentration
         })
     except Exception as e:
-        logger.error(f"Erro em /specific-predict: {str(e)}", exc_info=True)
+        logger.error("Erro em /specific-predict: %s", e, exc_info=True)
         return jsonify({'error': 'Erro interno ao prever viabilidade.'}), 500
 
 
@@ -384,9 +853,10 @@ def available_both(cell_type: str) -> object:
         pairs = get_available_both_combinations(cell_type)
         payload = [{'dmso': float(d), 'trehalose': float(t), 'label': f"{int(d)}% + {int(t)}%"} for d, t in pairs]
         
-        return jsonify({'pairs': payload})
+        # Pares exatos do dataset: sem arredondamento (são reenviados a /predict-both)
+        return json_response({'pairs': payload}, places=None)
     except Exception as e:
-        logger.error(f"Erro ao listar pares para {cell_type}: {e}", exc_info=True)
+        logger.error("Erro ao listar pares para %s: %s", cell_type, e, exc_info=True)
         return jsonify({'error': 'Erro interno ao listar combinações.'}), 500
 
 
@@ -420,7 +890,7 @@ def predict_both() -> object:
             return jsonify({'errors': ['Par DMSO+TREHALOSE não encontrado no dataset.']}), 400
         
         # Carregar modelo
-        model = try_load_model(cell_type, variant='both')
+        model, served, version = try_load_model_versioned(cell_type, variant='both')
         if model is None:
             return jsonify({'error': f"Modelo não encontrado para: {cell_type}"}), 404
         
@@ -429,22 +899,299 @@ def predict_both() -> object:
         input_dict[FEATURE_MAP['DMSO']] = float(dmso)
         input_dict[FEATURE_MAP['TREHALOSE']] = float(tre)
         row_values = [input_dict.get(col, 0.0) for col in MODEL_FEATURES]
-        input_data = pd.DataFrame([row_values], columns=MODEL_FEATURES)
         
-        pred = 100 - model.predict(input_data.values, validate_features=False)[0]
+        pred = 100 - _predict_drop(model, [row_values], key=(cell_type, served, version))[0]
         viability = clamp_viability(pred)
+        _record_prediction(cell_type, 'both', input_dict, viability, served, version)
         
-        logger.info(f"Ambos: {cell_type} DMSO={dmso}%, TRE={tre}% -> {viability}")
+        logger.info("Ambos: %s DMSO=%s%%, TRE=%s%% -> %s", cell_type, dmso, tre, viability)
         
-        return jsonify({
+        return json_response({
             'viability': viability,
             'input': input_dict,
             'label': f"{int(dmso)}% + {int(tre)}%",
             'model_variant': 'both'
         })
     except Exception as e:
-        logger.error(f"Erro em /predict-both: {e}", exc_info=True)
+        logger.error("Erro em /predict-both: %s", e, exc_info=True)
         return jsonify({'error': 'Erro interno ao prever par.'}), 500
+
+
+def _parse_compare_formulations(items: list) -> tuple[list[tuple[float, float]], str | None]:
+    """Valida a lista de formulações de /compare; retorna (pares, erro)."""
+    if not isinstance(items, list) or not items:
+        return [], 'Informe ao menos uma formulação.'
+    if len(items) > MAX_COMPARE_FORMULATIONS:
+        return [], f'Máximo de {MAX_COMPARE_FORMULATIONS} formulações por requisição.'
+    pairs = []
+    for item in items:
+        try:
+            dmso = float(item.get('dmso', 0) or 0)
+            tre = float(item.get('trehalose', 0) or 0)
+        except Exception:
+            return [], 'DMSO e TREHALOSE devem ser numéricos.'
+        if not all(CONCENTRATION_MIN <= c <= CONCENTRATION_MAX for c in (dmso, tre)):
+            return [], f'Concentrações devem estar entre {CONCENTRATION_MIN} e {CONCENTRATION_MAX}.'
+        if dmso == 0 and tre == 0:
+            return [], 'Cada formulação deve conter DMSO e/ou TREHALOSE.'
+        pairs.append((dmso, tre))
+    return pairs, None
+
+
+def _compare_joint(model, pairs: list[tuple[float, float]], cell_types: list[str]) -> dict[str, list[float]]:
+    """Todas as células × formulações em um único `predict` do modelo conjunto."""
+    frame = build_compare_frame(pairs, cell_types, get_joint_categories(model))
+    drops = model.predict(frame).reshape(len(cell_types), len(pairs))
+    return {ct: [clamp_viability(100 - float(d)) for d in row] for ct, row in zip(cell_types, drops)}
+
+
+def _compare_per_cell(pairs: list[tuple[float, float]],
+                      cell_types: list[str]) -> tuple[dict[str, list[float]] | None, dict[str, str]]:
+    """Fallback com os modelos por tipo celular: um `predict` por (tipo, variante).
+
+    Returns:
+        tuple: (viabilidades por tipo, ou None se faltar um modelo;
+        versões dos modelos usados, como {'tipo/variante': versão})
+    """
+    dmso, tre = np.asarray(pairs, dtype=float).T
+    contexts = formulation_context(dmso, tre)
+    result, versions = {}, {}
+    for ct in cell_types:
+        values = [0.0] * len(pairs)
+        for variant in np.unique(contexts):
+            idx = np.flatnonzero(contexts == variant)
+            model, served, version = try_load_model_versioned(ct, variant=str(variant))
+            if model is None:
+                return None, versions
+            versions[f"{ct}/{served}"] = version
+            drops = _predict_drop(model, [[dmso[i], tre[i]] for i in idx])
+            for i, d in zip(idx, drops):
+                values[i] = clamp_viability(100 - d)
+        result[ct] = values
+    return result, versions
+
+
+@app.route('/compare', methods=['POST'])
+def compare() -> object:
+    """API: Compara a viabilidade prevista entre tipos celulares.
+    
+    Recebe uma grade de formulações (DMSO, TREHALOSE) e, opcionalmente, os
+    tipos celulares (padrão: todos). Com o modelo conjunto disponível, a grade
+    inteira é avaliada em uma única chamada; sem ele (ou com
+    `"model": "per_cell"`), usa os modelos por tipo celular e variante.
+    """
+    try:
+        data = request.json or {}
+        pairs, error = _parse_compare_formulations(data.get('formulations'))
+        if error:
+            return jsonify({'errors': [error]}), 400
+        
+        cell_types = [str(ct).lower() for ct in data.get('cell_types') or CELL_TYPES_LIST]
+        invalid = [ct for ct in cell_types if ct not in VALID_CELL_TYPES]
+        if invalid:
+            return jsonify({'errors': [f'Tipo celular inválido: {ct}' for ct in invalid]}), 400
+        cell_types = list(dict.fromkeys(cell_types))
+        
+        joint_model, version = (get_joint_model_versioned() if data.get('model') != 'per_cell'
+                                else (None, None))
+        if joint_model is not None:
+            viability, source = _compare_joint(joint_model, pairs, cell_types), JOINT_MODEL
+        else:
+            viability, version = _compare_per_cell(pairs, cell_types)
+            source = 'per_cell'
+            if viability is None:
+                return jsonify({'error': 'Modelo não encontrado para algum tipo celular.'}), 404
+        
+        logger.info("Comparação: %d formulações x %d tipos (%s)", len(pairs), len(cell_types), source)
+        payload = {
+            'cell_types': cell_types,
+            'formulations': [
+                {'dmso': d, 'trehalose': t, 'label': f"{d:g}% DMSO + {t:g}% TRE"} for d, t in pairs
+            ],
+            'viability': viability,
+            'model': source
+        }
+        _audit_prediction(None, source, {'viability': viability}, version)
+        return json_response(payload)
+    except Exception as e:
+        logger.error("Erro em /compare: %s", e, exc_info=True)
+        return jsonify({'error': 'Erro interno ao comparar tipos celulares.'}), 500
+
+
+# Contribuições por (cell_type, variante, linha de features), como as predições
+explain_cache = ContributionCache()
+FEATURE_AGENTS = {col: name for name, col in CRYOPROTECTOR_COLUMNS.items()}
+
+
+def _explain_variant(cell_type: str, formulation: dict[str, float]) -> str:
+    """Variante do modelo que avalia a formulação, como em /predict-mixture.
+    
+    Raises:
+        ValueError: Para tipo celular, agente ou concentração inválidos
+    """
+    if cell_type not in VALID_CELL_TYPES:
+        raise ValueError(f'Tipo celular inválido: {cell_type}')
+    if not formulation or not all(v >= 0 for v in formulation.values()) or not any(formulation.values()):
+        raise ValueError('A formulação deve ter ao menos um crioprotetor com concentração > 0.')
+    unknown = [cp for cp in formulation if cp not in CRYOPROTECTOR_COLUMNS]
+    if unknown:
+        raise ValueError(f'Crioprotetor inválido: {unknown[0]}')
+    
+    if not set(formulation) <= set(FEATURE_MAP):
+        return MULTI_VARIANT
+    dmso = formulation.get('DMSO', 0.0)
+    tre = formulation.get('TREHALOSE', 0.0)
+    return 'both' if (dmso > 0 and tre > 0) else ('dmso_only' if dmso > 0 else 'trehalose_only')
+
+
+def _explain_row(formulation: dict[str, float], features: list[str] | None) -> tuple[float, ...]:
+    """Linha de features da formulação: densa (DMSO, TREHALOSE) ou nas colunas do modelo 'multi'."""
+    if features is None:
+        return (float(formulation.get('DMSO', 0.0)), float(formulation.get('TREHALOSE', 0.0)))
+    return tuple(float(v) for v in build_sparse_feature_matrix([formulation], features=features).toarray()[0])
+
+
+@app.route('/explain', methods=['POST'])
+def explain() -> object:
+    """API: Contribuição de cada crioprotetor para a viabilidade prevista.
+    
+    Corpo: {"inputs": [{"cell_type": "hepg2", "formulation": {"DMSO": 10}}, ...]}
+    (ou um único objeto com cell_type e formulation). As contribuições vêm do
+    TreeSHAP nativo do XGBoost (`pred_contribs`), em pontos de viabilidade:
+    `base_viability` + soma das contribuições = viabilidade prevista (antes do
+    limite 0-100). Entradas do mesmo modelo são avaliadas em uma só chamada.
+    """
+    try:
+        data = request.json or {}
+        items = data.get('inputs') if 'inputs' in data else [data]
+        if not isinstance(items, list) or not items:
+            return jsonify({'errors': ['Informe ao menos uma entrada.']}), 400
+        if len(items) > MAX_EXPLAIN_INPUTS:
+            return jsonify({'errors': [f'Máximo de {MAX_EXPLAIN_INPUTS} entradas por requisição.']}), 400
+        
+        parsed = []
+        for item in items:
+            try:
+                cell_type = str(item.get('cell_type', '')).lower()
+                formulation = {str(cp).upper(): float(c) for cp, c in (item.get('formulation') or {}).items()}
+                parsed.append((cell_type, formulation, _explain_variant(cell_type, formulation)))
+            except (ValueError, TypeError, AttributeError) as ve:
+                return jsonify({'errors': [str(ve)]}), 400
+        
+        # Agrupa por modelo: uma chamada pred_contribs por (cell_type, variante)
+        groups: dict[tuple[str, str], list[int]] = {}
+        for i, (cell_type, _, variant) in enumerate(parsed):
+            groups.setdefault((cell_type, variant), []).append(i)
+        
+        results = [None] * len(parsed)
+        for (cell_type, variant), indices in groups.items():
+            generation = explain_cache.generation
+            model = try_load_model(cell_type, variant=variant)
+            sparse_features = get_sparse_model_features(model) if model is not None else None
+            if model is None or (variant == MULTI_VARIANT and sparse_features is None):
+                return jsonify({'error': f'Modelo não encontrado: {cell_type} ({variant})'}), 404
+            if backend_of(model).name != 'xgboost':
+                return jsonify({'errors': [f'Explicação disponível apenas para modelos XGBoost; '
+                                           f'{cell_type} ({variant}) usa {backend_of(model).name}.']}), 400
+            features = sparse_features or MODEL_FEATURES
+            to_matrix = None
+            if sparse_features is not None:
+                to_matrix = lambda rows: sparse.csr_matrix(np.asarray(rows, dtype=float))  # noqa: E731
+            
+            try:
+                rows = [_explain_row(parsed[i][1], sparse_features) for i in indices]
+            except ValueError as ve:
+                return jsonify({'errors': [str(ve)]}), 400
+            for i, (contribs, bias) in zip(indices, explain_rows(model, (cell_type, variant), rows, explain_cache,
+                                                                  to_matrix, generation=generation)):
+                results[i] = {
+                    'cell_type': cell_type,
+                    'model_variant': variant,
+                    'formulation': parsed[i][1],
+                    'viability': clamp_viability(100 - (bias + float(contribs.sum()))),
+                    'base_viability': 100 - bias,
+                    # + 0.0 normaliza -0.0 (features sem efeito)
+                    'contributions': {FEATURE_AGENTS.get(f, f): -float(c) + 0.0 for f, c in zip(features, contribs)},
+                }
+        
+        logger.info("Explicação: %d entradas, %d modelos", len(parsed), len(groups))
+        return json_response({'explanations': results})
+    except Exception as e:
+        logger.error("Erro em /explain: %s", e, exc_info=True)
+        return jsonify({'error': 'Erro interno ao explicar predições.'}), 500
+
+
+# Superfícies binárias por (tipo, grade, dtype, versões dos modelos)
+surface_cache = SurfaceCache()
+
+
+def _surface_axis(name: str, n_points: int) -> np.ndarray:
+    """Eixo de /surface a partir de `<name>_min`/`<name>_max` (padrão: 0-100)."""
+    lo = request.args.get(f'{name}_min', CONCENTRATION_MIN, type=float)
+    hi = request.args.get(f'{name}_max', CONCENTRATION_MAX, type=float)
+    if not CONCENTRATION_MIN <= lo < hi <= CONCENTRATION_MAX:
+        raise ValueError(f'Intervalo de {name} inválido: use {CONCENTRATION_MIN} <= min < max <= {CONCENTRATION_MAX}.')
+    return np.linspace(lo, hi, n_points)
+
+
+@app.route('/surface/<cell_type>')
+def surface(cell_type: str) -> object:
+    """API: Grade de viabilidade DMSO × TREHALOSE em formato binário (heatmap).
+    
+    Query: `resolution` (pontos por eixo), `dmso_min`/`dmso_max`,
+    `trehalose_min`/`trehalose_max` e `dtype` ('float32' ou 'uint16').
+    Retorna `application/octet-stream` no formato de `src/model/surface.py`;
+    o ETag muda quando qualquer modelo usado na grade é republicado.
+    """
+    try:
+        cell_type = str(cell_type).lower()
+        is_valid, error = validate_cell_type(cell_type)
+        if not is_valid:
+            return jsonify({'errors': [error]}), 400
+        
+        resolution = request.args.get('resolution', SURFACE_DEFAULT_RESOLUTION, type=int)
+        if not 2 <= resolution <= SURFACE_MAX_RESOLUTION:
+            return jsonify({'errors': [f'Resolução deve estar entre 2 e {SURFACE_MAX_RESOLUTION}.']}), 400
+        dtype = request.args.get('dtype', 'float32')
+        if dtype not in SURFACE_DTYPES:
+            return jsonify({'errors': [f"dtype inválido: {dtype}. Use {', '.join(SURFACE_DTYPES)}."]}), 400
+        try:
+            dmso_axis = _surface_axis('dmso', resolution)
+            tre_axis = _surface_axis('trehalose', resolution)
+        except ValueError as ve:
+            return jsonify({'errors': [str(ve)]}), 400
+        
+        # Modelos e versões de cada classe de formulação presente na grade
+        contexts = np.unique(formulation_context(*np.meshgrid(dmso_axis, tre_axis)))
+        generation = surface_cache.generation
+        models, versions = {}, []
+        for variant in contexts:
+            try:
+                resolved = _resolve_variant(cell_type, str(variant))
+            except FileNotFoundError as fe:
+                return jsonify({'error': str(fe)}), 404
+            models[str(variant)], version = model_cache.get_versioned((cell_type, resolved))
+            versions.append((resolved, version))
+        
+        key = (cell_type, resolution, dtype, dmso_axis[0], dmso_axis[-1], tre_axis[0], tre_axis[-1],
+               tuple(versions))
+        payload = surface_cache.get(key)
+        if payload is None:
+            values = evaluate_surface(dmso_axis, tre_axis, lambda v, X: np.asarray(_predict_drop(models[v], X)))
+            payload = encode_surface(values, dmso_axis, tre_axis, dtype)
+            # Sem versão (modelo não serializável), a superfície não é reaproveitada
+            if all(version for _, version in versions):
+                surface_cache.put(key, payload, generation=generation)
+        
+        response = Response(payload, mimetype='application/octet-stream')
+        response.set_etag(hashlib.sha256(repr(key).encode()).hexdigest()[:16])
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    except Exception as e:
+        logger.error("Erro em /surface: %s", e, exc_info=True)
+        return jsonify({'error': 'Erro interno ao calcular superfície.'}), 500
+
+
 @app.route('/model-metrics/<cell_type>')
 def model_metrics(cell_type: str) -> object:
     """API: Retorna métricas do modelo (feature importances, etc)."""
@@ -472,22 +1219,61 @@ def model_metrics(cell_type: str) -> object:
         }
         return jsonify(metrics)
     except Exception as e:
-        logger.error(f"Erro ao obter métricas para {cell_type}: {e}", exc_info=True)
+        logger.error("Erro ao obter métricas para %s: %s", cell_type, e, exc_info=True)
         return jsonify({'error': 'Erro ao obter métricas.'}), 500
     
 
-def _send_graph_file(cell_type: str, filename: str) -> object:
-    """Serve arquivo de gráfico sem cache."""
-    cell_type = cell_type.lower()
-    response = send_from_directory(GRAPHS_DIR / cell_type, filename, cache_timeout=0)
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
+# Gráficos de análise gerados na primeira requisição, em cache por hash do modelo
+graph_cache = GraphCache(GRAPHS_DIR, workers=int(os.getenv('GRAPH_WORKERS', GRAPH_WORKERS)),
+                         wait_s=float(os.getenv('GRAPH_WAIT_S', GRAPH_WAIT_S)))
+GRAPH_RETRY_S = 2
+
+
+def _graph_pending(filename: str) -> object:
+    """Resposta enquanto o gráfico é gerado: a página se recarrega sozinha."""
+    body = (f'<meta http-equiv="refresh" content="{GRAPH_RETRY_S}"><p>Gerando o gráfico...</p>'
+            if filename.endswith('.html') else '')
+    response = Response(body, status=503, mimetype='text/html')
+    response.headers['Retry-After'] = str(GRAPH_RETRY_S)
+    response.headers['Cache-Control'] = 'no-store'
     return response
 
 
+def _send_graph_file(graph_key: str, filename: str) -> object:
+    """Serve um arquivo de gráfico da versão atual do modelo, gerando-o se preciso.
+
+    `graph_key` é 'tipo' ou 'tipo_variante'. Sem modelo ou conjunto de teste
+    salvo, serve o arquivo pré-gerado em GRAPHS_DIR/<graph_key>, se houver.
+    """
+    graph_key = graph_key.lower()
+    try:
+        cell_type, variant = parse_graph_key(graph_key)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    model_file, holdout_file, digest = graph_sources(MODELS_DIR, published_models[0], cell_type, variant)
+    if figure_of(filename) is None or not model_file.exists() or not holdout_file.exists():
+        response = send_from_directory(GRAPHS_DIR / graph_key, filename, max_age=0)
+        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+        return response
+
+    try:
+        path = graph_cache.get(cell_type, variant, filename, model_file, holdout_file, digest=digest)
+    except FileNotFoundError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logger.error("Erro ao gerar gráfico %s/%s: %s", graph_key, filename, e, exc_info=True)
+        return jsonify({'error': 'Erro interno ao gerar gráfico.'}), 500
+    if path is None:
+        return _graph_pending(filename)
+    # O conteúdo só muda com o modelo: ETag = versão do modelo + arquivo
+    response = send_file(path, max_age=0, etag=f"{path.parent.name}-{filename}")
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
 @app.route('/graphs/<cell_type>/<path:filename>')
 def serve_cell_graphs(cell_type: str, filename: str) -> object:
-    """API: Serve gráficos HTML para cada tipo celular."""
+    """API: Serve gráficos (HTML/PNG) de cada tipo celular ou 'tipo_variante'."""
     return _send_graph_file(cell_type, filename)
 
 
@@ -0,0 +1,108 @@
+"""
+Benchmark do custo do log de auditoria por predição.
+
+Compara o tempo médio de /specific-predict sem auditoria e com o sink
+assíncrono de `src.utils.audit` nas políticas 'drop' e 'block', mede o custo
+de `record()` no thread da requisição e conta os descartes de uma rajada
+maior que a fila.
+
+Uso:
+    python benchmarks/bench_audit.py --requests 3000
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app as cryo_app  # noqa: E402
+from src.utils.audit import AuditLog, read_audit_file  # noqa: E402
+
+PAYLOAD = {'cell_type': 'hepg2', 'cryoprotector': 'DMSO', 'concentration': 10}
+RECORD = {
+    'route': '/specific-predict', 'params': PAYLOAD, 'cell_type': 'hepg2', 'model_variant': 'dmso_only',
+    'model_version': '4550ef040746', 'result': {'viability': 93.83},
+}
+
+
+def _time_requests(n_requests: int, rounds: int = 5) -> float:
+    """Retorna o tempo médio (µs) por requisição da melhor rodada."""
+    client = cryo_app.app.test_client()
+    client.post('/specific-predict', json=PAYLOAD)
+    per_round = max(1, n_requests // rounds)
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(per_round):
+            client.post('/specific-predict', json=PAYLOAD)
+        best = min(best, (time.perf_counter() - start) / per_round)
+    return best * 1e6
+
+
+def _time_record(audit: AuditLog, n_calls: int = 20000) -> float:
+    """Retorna o custo médio (µs) de um `record()` no thread chamador."""
+    start = time.perf_counter()
+    for _ in range(n_calls):
+        audit.record(**RECORD)
+    return (time.perf_counter() - start) / n_calls * 1e6
+
+
+def _burst(directory: Path, policy: str, n_records: int, max_queue: int) -> dict:
+    """Rajada de `n_records` registros contra uma fila de `max_queue`."""
+    audit = AuditLog(directory, policy=policy, max_queue=max_queue, block_timeout=0.001)
+    start = time.perf_counter()
+    for _ in range(n_records):
+        audit.record(**RECORD)
+    elapsed = time.perf_counter() - start
+    audit.close()
+    written = sum(len(read_audit_file(path)) for path in directory.glob('audit-*.jsonl.gz'))
+    return {'dropped': audit.dropped, 'written': written, 'elapsed': elapsed, 'files': audit.files}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--burst', type=int, default=50_000)
+    parser.add_argument('--burst-queue', type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    original = cryo_app.audit_log
+    results = {}
+    record_cost = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        cryo_app.audit_log = None
+        results['desligado'] = _time_requests(args.requests)
+
+        for policy in ('drop', 'block'):
+            audit = AuditLog(Path(tmp) / policy, policy=policy)
+            cryo_app.audit_log = audit
+            results[f"fila {policy}"] = _time_requests(args.requests)
+            record_cost[policy] = _time_record(audit)
+            audit.close()
+        cryo_app.audit_log = original
+
+        bursts = {policy: _burst(Path(tmp) / f"burst-{policy}", policy, args.burst, args.burst_queue)
+                  for policy in ('drop', 'block')}
+
+    base = results['desligado']
+    print(f"{'modo':<14}{'µs/req':>10}{'overhead µs':>14}")
+    for name, value in results.items():
+        print(f"{name:<14}{value:>10.1f}{value - base:>14.1f}")
+    print()
+    print(f"{'política':<14}{'µs/record() no thread da requisição':>38}")
+    for name, value in record_cost.items():
+        print(f"{name:<14}{value:>38.2f}")
+    print()
+    print(f"Rajada de {args.burst} registros, fila de {args.burst_queue}:")
+    print(f"{'política':<14}{'gravados':>10}{'descartados':>14}{'s':>8}{'arquivos':>10}")
+    for name, b in bursts.items():
+        print(f"{name:<14}{b['written']:>10}{b['dropped']:>14}{b['elapsed']:>8.2f}{b['files']:>10}")
+
+
+if __name__ == '__main__':
+    main()
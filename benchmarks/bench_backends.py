@@ -0,0 +1,127 @@
+"""
+Benchmark dos backends de regressão: acurácia contra custo de treino e de serviço.
+
+Para cada (tipo celular, variante densa) e backend de `src.model.backends`,
+mede nos mesmos folds de validação cruzada o MAE e o R²; o tempo de ajuste
+sobre o dataset completo da variante; o tamanho do artefato (`.pkl` e bytes
+do pacote de modelos); e a latência de predição de uma linha e por linha em
+lotes, como no micro-batcher e nas curvas do servidor.
+
+Uso:
+    python benchmarks/bench_backends.py --cell-types hepg2 --variants default both
+    python benchmarks/bench_backends.py --backends xgboost random_forest --json resultados.json
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import KFold
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.constants import CELL_TYPES_LIST  # noqa: E402
+from src.model.backends import BACKENDS, get_backend  # noqa: E402
+from src.model.trainer import FEATURES, TARGET, load_partitions  # noqa: E402
+
+DENSE_VARIANTS = ['default', 'dmso_only', 'trehalose_only', 'both']
+
+
+def _cv_scores(backend, variant: str, X: np.ndarray, y: np.ndarray, n_folds: int) -> tuple[float, float]:
+    """(MAE, R²) sobre as predições fora do fold de todas as linhas."""
+    base = backend.build(variant)
+    pred = np.empty_like(y)
+    for train_idx, test_idx in KFold(n_splits=n_folds, shuffle=True, random_state=42).split(X):
+        model = backend.fit(clone(base), X[train_idx], y[train_idx])
+        pred[test_idx] = backend.predict(model, X[test_idx])
+    return float(mean_absolute_error(y, pred)), float(r2_score(y, pred))
+
+
+def _latency(backend, model, X: np.ndarray, repeat: int) -> float:
+    """Mediana (µs) de uma chamada de predição sobre X."""
+    backend.predict(model, X)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        backend.predict(model, X)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1e6
+
+
+def bench_pair(name: str, variant: str, X: np.ndarray, y: np.ndarray, args) -> dict:
+    """Mede um backend sobre o dataset de uma variante."""
+    backend = get_backend(name)
+    mae, r2 = _cv_scores(backend, variant, X, y, args.folds)
+
+    start = time.perf_counter()
+    model = backend.fit(backend.build(variant), X, y)
+    fit_s = time.perf_counter() - start
+
+    buf = io.BytesIO()
+    joblib.dump(model, buf)
+    rng = np.random.default_rng(0)
+    batch = rng.uniform(0, 100, size=(args.batch, X.shape[1]))
+    batch_us = _latency(backend, model, batch, max(3, args.repeat // 10))
+    return {
+        'backend': name,
+        'cv_mae': mae,
+        'cv_r2': r2,
+        'fit_s': fit_s,
+        'pkl_bytes': buf.tell(),
+        'bundle_bytes': len(backend.to_bytes(model)),
+        'single_us': _latency(backend, model, X[:1], args.repeat),
+        'batch_us_per_row': batch_us / args.batch,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cell-types', nargs='+', default=CELL_TYPES_LIST)
+    parser.add_argument('--variants', nargs='+', default=['default'], choices=DENSE_VARIANTS)
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=200, help="Repetições da medida de latência de uma linha")
+    parser.add_argument('--batch', type=int, default=1000, help="Linhas do lote da medida de latência em lote")
+    parser.add_argument('--json', type=Path, default=None, help="Grava os resultados neste arquivo")
+    args = parser.parse_args()
+    # Folds pequenos levam o otimizador do kernel do GP aos limites: esperado aqui
+    warnings.filterwarnings('ignore', category=ConvergenceWarning)
+
+    results = []
+    header = (f"{'tipo/variante':<22}{'backend':<18}{'n':>5}{'MAE CV':>8}{'R² CV':>7}{'ajuste s':>10}"
+              f"{'pkl KB':>9}{'1 linha µs':>12}{'lote µs/linha':>15}")
+    print(header)
+    print('-' * len(header))
+    for cell_type in args.cell_types:
+        df, partitions = load_partitions(cell_type, args.variants)
+        for variant in args.variants:
+            rows = partitions[variant]
+            X = df[FEATURES].iloc[rows].to_numpy(dtype=float)
+            y = df[TARGET].iloc[rows].to_numpy(dtype=float)
+            if len(y) < args.folds * 2:
+                print(f"{cell_type}/{variant:<15} ignorado: {len(y)} linhas")
+                continue
+            for name in args.backends:
+                r = {'cell_type': cell_type, 'variant': variant, 'n': len(y),
+                     **bench_pair(name, variant, X, y, args)}
+                results.append(r)
+                print(f"{cell_type + '/' + variant:<22}{name:<18}{r['n']:>5}{r['cv_mae']:>8.2f}{r['cv_r2']:>7.2f}"
+                      f"{r['fit_s']:>10.2f}{r['pkl_bytes'] / 1024:>9.0f}{r['single_us']:>12.0f}"
+                      f"{r['batch_us_per_row']:>15.2f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding='utf-8')
+        print(f"\nResultados gravados em {args.json}")
+
+
+if __name__ == '__main__':
+    main()
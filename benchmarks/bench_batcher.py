@@ -0,0 +1,90 @@
+"""
+Benchmark de carga do micro-batcher de predições.
+
+Dispara requisições concorrentes de uma linha (/specific-predict,
+/predict-both, /predict-mixture) contra o app Flask em processo, com o
+batcher desligado e ligado, e reporta throughput e latências p50/p99.
+
+Uso:
+    python benchmarks/bench_batcher.py --threads 32 --requests 4000
+"""
+
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app as cryo_app  # noqa: E402
+from src.model.batcher import PredictionBatcher  # noqa: E402
+
+PAYLOADS = [
+    ('/specific-predict', {'cell_type': 'hepg2', 'cryoprotector': 'DMSO', 'concentration': 10}),
+    ('/specific-predict', {'cell_type': 'rat', 'cryoprotector': 'TREHALOSE', 'concentration': 20}),
+    ('/predict-both', {'cell_type': 'hepg2', 'dmso': 5.0, 'trehalose': 20.0}),
+    ('/predict-mixture', {'cell_type': 'rat', 'mixture': [
+        {'cryoprotector': 'DMSO', 'concentration': 10},
+        {'cryoprotector': 'TREHALOSE', 'concentration': 5},
+    ]}),
+]
+
+
+def run(batcher: PredictionBatcher | None, threads: int, n_requests: int) -> dict:
+    """Executa a carga e retorna métricas agregadas."""
+    cryo_app.prediction_batcher = batcher
+    client = cryo_app.app.test_client()
+
+    def one(i: int) -> float:
+        route, payload = PAYLOADS[i % len(PAYLOADS)]
+        start = time.perf_counter()
+        resp = client.post(route, json=payload)
+        elapsed = time.perf_counter() - start
+        if resp.status_code != 200:
+            raise RuntimeError(f"{route} -> {resp.status_code}: {resp.get_data(as_text=True)}")
+        return elapsed
+
+    # Aquecimento: carrega modelos no cache
+    for i in range(len(PAYLOADS)):
+        one(i)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = np.array(list(pool.map(one, range(n_requests))))
+    wall = time.perf_counter() - start
+
+    result = {
+        'throughput_rps': n_requests / wall,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+    }
+    if batcher is not None:
+        result.update(batcher.stats())
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--window-ms', type=float, default=2.0)
+    parser.add_argument('--max-batch', type=int, default=64)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    off = run(None, args.threads, args.requests)
+    on = run(PredictionBatcher(args.window_ms, args.max_batch), args.threads, args.requests)
+
+    print(f"{'modo':<10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, res in (('sem lote', off), ('com lote', on)):
+        print(f"{name:<10}{res['throughput_rps']:>10.1f}{res['p50_ms']:>10.2f}{res['p99_ms']:>10.2f}")
+    print(f"tamanho médio do lote: {on['mean_batch_size']:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark do modelo conjunto contra os modelos por tipo celular.
+
+Compara, nos mesmos folds de validação cruzada, o MAE por tipo celular de
+um modelo por tipo (DMSO + TREHALOSE) e do modelo conjunto (tipo celular e
+classe da formulação categóricos); a quantidade e o tamanho dos artefatos;
+e a latência de /compare com o modelo conjunto e com o fallback por tipo.
+
+Uso:
+    python benchmarks/bench_joint_model.py --folds 5 --repeat 50
+"""
+
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app as cryo_app  # noqa: E402
+from src.constants import CELL_TYPES_LIST, JOINT_MODEL, MODEL_FEATURES  # noqa: E402
+from src.model.trainer import CryoModelTrainer  # noqa: E402
+
+
+def _cv_mae(X, y, n_folds: int) -> dict[str, tuple[float, float]]:
+    """MAE por tipo celular: (por tipo, conjunto), sobre os mesmos folds."""
+    per_cell_est = CryoModelTrainer(CELL_TYPES_LIST[0]).model
+    joint_est = CryoModelTrainer(JOINT_MODEL).model
+    cells = X['cell_type'].astype(str).to_numpy()
+    y = y.to_numpy()
+    errors = {ct: ([], []) for ct in CELL_TYPES_LIST}
+
+    folds = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=42).split(X, cells)
+    for train_idx, test_idx in folds:
+        joint = clone(joint_est).fit(X.iloc[train_idx], y[train_idx])
+        joint_pred = joint.predict(X.iloc[test_idx])
+        for ct in CELL_TYPES_LIST:
+            tr = train_idx[cells[train_idx] == ct]
+            te_mask = cells[test_idx] == ct
+            if len(tr) < 2 or not te_mask.any():
+                continue
+            te = test_idx[te_mask]
+            model = clone(per_cell_est).fit(X.iloc[tr][MODEL_FEATURES], y[tr])
+            errors[ct][0].extend(np.abs(model.predict(X.iloc[te][MODEL_FEATURES]) - y[te]))
+            errors[ct][1].extend(np.abs(joint_pred[te_mask] - y[te]))
+    return {ct: (float(np.mean(a)), float(np.mean(b))) for ct, (a, b) in errors.items() if a}
+
+
+def _artifacts(joint_model) -> tuple[tuple[int, int], tuple[int, int]]:
+    """(quantidade, bytes) dos .pkl densos por tipo celular e do modelo conjunto."""
+    paths = [p for ct in CELL_TYPES_LIST for p in cryo_app.MODELS_DIR.glob(f"xgboost_{ct}*.pkl")
+             if not p.stem.endswith('_multi')]
+    buf = io.BytesIO()
+    joblib.dump(joint_model, buf)
+    return (len(paths), sum(p.stat().st_size for p in paths)), (1, buf.tell())
+
+
+def _latency(client, payload: dict, repeat: int) -> float:
+    """Mediana (ms) de /compare para o payload."""
+    client.post('/compare', json=payload)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        resp = client.post('/compare', json=payload)
+        times.append(time.perf_counter() - start)
+        assert resp.status_code == 200, resp.json
+    return float(np.median(times)) * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    trainer = CryoModelTrainer(JOINT_MODEL)
+    trainer.prepare_data(trainer._load_data())
+    X, y = trainer.X_full, trainer.y_full
+
+    print(f"Acurácia ({args.folds} folds, {len(X)} linhas)")
+    print(f"{'tipo':<8}{'MAE por tipo':>14}{'MAE conjunto':>14}")
+    for ct, (per_cell, joint) in _cv_mae(X, y, args.folds).items():
+        print(f"{ct:<8}{per_cell:>14.3f}{joint:>14.3f}")
+
+    joint_model = clone(trainer.model).fit(X, y)
+    (n_cells, size_cells), (n_joint, size_joint) = _artifacts(joint_model)
+    print()
+    print(f"Artefatos: por tipo {n_cells} arquivos / {size_cells / 1024:.0f} KiB; "
+          f"conjunto {n_joint} arquivo / {size_joint / 1024:.0f} KiB")
+
+    # O benchmark usa o modelo conjunto recém-treinado, sem gravá-lo em models/
+    cryo_app.get_joint_model_versioned = lambda: (joint_model, None)
+    client = cryo_app.app.test_client()
+    rng = np.random.default_rng(0)
+    print()
+    print(f"{'formulações':<13}{'conjunto ms':>13}{'por tipo ms':>13}")
+    for n in (1, 10, 100):
+        dmso = rng.choice([0, 5, 10, 20], size=n)
+        tre = np.where(dmso == 0, rng.choice([5, 10, 20], size=n), rng.choice([0, 10], size=n))
+        formulations = [{'dmso': int(d), 'trehalose': int(t)} for d, t in zip(dmso, tre)]
+        joint_ms = _latency(client, {'formulations': formulations}, args.repeat)
+        per_cell_ms = _latency(client, {'formulations': formulations, 'model': 'per_cell'}, args.repeat)
+        print(f"{n:<13}{joint_ms:>13.2f}{per_cell_ms:>13.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark do custo de logging por requisição.
+
+Compara o tempo médio de /specific-predict com o logging desligado, com o
+handler síncrono antigo (basicConfig em DEBUG) e com a fila JSON de
+`src.utils.log` (com e sem amostragem por rota).
+
+Uso:
+    python benchmarks/bench_logging.py --requests 3000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app as cryo_app  # noqa: E402
+from src.utils.log import configure_logging, stop_logging  # noqa: E402
+
+PAYLOAD = {'cell_type': 'hepg2', 'cryoprotector': 'DMSO', 'concentration': 10}
+
+
+def _time_requests(n_requests: int, rounds: int = 5) -> float:
+    """Retorna o tempo médio (µs) por requisição da melhor rodada."""
+    client = cryo_app.app.test_client()
+    client.post('/specific-predict', json=PAYLOAD)
+    per_round = max(1, n_requests // rounds)
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(per_round):
+            client.post('/specific-predict', json=PAYLOAD)
+        best = min(best, (time.perf_counter() - start) / per_round)
+    return best * 1e6
+
+
+def _time_emit(n_calls: int = 20000) -> float:
+    """Retorna o custo médio (µs) de um `logger.info` no thread chamador."""
+    log = logging.getLogger('bench')
+    start = time.perf_counter()
+    for i in range(n_calls):
+        log.info("Específica: %s, %s, %s -> %s", 'hepg2', 'DMSO', i, 93.83)
+    return (time.perf_counter() - start) / n_calls * 1e6
+
+
+def _reset_root() -> logging.Logger:
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    return root
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=3000)
+    args = parser.parse_args()
+
+    results = {}
+    emit = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = open(os.path.join(tmp, 'bench.log'), 'w', encoding='utf-8')
+
+        _reset_root()
+        logging.disable(logging.CRITICAL)
+        results['desligado'] = _time_requests(args.requests)
+        logging.disable(logging.NOTSET)
+
+        root = _reset_root()
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG)
+        results['síncrono DEBUG'] = _time_requests(args.requests)
+        emit['síncrono DEBUG'] = _time_emit()
+
+        _reset_root()
+        configure_logging(level='INFO', sampling={}, stream=sink)
+        results['fila JSON INFO'] = _time_requests(args.requests)
+        emit['fila JSON INFO'] = _time_emit()
+        stop_logging()
+
+        _reset_root()
+        configure_logging(level='INFO', sampling={'/specific-predict': 0.1},
+                          route_getter=cryo_app._current_route, stream=sink)
+        results['fila JSON 10%'] = _time_requests(args.requests)
+        stop_logging()
+
+        _reset_root()
+        sink.close()
+
+    base = results['desligado']
+    print(f"{'modo':<18}{'µs/req':>10}{'overhead µs':>14}")
+    for name, value in results.items():
+        print(f"{name:<18}{value:>10.1f}{value - base:>14.1f}")
+    print()
+    print(f"{'modo':<18}{'µs/logger.info no thread da requisição':>40}")
+    for name, value in emit.items():
+        print(f"{name:<18}{value:>40.2f}")
+
+
+if __name__ == '__main__':
+    main()
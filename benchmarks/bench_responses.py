@@ -0,0 +1,78 @@
+"""
+Benchmark da camada de resposta JSON.
+
+Para cada endpoint de predição, compara o tempo de serialização do payload
+com o `jsonify` padrão do Flask e com `src.utils.responses.json_response`
+(orjson quando instalado, floats limitados a VIABILITY_DECIMAL_PLACES), e os
+bytes enviados: corpo do `jsonify`, corpo compacto e corpo com gzip.
+
+Uso:
+    python benchmarks/bench_responses.py --repeat 2000 --compare-size 200
+"""
+
+import argparse
+import gzip
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask import jsonify  # noqa: E402
+
+import app as cryo_app  # noqa: E402
+from src.constants import GZIP_LEVEL  # noqa: E402
+from src.utils import responses  # noqa: E402
+
+
+def _requests(compare_size: int) -> list[tuple[str, str, str, dict | None]]:
+    """(nome, método, rota, corpo) de cada endpoint medido."""
+    formulations = [{'dmso': d, 'trehalose': t} for d in range(0, 50, 5) for t in range(0, 100, 5)
+                    if d or t][:compare_size]
+    return [
+        ('/predict DMSO', 'post', '/predict', {'cell_type': 'hepg2', 'cryoprotector': 'DMSO'}),
+        ('/predict BOTH', 'post', '/predict', {'cell_type': 'hepg2', 'cryoprotector': 'BOTH'}),
+        ('/specific-predict', 'post', '/specific-predict',
+         {'cell_type': 'hepg2', 'cryoprotector': 'DMSO', 'concentration': 10}),
+        ('/available-both', 'get', '/available-both/hepg2', None),
+        (f'/compare ({len(formulations)})', 'post', '/compare', {'formulations': formulations}),
+    ]
+
+
+def _best_time(fn, repeat: int, rounds: int = 5) -> float:
+    """Melhor tempo médio (µs) por chamada entre as rodadas."""
+    per_round = max(1, repeat // rounds)
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(per_round):
+            fn()
+        best = min(best, (time.perf_counter() - start) / per_round)
+    return best * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--compare-size', type=int, default=200)
+    args = parser.parse_args()
+
+    client = cryo_app.app.test_client()
+    encoder = 'orjson' if responses.orjson is not None else 'json (stdlib)'
+    print(f"Encoder: {encoder}")
+    print(f"{'endpoint':<22}{'jsonify µs':>12}{'novo µs':>10}{'jsonify B':>12}{'novo B':>9}{'gzip B':>9}")
+
+    for name, method, route, body in _requests(args.compare_size):
+        resp = getattr(client, method)(route, json=body)
+        payload = resp.get_json()
+        with cryo_app.app.test_request_context():
+            old = jsonify(payload).get_data()
+            new = responses.json_response(payload).get_data()
+            t_old = _best_time(lambda: jsonify(payload).get_data(), args.repeat)
+            t_new = _best_time(lambda: responses.json_response(payload).get_data(), args.repeat)
+        compressed = len(gzip.compress(new, compresslevel=GZIP_LEVEL))
+        print(f"{name:<22}{t_old:>12.1f}{t_new:>10.1f}{len(old):>12}{len(new):>9}{compressed:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""
+Gerador de carga para dimensionamento do servidor.
+
+Sobe a aplicação localmente (ou usa `--url` de um servidor já iniciado) e
+dispara uma mistura configurável de /predict, /specific-predict,
+/predict-both, /predict-mixture e /available-both com a concorrência pedida.
+Reporta vazão, latências p50/p95/p99 e taxa de erro por rota, e salva o
+resultado em JSON para comparar releases e modos de servidor.
+
+Uso:
+    python benchmarks/loadtest.py --concurrency 8 --duration 30
+    python benchmarks/loadtest.py --env PREDICTION_BATCHING=1 --label batching
+    python benchmarks/loadtest.py --server-cmd "gunicorn -w 4 -b 127.0.0.1:{port} app:app"
+    python benchmarks/loadtest.py --url http://127.0.0.1:5000 --mix predict=1,specific-predict=9
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.constants import CELL_TYPES_LIST, CONCENTRATION_RANGES  # noqa: E402
+
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+DEFAULT_MIX = 'predict=3,specific-predict=4,predict-both=1,predict-mixture=1,available-both=1'
+ROUTES = ('predict', 'specific-predict', 'predict-both', 'predict-mixture', 'available-both')
+FLASK_CMD = (
+    "{python} -c \"import app; app.app.run(host='127.0.0.1', port={port}, debug=False, threaded=True)\""
+)
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    """
+    Interpreta a mistura de rotas.
+
+    Examples:
+        >>> parse_mix('predict=3,available-both=1')
+        {'predict': 3.0, 'available-both': 1.0}
+    """
+    mix = {}
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        route, _, weight = item.partition('=')
+        route = route.strip().lstrip('/')
+        if route not in ROUTES:
+            raise ValueError(f"Rota desconhecida na mistura: {route}")
+        mix[route] = float(weight or 1)
+    return mix
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(host: str, port: int, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request('GET', '/available-both/hepg2')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"Servidor não respondeu em {timeout:.0f} s")
+
+
+class RequestFactory:
+    """Gera requisições aleatórias (método, caminho, corpo) por rota."""
+
+    def __init__(self, pairs: dict[str, list[dict]], seed: int) -> None:
+        self.pairs = {ct: p for ct, p in pairs.items() if p}
+        self.rng = random.Random(seed)
+
+    def build(self, route: str) -> tuple[str, str, dict | None]:
+        rng = self.rng
+        cell_type = rng.choice(CELL_TYPES_LIST)
+        if route == 'predict':
+            return 'POST', '/predict', {'cell_type': cell_type,
+                                        'cryoprotector': rng.choice(['DMSO', 'TREHALOSE', 'BOTH'])}
+        if route == 'specific-predict':
+            cp = rng.choice(['DMSO', 'TREHALOSE'])
+            return 'POST', '/specific-predict', {'cell_type': cell_type, 'cryoprotector': cp,
+                                                 'concentration': rng.choice(CONCENTRATION_RANGES[cp][1:])}
+        if route == 'predict-both':
+            cell_type = rng.choice(list(self.pairs)) if self.pairs else cell_type
+            pair = rng.choice(self.pairs[cell_type]) if self.pairs else {'dmso': 5, 'trehalose': 5}
+            return 'POST', '/predict-both', {'cell_type': cell_type, 'dmso': pair['dmso'],
+                                             'trehalose': pair['trehalose']}
+        if route == 'predict-mixture':
+            return 'POST', '/predict-mixture', {'cell_type': cell_type, 'mixture': [
+                {'cryoprotector': 'DMSO', 'concentration': rng.choice(CONCENTRATION_RANGES['DMSO'][1:])},
+                {'cryoprotector': 'TREHALOSE', 'concentration': rng.choice(CONCENTRATION_RANGES['TREHALOSE'][1:])},
+            ]}
+        return 'GET', f'/available-both/{cell_type}', None
+
+
+def _worker(host: str, port: int, mix: dict[str, float], factory: RequestFactory, stop_at: float,
+            results: dict[str, list], lock: threading.Lock) -> None:
+    """Laço de um cliente: conexão keep-alive, uma requisição por vez."""
+    routes, weights = list(mix), list(mix.values())
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    local: dict[str, list] = {route: [] for route in routes}
+    while time.time() < stop_at:
+        with lock:
+            route = factory.rng.choices(routes, weights)[0]
+            method, path, body = factory.build(route)
+        payload = json.dumps(body) if body is not None else None
+        headers = {'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'} if body is not None else {}
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            ok = 200 <= resp.status < 300
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+        local[route].append((time.perf_counter() - start, ok))
+    conn.close()
+    with lock:
+        for route, samples in local.items():
+            results[route].extend(samples)
+
+
+def _summarize(samples: list[tuple[float, bool]], duration: float) -> dict:
+    if not samples:
+        return {'requests': 0}
+    latencies = np.array([s[0] for s in samples]) * 1e3
+    errors = sum(1 for s in samples if not s[1])
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'requests': len(samples),
+        'throughput_rps': len(samples) / duration,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'mean_ms': float(latencies.mean()),
+        'errors': errors,
+        'error_rate': errors / len(samples),
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> dict:
+    mix = parse_mix(args.mix)
+    server = None
+    if args.url:
+        parsed = urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+        mode = 'external'
+    else:
+        host, port = '127.0.0.1', _free_port()
+        cmd = (args.server_cmd or FLASK_CMD).format(python=shlex.quote(sys.executable), port=port)
+        mode = args.server_cmd or 'flask-threaded'
+        env = {**os.environ, **dict(item.split('=', 1) for item in args.env), 'PYTHONPATH': str(ROOT)}
+        server = subprocess.Popen(shlex.split(cmd), cwd=ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_ready(host, port, args.startup_timeout)
+
+        conn = http.client.HTTPConnection(host, port, timeout=10)
+        pairs = {}
+        for ct in CELL_TYPES_LIST:
+            conn.request('GET', f'/available-both/{ct}')
+            resp = conn.getresponse()
+            body = resp.read()
+            pairs[ct] = json.loads(body).get('pairs', []) if resp.status == 200 else []
+        conn.close()
+
+        factory = RequestFactory(pairs, args.seed)
+        lock = threading.Lock()
+        if args.warmup > 0:
+            warm = {route: [] for route in mix}
+            _run_phase(host, port, mix, factory, args.concurrency, args.warmup, warm, lock)
+        results = {route: [] for route in mix}
+        elapsed = _run_phase(host, port, mix, factory, args.concurrency, args.duration, results, lock)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    all_samples = [s for samples in results.values() for s in samples]
+    return {
+        'label': args.label,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': _git_revision(),
+        'server_mode': mode,
+        'env': args.env,
+        'concurrency': args.concurrency,
+        'duration_s': elapsed,
+        'mix': mix,
+        'host': {'python': platform.python_version(), 'platform': platform.platform(),
+                 'cpus': os.cpu_count()},
+        'total': _summarize(all_samples, elapsed),
+        'routes': {route: _summarize(samples, elapsed) for route, samples in results.items()},
+    }
+
+
+def _run_phase(host: str, port: int, mix: dict[str, float], factory: RequestFactory, concurrency: int,
+               duration: float, results: dict[str, list], lock: threading.Lock) -> float:
+    start = time.time()
+    stop_at = start + duration
+    threads = [threading.Thread(target=_worker, args=(host, port, mix, factory, stop_at, results, lock))
+               for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.time() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--concurrency', type=int, default=8, help="Clientes simultâneos")
+    parser.add_argument('--duration', type=float, default=30.0, help="Duração da medição (s)")
+    parser.add_argument('--warmup', type=float, default=3.0, help="Aquecimento não medido (s)")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Pesos por rota: rota=peso,...")
+    parser.add_argument('--url', help="Servidor já iniciado (não sobe a aplicação)")
+    parser.add_argument('--server-cmd', help="Comando do servidor, com {port} e {python}")
+    parser.add_argument('--env', action='append', default=[], metavar='NOME=VALOR',
+                        help="Variável de ambiente do servidor (repetível)")
+    parser.add_argument('--label', default='', help="Rótulo salvo no resultado")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--startup-timeout', type=float, default=60.0)
+    parser.add_argument('--output', type=Path, help="Arquivo JSON (padrão: benchmarks/results/)")
+    args = parser.parse_args()
+
+    report = run(args)
+
+    print(f"{'rota':<18}{'req':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'erros %':>9}")
+    for route, s in list(report['routes'].items()) + [('TOTAL', report['total'])]:
+        if not s['requests']:
+            print(f"{route:<18}{0:>8}")
+            continue
+        print(f"{route:<18}{s['requests']:>8}{s['throughput_rps']:>9.1f}{s['p50_ms']:>9.2f}"
+              f"{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}{100 * s['error_rate']:>9.2f}")
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        suffix = f"-{args.label}" if args.label else ''
+        output = RESULTS_DIR / f"loadtest-{datetime.now():%Y%m%d-%H%M%S}{suffix}.json"
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\nResultado salvo em {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""
+Pontuação offline de arquivos grandes de formulações (campanhas de triagem).
+
+Lê o CSV de entrada em blocos, pontua cada bloco com predições vetorizadas
+(`src.model.scoring`) em processos de trabalho e grava o resultado em fluxo,
+na ordem da entrada, como CSV ou Parquet (um arquivo por bloco em um
+diretório; requer pyarrow). Os modelos e a escolha da variante são os do
+servidor (`app.get_model`: pacote de modelos ou `.pkl`, com fallback para
+'default').
+
+Após cada bloco gravado, o progresso vai para `<saída>.progress.json`; se a
+execução for interrompida, rodar o mesmo comando retoma do primeiro bloco
+não gravado (`--restart` recomeça do zero).
+
+Uso:
+    python score_formulations.py triagem.csv resultados.csv --cell-type hepg2
+    python score_formulations.py triagem.csv resultados.parquet --workers 4 --chunk-size 50000
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from src.constants import VALID_CELL_TYPES
+from src.model.scoring import score_frame
+from src.utils.log import configure_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 20_000
+FORMATS = ('csv', 'parquet')
+_READ_BLOCK = 1 << 20
+
+# Servidor importado sob demanda em cada processo (`_app`)
+_cryo_app = None
+
+
+def _app():
+    """Módulo `app`, importado uma vez por processo e sem auditoria."""
+    global _cryo_app
+    if _cryo_app is None:
+        # A pontuação offline não passa pelas rotas: nada a auditar
+        os.environ.setdefault('AUDIT_LOG', '0')
+        import app as cryo_app
+        _cryo_app = cryo_app
+    return _cryo_app
+
+
+def load_model(cell_type: str, variant: str) -> tuple[object, str, str | None]:
+    """Carregador de `score_frame` com a lógica do servidor (modelo, variante efetiva, versão)."""
+    return _app().get_model_versioned(cell_type, variant=variant)
+
+
+def score_chunk(frame: pd.DataFrame, cell_type: str | None) -> pd.DataFrame:
+    """Pontua um bloco (executado nos processos de trabalho)."""
+    return score_frame(frame, load_model, cell_type=cell_type)
+
+
+def count_rows(path: Path) -> int:
+    """Linhas de dados do CSV (quebras de linha menos o cabeçalho), para o progresso."""
+    lines = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        while block := f.read(_READ_BLOCK):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    return max(0, lines + (last != b'\n') - 1)
+
+
+class ResultWriter:
+    """Grava os blocos pontuados em ordem, com ponto de retomada após cada bloco.
+
+    Args:
+        output: Arquivo CSV ou diretório Parquet
+        fmt: 'csv' ou 'parquet'
+        signature: Identificação da execução (entrada e tamanho do bloco);
+            um progresso com outra assinatura não é retomado
+
+    Raises:
+        ValueError: Se houver progresso de outra execução (use --restart)
+        ImportError: Para Parquet sem pyarrow
+    """
+
+    def __init__(self, output: Path, fmt: str, signature: dict, restart: bool = False) -> None:
+        if fmt == 'parquet':
+            try:
+                import pyarrow  # noqa: F401 - falha cedo, antes de pontuar
+            except ImportError:
+                raise ImportError("Saída Parquet requer pyarrow (pip install pyarrow)") from None
+        self.output = Path(output)
+        self.fmt = fmt
+        self.signature = signature
+        self.progress_path = self.output.with_name(self.output.name + '.progress.json')
+        self.chunks_done = 0
+        self.rows_done = 0
+        self._bytes = 0
+
+        state = self._read_progress() if not restart else None
+        if state is not None and state['signature'] != signature:
+            raise ValueError(f"{self.progress_path} é de outra execução (entrada ou --chunk-size diferentes); "
+                             "use --restart")
+        if state is not None:
+            self.chunks_done, self.rows_done, self._bytes = state['chunks'], state['rows'], state['bytes']
+        self._truncate()
+
+    def _read_progress(self) -> dict | None:
+        if not self.progress_path.exists():
+            return None
+        with open(self.progress_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _truncate(self) -> None:
+        """Descarta o que foi gravado depois do último ponto de retomada."""
+        if self.fmt == 'csv':
+            if self.chunks_done == 0:
+                self.output.unlink(missing_ok=True)
+            elif self.output.exists():
+                with open(self.output, 'r+b') as f:
+                    f.truncate(self._bytes)
+            return
+        if self.chunks_done == 0 and self.output.exists():
+            shutil.rmtree(self.output)
+        self.output.mkdir(parents=True, exist_ok=True)
+        for part in self.output.glob('part-*.parquet'):
+            if int(part.stem.split('-')[1]) >= self.chunks_done:
+                part.unlink()
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if self.fmt == 'csv':
+            with open(self.output, 'ab') as f:
+                frame.to_csv(f, index=False, header=self.chunks_done == 0)
+                self._bytes = f.tell()
+        else:
+            frame.to_parquet(self.output / f"part-{self.chunks_done:05d}.parquet", index=False)
+        self.chunks_done += 1
+        self.rows_done += len(frame)
+        self._save_progress()
+
+    def _save_progress(self) -> None:
+        # Escrita atômica: uma interrupção aqui mantém o ponto anterior
+        tmp = self.progress_path.with_name(self.progress_path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'signature': self.signature, 'chunks': self.chunks_done, 'rows': self.rows_done,
+                       'bytes': self._bytes}, f)
+        os.replace(tmp, self.progress_path)
+
+    def finish(self) -> None:
+        """Remove o ponto de retomada após a última gravação."""
+        self.progress_path.unlink(missing_ok=True)
+
+
+def _report(rows_done: int, total: int, resumed: int, start: float) -> None:
+    """Linha de progresso em stderr (linhas, %, vazão e tempo restante)."""
+    elapsed = time.perf_counter() - start
+    rate = (rows_done - resumed) / elapsed if elapsed > 0 else 0.0
+    eta = (total - rows_done) / rate if rate > 0 else float('nan')
+    pct = 100.0 * rows_done / total if total else 100.0
+    print(f"\r{rows_done}/{total} linhas ({pct:5.1f}%), {rate:,.0f} linhas/s, restam {eta:,.0f} s   ",
+          end='', file=sys.stderr, flush=True)
+
+
+def score_file(input_path: Path, output: Path, cell_type: str | None = None, fmt: str | None = None,
+               chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int | None = None, restart: bool = False,
+               progress: bool = True) -> int:
+    """
+    Pontua `input_path` em blocos e grava em `output`, retomando se houver progresso.
+
+    Args:
+        input_path: CSV com uma coluna por crioprotetor e, sem `cell_type`,
+            a coluna 'cell_type'
+        output: CSV ou diretório Parquet de saída
+        cell_type: Tipo celular de todas as linhas
+        fmt: 'csv' ou 'parquet' (padrão: pela extensão de `output`)
+        chunk_size: Linhas por bloco
+        workers: Processos de pontuação (padrão: número de CPUs; 1 = no
+            próprio processo)
+        restart: Ignora o progresso salvo
+        progress: Mostra o progresso em stderr
+
+    Returns:
+        int: Total de linhas gravadas
+
+    Raises:
+        ValueError: Tipo celular ou formato inválido, colunas ausentes ou
+            progresso de outra execução
+    """
+    if cell_type is not None and cell_type.lower() not in VALID_CELL_TYPES:
+        raise ValueError(f"Tipo celular inválido: {cell_type}")
+    input_path, output = Path(input_path), Path(output)
+    fmt = fmt or ('parquet' if output.suffix == '.parquet' else 'csv')
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato inválido: {fmt}. Use {', '.join(FORMATS)}")
+    stat = input_path.stat()
+    signature = {'input': str(input_path.resolve()), 'size': stat.st_size, 'mtime': stat.st_mtime,
+                 'chunk_size': chunk_size, 'cell_type': cell_type}
+    writer = ResultWriter(output, fmt, signature, restart=restart)
+    if writer.chunks_done:
+        logger.info("Retomando %s: %d blocos (%d linhas) já gravados", output, writer.chunks_done, writer.rows_done)
+
+    total = count_rows(input_path)
+    resumed = writer.rows_done
+    # Linhas já gravadas são puladas na leitura (sem reprocessar)
+    reader = pd.read_csv(input_path, chunksize=chunk_size, skiprows=range(1, resumed + 1))
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    def written(frame: pd.DataFrame) -> None:
+        writer.write(frame)
+        if progress:
+            _report(writer.rows_done, total, resumed, start)
+
+    if workers <= 1:
+        for frame in reader:
+            written(score_chunk(frame, cell_type))
+    else:
+        # spawn: os processos não herdam threads do XGBoost; no máximo 2 blocos por processo em voo
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn')) as pool:
+            pending = deque()
+            for frame in reader:
+                pending.append(pool.submit(score_chunk, frame, cell_type))
+                if len(pending) >= 2 * workers:
+                    written(pending.popleft().result())
+            while pending:
+                written(pending.popleft().result())
+
+    if progress:
+        print(file=sys.stderr)
+    writer.finish()
+    logger.info("%d linhas pontuadas em %s (%.1f s)", writer.rows_done - resumed, output,
+                time.perf_counter() - start)
+    return writer.rows_done
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pontua um CSV de formulações com os modelos do servidor.")
+    parser.add_argument('input', type=Path, help="CSV com uma coluna por crioprotetor (ex.: DMSO, TREHALOSE)")
+    parser.add_argument('output', type=Path, help="CSV de saída, ou diretório .parquet")
+    parser.add_argument('--cell-type', default=None,
+                        help="Tipo celular de todas as linhas (sem ele, usa a coluna 'cell_type')")
+    parser.add_argument('--format', choices=FORMATS, default=None,
+                        help="Formato da saída (padrão: pela extensão)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Linhas por bloco")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processos de pontuação (padrão: número de CPUs)")
+    parser.add_argument('--restart', action='store_true', help="Ignora o progresso salvo e recomeça")
+    parser.add_argument('--quiet', action='store_true', help="Sem linha de progresso")
+    args = parser.parse_args()
+
+    configure_logging()
+    try:
+        score_file(args.input, args.output, cell_type=args.cell_type, fmt=args.format,
+                   chunk_size=args.chunk_size, workers=args.workers, restart=args.restart,
+                   progress=not args.quiet)
+    except (ValueError, ImportError, FileNotFoundError) as e:
+        parser.error(str(e))
+    except KeyboardInterrupt:
+        print(f"\nInterrompido; rode o mesmo comando para retomar de {args.output}.progress.json",
+              file=sys.stderr)
+        sys.exit(130)
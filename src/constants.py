@@ -24,6 +24,29 @@ FEATURE_MAP = {
 # Nomes das features no modelo (ordem importa)
 MODEL_FEATURES = list(FEATURE_MAP.values())  # ['% DMSO', 'TREHALOSE']
 
+# Todos os crioprotetores com coluna própria nos CSVs brutos (nome → coluna).
+# Usado pela variante 'multi'; novos agentes devem ser adicionados ao final,
+# pois a posição define o índice da coluna na matriz esparsa.
+CRYOPROTECTOR_COLUMNS = {
+    'DMSO': '% DMSO',
+    'TREHALOSE': 'TREHALOSE',
+    'GLICEROL': 'GLICEROL',
+    'SACAROSE': 'SACAROSE',
+    'GLICOSE': 'GLICOSE',
+    'MALTOSE': 'MALTOSE',
+    'LACTOSE': 'LACTOSE',
+    'RAFFINOSE': 'RAFFINOSE',
+    'MALTOTRIOSE': 'MALTOTRIOSE',
+    'MALTOTETRAOSE': 'MALTOTETRAOSE',
+    'MALTOPENTAOSE': 'MALTOPENTAOSE',
+    'MALTOEXAOSE': 'MALTOEXAOSE',
+    'MALTOHEPTAOSE': 'MALTOHEPTAOSE',
+    'CYCLODEXTRIN': 'ϒ-CYCLODEXTRIN',
+    'DEXTRAN': 'DEXTRAN ',
+    'RHAMNOLIPIDS': 'Di-rhamnolipids',
+}
+MULTI_FEATURES = list(CRYOPROTECTOR_COLUMNS.values())
+
 # ========== Ranges de Concentração ==========
 CONCENTRATION_STEP = 5
 CONCENTRATION_MIN = 0
@@ -36,8 +59,20 @@ CONCENTRATION_RANGES = {
     'BOTH': list(range(CONCENTRATION_MIN, CONCENTRATION_MAX + 1, CONCENTRATION_STEP))
 }
 
+# Curvas com resolução pedida (/predict, /specific-predict): menor passo (%)
+# aceito e orçamento de pontos da curva enviada (reduzida com LTTB)
+CURVE_MIN_RESOLUTION = 0.01
+CURVE_DEFAULT_MAX_POINTS = 200
+CURVE_MIN_POINTS = 10
+CURVE_MAX_POINTS = 5000
+
 # ========== Variantes de Modelo ==========
-MODEL_VARIANTS = {'default', 'dmso_only', 'trehalose_only', 'both'}
+MULTI_VARIANT = 'multi'
+MODEL_VARIANTS = {'default', 'dmso_only', 'trehalose_only', 'both', MULTI_VARIANT}
+# Modelo conjunto: um único booster para todos os tipos celulares, com tipo
+# celular e classe da formulação como features categóricas
+JOINT_MODEL = 'joint'
+JOINT_CONTEXTS = ['dmso_only', 'trehalose_only', 'both']
 VARIANT_MAPPING = {
     'DMSO': 'dmso_only',
     'TREHALOSE': 'trehalose_only',
@@ -48,9 +83,75 @@ VARIANT_MAPPING = {
 RATE_LIMIT_PREDICT = "30/minute"
 RATE_LIMIT_MIXTURE = "30/minute"
 
+# ========== Micro-batching de Predições ==========
+# Janela máxima (ms) de espera por outras linhas e tamanho que dispara o lote
+BATCH_WINDOW_MS = 2.0
+BATCH_MAX_SIZE = 64
+
+# ========== Cache de Modelos ==========
+# Orçamento de memória (MB) dos modelos carregados por processo
+MODEL_CACHE_BUDGET_MB = 256
+
+# ========== Respostas HTTP ==========
+# Respostas compressíveis a partir deste tamanho (bytes) são enviadas com gzip
+GZIP_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+
+# ========== Superfície de Resposta ==========
+# Pontos por eixo da grade DMSO × TREHALOSE de /surface e superfícies em cache
+SURFACE_DEFAULT_RESOLUTION = 101
+SURFACE_MAX_RESOLUTION = 512
+SURFACE_CACHE_SIZE = 32
+
+# ========== Monitoramento de Drift ==========
+# Bins dos histogramas de entradas/saídas (0-100) e faixas agrupadas no PSI
+DRIFT_HISTOGRAM_BINS = 100
+DRIFT_PSI_BINS = 10
+
+# ========== Auditoria de Predições ==========
+# Fila em memória (registros), lote de escrita, espera máxima antes de gravar,
+# rotação dos arquivos (tamanho comprimido/idade) e espera da política 'block'
+AUDIT_QUEUE_SIZE = 10_000
+AUDIT_BATCH_SIZE = 256
+AUDIT_FLUSH_INTERVAL_S = 1.0
+AUDIT_ROTATE_MB = 64
+AUDIT_ROTATE_S = 24 * 3600
+AUDIT_BLOCK_TIMEOUT_MS = 50
+
+# ========== Atualização Incremental ==========
+# Árvores acrescentadas por atualização e no total desde o último treino
+# completo, fração máxima de linhas novas e piora relativa tolerada do MAE no
+# conjunto de teste antes de cair para o treino completo
+INCREMENTAL_TREES = 25
+INCREMENTAL_MAX_TREES = 100
+INCREMENTAL_MAX_NEW_FRACTION = 0.2
+INCREMENTAL_MAX_MAE_INCREASE = 0.05
+
+# ========== Backends de Modelo ==========
+# Backend de regressão de cada (tipo celular, variante), em 'tipo/variante';
+# pares ausentes usam DEFAULT_MODEL_BACKEND (ver src.model.backends)
+DEFAULT_MODEL_BACKEND = 'xgboost'
+MODEL_BACKENDS: dict[str, str] = {}
+
+# ========== Publicação de Modelos ==========
+# Intervalo mínimo (s) entre verificações do manifesto pelo servidor e versões
+# mantidas de cada modelo em models/versions/ (ver src.model.registry)
+MANIFEST_POLL_S = 2.0
+MODEL_VERSIONS_KEEP = 3
+
+# ========== Gráficos de Análise ==========
+# Processos que geram os gráficos sob demanda, espera máxima (s) de uma
+# requisição pela geração e versões do modelo com gráficos mantidos em disco
+# (ver src.visualization.graph_cache)
+GRAPH_WORKERS = 1
+GRAPH_WAIT_S = 60.0
+GRAPH_CACHE_KEEP = 2
+
 # ========== Limites de Validação ==========
 MIN_MIXTURE_COMPONENTS = 2
 MAX_MIXTURE_COMPONENTS = 5
+MAX_COMPARE_FORMULATIONS = 500
+MAX_EXPLAIN_INPUTS = 500
 
 # ========== Valores de Viabilidade ==========
 VIABILITY_MIN = 0.0
@@ -1,29 +1,207 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from typing import Iterator
+from src.constants import CONCENTRATION_MIN, CONCENTRATION_MAX, MULTI_FEATURES, MULTI_VARIANT
 
 RAW_DATA_DIR = Path(__file__).parent.parent.parent / "data" / "raw"
 FEATURES = ['% DMSO', 'TREHALOSE']
 TARGET = '% QUEDA DA VIABILIDADE'
+DEFAULT_CHUNKSIZE = 50_000
 
-def load_raw_data(cell_type: str) -> pd.DataFrame:
+
+def parse_percent_series(values: pd.Series) -> pd.Series:
+    """Converte uma coluna de textos como '10%', '10,5%' para float (vetorizado).
+
+    Valores não numéricos ('x', 'NA', vazio) viram NaN.
+    """
+    s = (
+        values.astype('string')
+        .str.replace('%', '', regex=False)
+        .str.replace('"', '', regex=False)
+        .str.replace(',', '.', regex=False)
+        .str.strip()
+    )
+    return pd.to_numeric(s, errors='coerce').astype(float)
+
+
+def variant_mask(df: pd.DataFrame, variant: str) -> pd.Series:
+    """Máscara das linhas válidas para a variante (mesmos critérios do treino).
+
+    Exclui linhas sem alvo, controles sem crioprotetor e concentrações fora
+    de [CONCENTRATION_MIN, CONCENTRATION_MAX]; depois aplica o filtro da
+    variante. Espera colunas já numéricas.
+    """
+    return pd.Series(variant_masks(df, [variant])[variant], index=df.index)
+
+
+def variant_masks(df: pd.DataFrame, variants: list[str | None]) -> dict[str | None, np.ndarray]:
+    """Máscaras de várias variantes em uma única passada sobre as colunas.
+
+    As comparações comuns (alvo presente, faixa de concentração, controles)
+    são feitas uma vez e combinadas por variante; `None` (ou uma variante
+    desconhecida) seleciona todas as linhas válidas de DMSO/TREHALOSE.
+
+    Examples:
+        >>> df = pd.DataFrame({'% DMSO': [10.0, 0.0, 5.0], 'TREHALOSE': [0.0, 10.0, 5.0],
+        ...                    '% QUEDA DA VIABILIDADE': [1.0, 2.0, 3.0]})
+        >>> {v: m.tolist() for v, m in variant_masks(df, ['default', 'both']).items()}
+        {'default': [True, True, False], 'both': [False, False, True]}
+    """
+    masks = {}
+    if MULTI_VARIANT in variants:
+        X = df[MULTI_FEATURES].fillna(0.0).to_numpy(dtype=float)
+        in_range = ((X >= CONCENTRATION_MIN) & (X <= CONCENTRATION_MAX)).all(axis=1)
+        masks[MULTI_VARIANT] = df[TARGET].notna().to_numpy() & (X > 0).any(axis=1) & in_range
+
+    dense = [v for v in variants if v != MULTI_VARIANT]
+    if not dense:
+        return masks
+    values = df[FEATURES + [TARGET]].to_numpy(dtype=float)
+    dm, tr = values[:, 0], values[:, 1]
+    in_range = ((values[:, :2] >= CONCENTRATION_MIN) & (values[:, :2] <= CONCENTRATION_MAX)).all(axis=1)
+    # Excluir controle contaminado: onde ambas as colunas são 0
+    valid = ~np.isnan(values).any(axis=1) & ~((dm == 0) & (tr == 0)) & in_range
+    dmso_only = valid & (dm > 0) & (tr == 0)
+    trehalose_only = valid & (tr > 0) & (dm == 0)
+    by_variant = {
+        # Apenas dados "puros" (um ou outro crioprotetor)
+        'default': dmso_only | trehalose_only,
+        'dmso_only': dmso_only,
+        'trehalose_only': trehalose_only,
+        'both': valid & (dm > 0) & (tr > 0),
+    }
+    for variant in dense:
+        masks[variant] = by_variant.get(variant, valid)
+    return masks
+
+
+def partition_variants(df: pd.DataFrame, variants: list[str]) -> dict[str, np.ndarray]:
+    """Índices posicionais das linhas de cada variante (ver `variant_masks`)."""
+    return {variant: np.flatnonzero(mask) for variant, mask in variant_masks(df, variants).items()}
+
+
+def iter_csv_chunks(path: Path, columns: list[str], chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """Lê um CSV bruto em blocos, apenas com `columns`, já convertidas para float.
+
+    Colunas pedidas que não existem no arquivo entram zeradas.
+    """
+    wanted = set(columns)
+    reader = pd.read_csv(path, dtype=str, usecols=lambda c: c in wanted, chunksize=chunksize)
+    for chunk in reader:
+        for col in columns:
+            chunk[col] = parse_percent_series(chunk[col]) if col in chunk.columns else 0.0
+        yield chunk[columns]
+
+
+def _raw_csv_path(cell_type: str) -> Path:
+    """CSV bruto do tipo celular, conferindo as colunas obrigatórias (FEATURES e TARGET)."""
     file_path = RAW_DATA_DIR / f"{cell_type}.csv"
     if not file_path.exists():
         raise FileNotFoundError(f"File {cell_type}.csv not found")
-    
-    def safe_float(x):
-        s = str(x).replace('%', '').replace(',', '.').strip()
-        if s == '' or s.lower() == 'nan':
-            return float('nan')
-        return float(s)
-
-    df = pd.read_csv(
-        file_path,
-        decimal=',',
-        thousands='.',
-        converters={col: safe_float for col in FEATURES + [TARGET]}
-    )
-    
-    missing = [col for col in FEATURES + [TARGET] if col not in df.columns]
+
+    header = pd.read_csv(file_path, dtype=str, nrows=0).columns
+    missing = [col for col in FEATURES + [TARGET] if col not in header]
     if missing:
         raise ValueError(f"Missing columns: {missing}")
+    return file_path
+
+
+def iter_raw_chunks(cell_type: str, features: list[str] | None = None, variant: str | None = None,
+                    chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """Itera o CSV bruto do tipo celular em blocos, filtrando a variante em fluxo.
+
+    Apenas as colunas de features e alvo são lidas; com `variant`, cada bloco
+    é reduzido às linhas da variante antes de ser entregue, de modo que a
+    memória de pico depende do tamanho do bloco e não do arquivo. O índice
+    de cada linha é a sua posição no arquivo, como em `load_raw_data`.
+    """
+    file_path = _raw_csv_path(cell_type)
+    if variant == MULTI_VARIANT:
+        features = MULTI_FEATURES
+    columns = list(dict.fromkeys(FEATURES + list(features or []) + [TARGET]))
+    for chunk in iter_csv_chunks(file_path, columns, chunksize):
+        if variant is not None:
+            chunk = chunk[variant_mask(chunk, variant)]
+        yield chunk
+
+
+class RawDataAggregates:
+    """Agregados calculados em fluxo sobre blocos de um CSV bruto.
+
+    Mantém contagem de linhas, mínimo/máximo e mínimo não nulo por coluna e os
+    pares únicos (DMSO, TREHALOSE) com ambos > 0, sem guardar o DataFrame.
+    """
+
+    def __init__(self, columns: list[str]) -> None:
+        self.columns = list(columns)
+        self.rows = 0
+        self.min = {col: None for col in self.columns}
+        self.max = {col: None for col in self.columns}
+        self.min_nonzero = {col: None for col in self.columns}
+        self.pairs: set[tuple[float, float]] = set()
+
+    @staticmethod
+    def _merge(current: float | None, value: float, fn) -> float:
+        return value if current is None else fn(current, value)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Incorpora um bloco aos agregados."""
+        self.rows += len(chunk)
+        for col in self.columns:
+            if col not in chunk.columns:
+                continue
+            vals = chunk[col].dropna()
+            if vals.empty:
+                continue
+            self.min[col] = self._merge(self.min[col], float(vals.min()), min)
+            self.max[col] = self._merge(self.max[col], float(vals.max()), max)
+            positive = vals[vals > 0]
+            if not positive.empty:
+                self.min_nonzero[col] = self._merge(self.min_nonzero[col], float(positive.min()), min)
+
+        if all(col in chunk.columns for col in FEATURES):
+            pairs = chunk[FEATURES].dropna()
+            pairs = pairs[(pairs > 0).all(axis=1)].drop_duplicates()
+            self.pairs.update((float(d), float(t)) for d, t in pairs.itertuples(index=False))
+
+    def sorted_pairs(self) -> list[tuple[float, float]]:
+        """Pares (DMSO, TREHALOSE) únicos, ordenados."""
+        return sorted(self.pairs)
+
+
+def scan_csv(path: Path, columns: list[str], chunksize: int = DEFAULT_CHUNKSIZE) -> RawDataAggregates:
+    """Percorre um CSV bruto em blocos e retorna seus agregados."""
+    aggregates = RawDataAggregates(columns)
+    for chunk in iter_csv_chunks(path, columns, chunksize):
+        aggregates.update(chunk)
+    return aggregates
+
+
+def load_raw_data(cell_type: str, features: list[str] | None = None, variant: str | None = None,
+                  chunksize: int | None = None) -> pd.DataFrame:
+    """Carrega o CSV bruto do tipo celular convertendo features e alvo para float.
+
+    `features` permite pedir colunas de crioprotetores além de DMSO/TREHALOSE
+    (ex.: MULTI_FEATURES). Colunas de agentes ausentes no arquivo entram
+    zeradas; apenas FEATURES e TARGET são obrigatórias.
+
+    Só as colunas de features e alvo são lidas. Com `chunksize`, o arquivo é
+    lido em blocos e, se `variant` for dado, só as linhas da variante são
+    mantidas.
+    """
+    file_path = _raw_csv_path(cell_type)
+    if variant == MULTI_VARIANT:
+        features = MULTI_FEATURES
+    if chunksize:
+        chunks = list(iter_raw_chunks(cell_type, features, variant, chunksize))
+        return pd.concat(chunks, ignore_index=True)
+
+    columns = list(dict.fromkeys(FEATURES + list(features or []) + [TARGET]))
+    wanted = set(columns)
+    df = pd.read_csv(file_path, dtype=str, usecols=lambda c: c in wanted)
+    for col in columns:
+        df[col] = parse_percent_series(df[col]) if col in df.columns else 0.0
+    if variant is not None:
+        df = df[variant_mask(df, variant)]
     return df
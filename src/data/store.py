@@ -0,0 +1,297 @@
+"""
+Armazenamento versionado dos datasets brutos.
+
+Cada tipo celular tem um snapshot base e um log append-only de deltas:
+
+    data/store/<cell_type>/base.csv      snapshot inicial (cópia do CSV bruto)
+    data/store/<cell_type>/deltas.jsonl  uma linha JSON por versão
+
+Uma versão registra adições, correções (valores por coluna) e remoções de
+linhas. As linhas são identificadas por um id estável: a posição no snapshot
+base e, para linhas adicionadas, ids sequenciais a partir do fim do base (a
+coluna INDEX dos CSVs não é única). A versão 0 é o base; materializar a
+versão N é reaplicar os deltas 1..N sobre o base, sem cópias do arquivo
+inteiro por edição.
+
+A cada nova versão, o head materializado é gravado em `data/raw/<cell>.csv`,
+que continua sendo a fonte lida pelo treino e pela aplicação.
+
+Uso:
+    python -m src.data.store init rat
+    python -m src.data.store log rat
+    python -m src.data.store diff rat 0 3
+"""
+
+import argparse
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from src.constants import MODEL_VARIANTS
+from src.data.loader import RAW_DATA_DIR, TARGET, parse_percent_series, variant_masks
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = RAW_DATA_DIR.parent / "store"
+BASE_FILENAME = "base.csv"
+DELTAS_FILENAME = "deltas.jsonl"
+
+
+def _read_csv(path: Path) -> pd.DataFrame:
+    """Lê um CSV preservando os textos originais (ex.: '10%', '' em vez de NaN)."""
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def _write_atomic(df: pd.DataFrame, path: Path) -> None:
+    tmp = path.with_name(path.name + '.tmp')
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+class DatasetDiff:
+    """Diferença linha a linha entre duas versões de um dataset.
+
+    Attributes:
+        added: Ids presentes apenas na versão nova
+        removed: Ids presentes apenas na versão antiga
+        changed: Ids presentes nas duas com algum valor diferente
+        old: Linhas afetadas na versão antiga (removidas e alteradas)
+        new: Linhas afetadas na versão nova (adicionadas e alteradas)
+    """
+
+    def __init__(self, old_df: pd.DataFrame, new_df: pd.DataFrame) -> None:
+        common = old_df.index.intersection(new_df.index)
+        self.added = new_df.index.difference(old_df.index).tolist()
+        self.removed = old_df.index.difference(new_df.index).tolist()
+
+        columns = old_df.columns.union(new_df.columns)
+        a = old_df.loc[common].reindex(columns=columns, fill_value='')
+        b = new_df.loc[common].reindex(columns=columns, fill_value='')
+        self.changed = common[(a != b).any(axis=1)].tolist()
+
+        self.old = old_df.loc[self.removed + self.changed]
+        self.new = new_df.loc[self.added + self.changed]
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+    def to_dict(self) -> dict:
+        return {'added': self.added, 'removed': self.removed, 'changed': self.changed}
+
+
+class DatasetStore:
+    """Snapshot base + deltas append-only por tipo celular.
+
+    Args:
+        root: Diretório do armazenamento (padrão: data/store)
+        raw_dir: Diretório dos CSVs brutos materializados (padrão: data/raw)
+    """
+
+    def __init__(self, root: Path = STORE_DIR, raw_dir: Path = RAW_DATA_DIR) -> None:
+        self.root = Path(root)
+        self.raw_dir = Path(raw_dir)
+        self._base_cache: dict[str, tuple[float, pd.DataFrame]] = {}
+
+    def _dir(self, cell_type: str) -> Path:
+        return self.root / cell_type
+
+    def exists(self, cell_type: str) -> bool:
+        return (self._dir(cell_type) / BASE_FILENAME).exists()
+
+    def init(self, cell_type: str) -> None:
+        """
+        Cria o snapshot base a partir do CSV bruto atual.
+
+        Raises:
+            FileExistsError: Se o armazenamento do tipo celular já existir
+            FileNotFoundError: Se o CSV bruto não existir
+        """
+        if self.exists(cell_type):
+            raise FileExistsError(f"Armazenamento já inicializado: {cell_type}")
+        source = self.raw_dir / f"{cell_type}.csv"
+        if not source.exists():
+            raise FileNotFoundError(f"File {cell_type}.csv not found")
+        directory = self._dir(cell_type)
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_atomic(_read_csv(source), directory / BASE_FILENAME)
+        (directory / DELTAS_FILENAME).touch()
+        logger.info("Armazenamento de %s inicializado (versão 0)", cell_type)
+
+    def _base(self, cell_type: str) -> pd.DataFrame:
+        """Snapshot base com ids como índice (lido uma vez por modificação do arquivo)."""
+        path = self._dir(cell_type) / BASE_FILENAME
+        if not path.exists():
+            raise FileNotFoundError(f"Armazenamento não inicializado: {cell_type}")
+        mtime = path.stat().st_mtime
+        cached = self._base_cache.get(cell_type)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, _read_csv(path))
+            self._base_cache[cell_type] = cached
+        return cached[1]
+
+    def log(self, cell_type: str) -> list[dict]:
+        """Deltas registrados, em ordem (o i-ésimo cria a versão i + 1)."""
+        path = self._dir(cell_type) / DELTAS_FILENAME
+        if not path.exists():
+            raise FileNotFoundError(f"Armazenamento não inicializado: {cell_type}")
+        with open(path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def head(self, cell_type: str) -> int:
+        """Número da versão mais recente."""
+        return len(self.log(cell_type))
+
+    def materialize(self, cell_type: str, version: int | None = None) -> pd.DataFrame:
+        """
+        Reconstrói o dataset em uma versão.
+
+        Args:
+            cell_type: Tipo celular
+            version: Versão desejada (padrão: head); 0 é o snapshot base
+
+        Returns:
+            pd.DataFrame: Linhas como texto, indexadas pelo id estável
+
+        Raises:
+            ValueError: Se a versão não existir
+        """
+        deltas = self.log(cell_type)
+        version = len(deltas) if version is None else version
+        if not 0 <= version <= len(deltas):
+            raise ValueError(f"Versão inexistente para {cell_type}: {version}")
+
+        df = self._base(cell_type).copy()
+        for delta in deltas[:version]:
+            if delta.get('deleted'):
+                df = df.drop(index=delta['deleted'])
+            for row_id, values in delta.get('updated', {}).items():
+                for col, value in values.items():
+                    df.loc[int(row_id), col] = value
+            if delta.get('added'):
+                added = pd.DataFrame.from_dict(
+                    {int(k): v for k, v in delta['added'].items()}, orient='index'
+                ).reindex(columns=df.columns, fill_value='')
+                df = pd.concat([df, added.fillna('')])
+        return df
+
+    def commit(self, cell_type: str, added: list[dict] | None = None,
+               updated: dict[int, dict] | None = None, deleted: list[int] | None = None,
+               message: str = '') -> int:
+        """
+        Registra uma nova versão e materializa o head em data/raw.
+
+        Args:
+            cell_type: Tipo celular
+            added: Linhas novas ({coluna: valor}); colunas omitidas ficam vazias
+            updated: Correções {id: {coluna: valor}}
+            deleted: Ids removidos
+            message: Descrição da alteração
+
+        Returns:
+            int: Número da nova versão
+
+        Raises:
+            ValueError: Se a alteração for vazia ou citar ids/colunas inexistentes
+        """
+        added, updated, deleted = added or [], updated or {}, deleted or []
+        if not (added or updated or deleted):
+            raise ValueError("Nenhuma alteração informada")
+
+        current = self.materialize(cell_type)
+        unknown = [i for i in list(updated) + list(deleted) if int(i) not in current.index]
+        if unknown:
+            raise ValueError(f"Ids inexistentes: {unknown}")
+        columns = {col for values in list(updated.values()) + added for col in values}
+        if not columns <= set(current.columns):
+            raise ValueError(f"Colunas inexistentes: {sorted(columns - set(current.columns))}")
+
+        # Ids nunca são reutilizados, mesmo após remoções
+        next_id = self._max_id(cell_type) + 1
+        delta = {
+            'version': self.head(cell_type) + 1,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'message': message,
+            'added': {str(next_id + i): {k: str(v) for k, v in row.items()} for i, row in enumerate(added)},
+            'updated': {str(int(k)): {c: str(v) for c, v in values.items()} for k, values in updated.items()},
+            'deleted': [int(i) for i in deleted],
+        }
+        with open(self._dir(cell_type) / DELTAS_FILENAME, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(delta, ensure_ascii=False) + '\n')
+
+        self.export(cell_type)
+        logger.info("%s: versão %d registrada (%d adicionadas, %d corrigidas, %d removidas)",
+                    cell_type, delta['version'], len(added), len(updated), len(deleted))
+        return delta['version']
+
+    def _max_id(self, cell_type: str) -> int:
+        ids = [len(self._base(cell_type)) - 1]
+        ids += [int(k) for delta in self.log(cell_type) for k in delta.get('added', {})]
+        return max(ids)
+
+    def export(self, cell_type: str, version: int | None = None, path: Path | None = None) -> Path:
+        """Grava a versão materializada como CSV (padrão: head em data/raw/<cell>.csv)."""
+        path = Path(path or self.raw_dir / f"{cell_type}.csv")
+        _write_atomic(self.materialize(cell_type, version), path)
+        return path
+
+    def diff(self, cell_type: str, old_version: int, new_version: int | None = None) -> DatasetDiff:
+        """Diferença linha a linha entre duas versões (padrão da nova: head)."""
+        return DatasetDiff(self.materialize(cell_type, old_version),
+                           self.materialize(cell_type, new_version))
+
+    def changed_partitions(self, cell_type: str, old_version: int,
+                           new_version: int | None = None) -> list[str]:
+        """
+        Variantes de modelo do tipo celular afetadas entre duas versões.
+
+        Uma variante muda se alguma linha adicionada, removida ou alterada
+        (no estado antigo ou no novo) passa pelo seu filtro (`variant_masks`).
+
+        Returns:
+            list[str]: Variantes afetadas, em ordem alfabética
+        """
+        diff = self.diff(cell_type, old_version, new_version)
+        if diff.empty:
+            return []
+        rows = pd.concat([diff.old, diff.new])
+        numeric = pd.DataFrame(index=rows.index)
+        for col in rows.columns:
+            numeric[col] = parse_percent_series(rows[col])
+        # Alvo ausente não exclui a linha: uma correção pode ter removido o alvo
+        numeric[TARGET] = numeric[TARGET].fillna(0.0)
+        masks = variant_masks(numeric, MODEL_VARIANTS)
+        return sorted(v for v in MODEL_VARIANTS if masks[v].any())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Armazenamento versionado dos datasets brutos.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('init', help="Cria o snapshot base a partir do CSV bruto").add_argument('cell_type')
+    sub.add_parser('log', help="Lista as versões").add_argument('cell_type')
+    diff_parser = sub.add_parser('diff', help="Diferença entre duas versões")
+    diff_parser.add_argument('cell_type')
+    diff_parser.add_argument('old', type=int)
+    diff_parser.add_argument('new', type=int, nargs='?')
+    args = parser.parse_args()
+
+    store = DatasetStore()
+    if args.command == 'init':
+        store.init(args.cell_type)
+    elif args.command == 'log':
+        for delta in store.log(args.cell_type):
+            print(f"{delta['version']:>4}  {delta['created_at']}  +{len(delta['added'])} "
+                  f"~{len(delta['updated'])} -{len(delta['deleted'])}  {delta['message']}")
+    else:
+        diff = store.diff(args.cell_type, args.old, args.new)
+        print(json.dumps({**diff.to_dict(),
+                          'partitions': store.changed_partitions(args.cell_type, args.old, args.new)}))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
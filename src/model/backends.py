@@ -0,0 +1,246 @@
+"""
+Backends de regressão intercambiáveis por (tipo celular, variante).
+
+Cada backend implementa a mesma interface — construir, ajustar, predizer em
+lote, (des)serializar, salvar e carregar — sobre um estimador "nativo". O
+artefato salvo continua sendo o estimador (`joblib`), de modo que modelos
+XGBoost antigos seguem válidos e o backend de um modelo carregado é
+identificado pelo tipo do objeto (`backend_of`).
+
+Backends disponíveis:
+    - 'xgboost': XGBRegressor (padrão; único com entrada esparsa 'multi',
+      modelo conjunto, atualização incremental e explicação TreeSHAP nativa)
+    - 'random_forest': RandomForestRegressor
+    - 'gaussian_process': GaussianProcessRegressor (RBF + ruído branco) sobre
+      features padronizadas
+
+A escolha por par vem de MODEL_BACKENDS ('tipo/variante' → backend), com
+DEFAULT_MODEL_BACKEND para os demais.
+"""
+
+import io
+import pickle
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import RBF, ConstantKernel, WhiteKernel
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBRegressor
+
+from src.constants import DEFAULT_MODEL_BACKEND, MODEL_BACKENDS, MULTI_VARIANT
+
+# Atributos (metadados do treino) dos estimadores scikit-learn
+_ATTRS = 'cryo_attrs_'
+
+
+class ModelBackend:
+    """Interface comum dos backends de regressão.
+
+    Attributes:
+        name: Identificador do backend (chave de BACKENDS)
+        tree_based: Modelos de árvores (SHAP TreeExplainer e curva de
+            validação sobre `max_depth` se aplicam)
+        incremental: Suporta continuar o treino de um modelo salvo
+    """
+
+    name = ''
+    tree_based = False
+    incremental = False
+
+    def supports(self, variant: str, joint: bool = False) -> bool:
+        """Se o backend atende a variante (entradas densas de DMSO/TREHALOSE)."""
+        return not joint and variant != MULTI_VARIANT
+
+    def owns(self, model: object) -> bool:
+        """Se `model` é um estimador deste backend."""
+        raise NotImplementedError
+
+    def build(self, variant: str = 'default', joint: bool = False, **params) -> object:
+        """Novo estimador não ajustado para a variante."""
+        raise NotImplementedError
+
+    def fit(self, model: object, X, y) -> object:
+        """Ajusta o estimador e o retorna."""
+        return model.fit(np.asarray(X, dtype=float), np.asarray(y, dtype=float))
+
+    def predict(self, model: object, X) -> np.ndarray:
+        """Predição em lote (% de queda) para as linhas de X."""
+        return model.predict(np.asarray(X, dtype=float))
+
+    def to_bytes(self, model: object) -> bytes:
+        """Serialização compacta do modelo (pacote de modelos, versão no cache)."""
+        return pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def from_bytes(self, raw: bytes, meta: dict | None = None) -> object:
+        """Inverso de `to_bytes`; `meta` são os metadados gravados no pacote."""
+        return pickle.loads(raw)
+
+    def save(self, model: object, path: Path) -> None:
+        joblib.dump(model, path)
+
+    def dumps(self, model: object) -> bytes:
+        """Conteúdo do `.pkl` gravado por `save` (publicação atômica de `src.model.registry`)."""
+        buf = io.BytesIO()
+        joblib.dump(model, buf)
+        return buf.getvalue()
+
+    def load(self, path: Path) -> object:
+        return joblib.load(path)
+
+    def set_attrs(self, model: object, **attrs: str) -> None:
+        """Grava metadados (strings) junto com o modelo."""
+        stored = getattr(model, _ATTRS, None)
+        if stored is None:
+            stored = {}
+            setattr(model, _ATTRS, stored)
+        stored.update(attrs)
+
+    def get_attr(self, model: object, key: str) -> str | None:
+        return (getattr(model, _ATTRS, None) or {}).get(key)
+
+
+class XGBoostBackend(ModelBackend):
+    """XGBRegressor, com os hiperparâmetros de produção."""
+
+    name = 'xgboost'
+    tree_based = True
+    incremental = True
+
+    def supports(self, variant: str, joint: bool = False) -> bool:
+        return True
+
+    def owns(self, model: object) -> bool:
+        return isinstance(model, XGBRegressor)
+
+    def build(self, variant: str = 'default', joint: bool = False, n_estimators: int = 500) -> XGBRegressor:
+        return XGBRegressor(
+            objective='reg:squarederror',
+            n_estimators=n_estimators,
+            max_depth=5,
+            learning_rate=0.1,
+            subsample=0.9,
+            colsample_bytree=0.8,
+            **({'missing': 0.0} if variant == MULTI_VARIANT else {}),
+            **({'enable_categorical': True, 'tree_method': 'hist'} if joint else {})
+        )
+
+    def fit(self, model: XGBRegressor, X, y, **kwargs) -> XGBRegressor:
+        # Quadros e matrizes esparsas vão direto: nomes e categorias são preservados
+        return model.fit(X, y, **kwargs)
+
+    def predict(self, model: XGBRegressor, X) -> np.ndarray:
+        return model.predict(X, validate_features=False)
+
+    def to_bytes(self, model: XGBRegressor) -> bytes:
+        return bytes(model.get_booster().save_raw(raw_format='ubj'))
+
+    def from_bytes(self, raw: bytes, meta: dict | None = None) -> XGBRegressor:
+        model = XGBRegressor()
+        model.load_model(bytearray(raw))
+        # `missing` não é preservado pelo formato do booster
+        if meta and meta.get('missing') is not None:
+            model.set_params(missing=meta['missing'])
+        return model
+
+    def set_attrs(self, model: XGBRegressor, **attrs: str) -> None:
+        model.get_booster().set_attr(**attrs)
+
+    def get_attr(self, model: XGBRegressor, key: str) -> str | None:
+        return model.get_booster().attr(key)
+
+
+class RandomForestBackend(ModelBackend):
+    """RandomForestRegressor (como no notebook de novos_Testes, sem limite de profundidade)."""
+
+    name = 'random_forest'
+    tree_based = True
+
+    def owns(self, model: object) -> bool:
+        return isinstance(model, RandomForestRegressor)
+
+    def build(self, variant: str = 'default', joint: bool = False, n_estimators: int = 300) -> RandomForestRegressor:
+        return RandomForestRegressor(n_estimators=n_estimators, min_samples_leaf=2, random_state=42, n_jobs=1)
+
+
+class GaussianProcessBackend(ModelBackend):
+    """Processo gaussiano com kernel RBF anisotrópico + ruído branco.
+
+    As features são padronizadas e o alvo normalizado; o ajuste é O(n³) nas
+    linhas de treino, aceitável para os poucos centos de linhas por variante.
+    """
+
+    name = 'gaussian_process'
+
+    def owns(self, model: object) -> bool:
+        return isinstance(model, Pipeline) and isinstance(model[-1], GaussianProcessRegressor)
+
+    def build(self, variant: str = 'default', joint: bool = False, n_restarts: int = 3) -> Pipeline:
+        kernel = ConstantKernel(1.0, (1e-3, 1e3)) * RBF([1.0, 1.0], (1e-2, 1e3)) + WhiteKernel(0.1, (1e-5, 1e1))
+        return make_pipeline(StandardScaler(), GaussianProcessRegressor(
+            kernel=kernel, normalize_y=True, n_restarts_optimizer=n_restarts, random_state=42))
+
+
+BACKENDS: dict[str, ModelBackend] = {
+    backend.name: backend for backend in (XGBoostBackend(), RandomForestBackend(), GaussianProcessBackend())
+}
+
+
+def get_backend(name: str) -> ModelBackend:
+    """
+    Backend pelo nome.
+
+    Raises:
+        ValueError: Se o backend não existir
+    """
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Backend inválido: {name}. Use {', '.join(BACKENDS)}") from None
+
+
+def backend_for(cell_type: str, variant: str) -> ModelBackend:
+    """Backend configurado para (tipo celular, variante)."""
+    return get_backend(MODEL_BACKENDS.get(f"{cell_type}/{variant}", DEFAULT_MODEL_BACKEND))
+
+
+def backend_of(model: object) -> ModelBackend:
+    """
+    Backend de um modelo carregado, pelo tipo do estimador.
+
+    Raises:
+        TypeError: Se o estimador não pertencer a nenhum backend
+    """
+    for backend in BACKENDS.values():
+        if backend.owns(model):
+            return backend
+    raise TypeError(f"Modelo sem backend conhecido: {type(model).__name__}")
+
+
+def predict_batch(model: object, X) -> np.ndarray:
+    """Predição em lote com o backend do modelo.
+
+    Examples:
+        >>> predict_batch(model, [[10.0, 0.0], [5.0, 5.0]])  # doctest: +SKIP
+        array([ 6.2, 11.8], dtype=float32)
+    """
+    return backend_of(model).predict(model, X)
+
+
+def serialize_model(model: object) -> bytes:
+    """Bytes do modelo com o seu backend (b'' se não houver backend)."""
+    try:
+        return backend_of(model).to_bytes(model)
+    except TypeError:
+        return b''
+
+
+def get_model_attr(model: object, key: str) -> str | None:
+    """Metadado gravado no treino, ou None (modelos antigos ou sem backend)."""
+    try:
+        return backend_of(model).get_attr(model, key)
+    except TypeError:
+        return None
@@ -0,0 +1,132 @@
+"""
+Micro-batching de predições pontuais.
+
+Sob concorrência, várias requisições de uma única linha (/specific-predict,
+/predict-both, /predict-mixture) atingem o mesmo modelo e cada uma paga o
+custo fixo de uma chamada ao XGBoost. O `PredictionBatcher` agrupa essas
+linhas por chave (cell_type, variante) durante uma janela curta, executa um
+único `predict` em lote por modelo e devolve cada resultado à requisição que
+o pediu. Cada linha leva o modelo que a requisição resolveu: após um reload
+no meio da janela, linhas da mesma chave podem pertencer a modelos
+diferentes e nunca são avaliadas pelo modelo de outra.
+
+Não há thread de fundo: a primeira requisição que encontra a fila vazia
+assume o papel de líder, espera a janela (ou o lote encher) e executa o lote
+em nome de todas as outras.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+from scipy import sparse
+
+from src.model.backends import predict_batch
+
+logger = logging.getLogger(__name__)
+
+
+class _Lane:
+    """Fila de linhas pendentes para uma chave (cell_type, variante)."""
+
+    def __init__(self) -> None:
+        self.cond = threading.Condition()
+        self.pending: list[tuple[object, object, Future]] = []
+        self.leader_active = False
+
+
+class PredictionBatcher:
+    """Agrupa predições de uma linha em chamadas `predict` em lote.
+
+    Args:
+        window_ms: Tempo máximo (ms) que o líder espera por outras linhas
+        max_batch_size: Tamanho de lote que dispara a execução imediata
+    """
+
+    def __init__(self, window_ms: float = 2.0, max_batch_size: int = 64) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size deve ser >= 1")
+        self.window = max(0.0, float(window_ms)) / 1000.0
+        self.max_batch_size = int(max_batch_size)
+        self._lanes: dict[tuple, _Lane] = {}
+        self._lanes_lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+
+    def _lane(self, key: tuple) -> _Lane:
+        lane = self._lanes.get(key)
+        if lane is None:
+            with self._lanes_lock:
+                lane = self._lanes.setdefault(key, _Lane())
+        return lane
+
+    def submit(self, key: tuple, model: object, row: object) -> float:
+        """Enfileira uma linha de features e bloqueia até sua predição.
+
+        Args:
+            key: Chave de agrupamento, tipicamente (cell_type, variante, versão)
+            model: Modelo que avalia esta linha
+            row: Valores das features na ordem de MODEL_FEATURES, ou uma
+                matriz esparsa de uma linha (modelos 'multi')
+
+        Returns:
+            float: Predição bruta do modelo (% de queda da viabilidade)
+        """
+        lane = self._lane(key)
+        future: Future = Future()
+        with lane.cond:
+            lane.pending.append((model, row, future))
+            if lane.leader_active:
+                if len(lane.pending) >= self.max_batch_size:
+                    lane.cond.notify_all()
+                batch = None
+            else:
+                lane.leader_active = True
+                deadline = time.monotonic() + self.window
+                while len(lane.pending) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    lane.cond.wait(remaining)
+                batch, lane.pending = lane.pending, []
+                lane.leader_active = False
+
+        if batch is not None:
+            # Um `predict` por modelo presente no lote, na ordem de chegada
+            groups: dict[int, tuple[object, list[tuple[object, Future]]]] = {}
+            for item_model, row, item_future in batch:
+                groups.setdefault(id(item_model), (item_model, []))[1].append((row, item_future))
+            for group_model, group in groups.values():
+                self._run(group_model, group)
+        return future.result()
+
+    def _run(self, model: object, batch: list[tuple[object, Future]]) -> None:
+        """Executa um lote de um modelo e distribui os resultados (ou o erro)."""
+        try:
+            rows = [row for row, _ in batch]
+            if sparse.issparse(rows[0]):
+                X = sparse.vstack(rows, format='csr')
+            else:
+                X = np.asarray(rows, dtype=float)
+            preds = predict_batch(model, X)
+        except Exception as e:
+            logger.error("Falha no lote de %d linhas: %s", len(batch), e)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self._lanes_lock:
+            self.batches += 1
+            self.rows += len(batch)
+        for (_, future), pred in zip(batch, preds):
+            future.set_result(float(pred))
+
+    def stats(self) -> dict:
+        """Retorna contadores acumulados de lotes e linhas."""
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch_size': (self.rows / self.batches) if self.batches else 0.0,
+        }
@@ -0,0 +1,249 @@
+"""
+Pacote único de modelos mapeado em memória.
+
+Reúne todos os modelos (`models/xgboost_*.pkl`), tabelas de predição
+pré-calculadas sobre CONCENTRATION_RANGES e metadados em um só arquivo
+versionado. O servidor abre o arquivo uma vez com `mmap` somente leitura:
+as tabelas são lidas direto das páginas mapeadas (compartilhadas entre
+workers pelo cache de páginas do SO) e os bytes de cada modelo são
+desserializados apenas quando o modelo é pedido, pelo backend registrado na
+entrada (`src.model.backends`; o booster UBJ no caso do XGBoost).
+
+Formato (little-endian):
+    MAGIC (8 bytes) | versão do formato (uint32) | tamanho do índice (uint64)
+    índice JSON (utf-8) | blobs alinhados a ALIGNMENT bytes
+
+Uso:
+    python -m src.model.bundle  # gera models/bundle.cryo a partir dos .pkl e o publica
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from src.constants import CONCENTRATION_RANGES, MODEL_VARIANTS, MULTI_VARIANT, VALID_CELL_TYPES
+from src.utils.helpers import build_feature_row
+from src.model.backends import backend_of, get_backend
+from src.model.trainer import get_sparse_model_features, holdout_path
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent.parent.parent
+MODELS_DIR = BASE_DIR / "models"
+BUNDLE_FILENAME = "bundle.cryo"
+
+MAGIC = b'CRYOBNDL'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_HEADER = struct.Struct('<8sIQ')
+TABLE_DTYPE = '<f4'
+
+
+def _model_path(models_dir: Path, cell_type: str, variant: str) -> Path:
+    suffix = '' if variant == 'default' else f"_{variant}"
+    return models_dir / f"xgboost_{cell_type}{suffix}.pkl"
+
+
+def _prediction_tables(model: object) -> dict[str, tuple[list, np.ndarray]]:
+    """Pré-calcula a % de queda sobre a grade de cada crioprotetor."""
+    tables = {}
+    for cryo, grid in CONCENTRATION_RANGES.items():
+        rows = []
+        for conc in grid:
+            row = build_feature_row(cryo, conc)
+            rows.append(list(row.values()))
+        preds = backend_of(model).predict(model, np.asarray(rows, dtype=float))
+        tables[cryo] = (list(grid), np.asarray(preds, dtype=TABLE_DTYPE))
+    return tables
+
+
+def build_model_bundle(models_dir: Path = MODELS_DIR, output: Path | None = None) -> Path:
+    """
+    Empacota todos os modelos treinados de `models_dir` em um único arquivo.
+
+    Args:
+        models_dir: Diretório com os `xgboost_*.pkl`
+        output: Caminho do pacote (padrão: models_dir / BUNDLE_FILENAME)
+
+    Returns:
+        Path: Caminho do pacote gerado
+
+    Raises:
+        FileNotFoundError: Se nenhum modelo for encontrado
+    """
+    output = Path(output or models_dir / BUNDLE_FILENAME)
+    blobs: list[bytes] = []
+    entries: dict[str, dict] = {}
+    offset = 0
+
+    def add_blob(data: bytes) -> dict:
+        nonlocal offset
+        ref = {'offset': offset, 'length': len(data)}
+        blobs.append(data)
+        padding = (-len(data)) % ALIGNMENT
+        if padding:
+            blobs.append(b'\0' * padding)
+        offset += len(data) + padding
+        return ref
+
+    for cell_type in sorted(VALID_CELL_TYPES):
+        for variant in sorted(MODEL_VARIANTS):
+            path = _model_path(models_dir, cell_type, variant)
+            if not path.exists():
+                continue
+            model = joblib.load(path)
+            backend = backend_of(model)
+            raw = backend.to_bytes(model)
+            entry = {
+                'booster': add_blob(raw),
+                'tables': {},
+                'meta': {
+                    'source': path.name,
+                    'backend': backend.name,
+                    'source_mtime': path.stat().st_mtime,
+                    'sha256': hashlib.sha256(raw).hexdigest(),
+                    'n_features': int(getattr(model, 'n_features_in_', 0) or 0),
+                    'feature_names': [str(f) for f in getattr(model, 'feature_names_in_', [])],
+                    # `missing` não é preservado pelo formato do booster
+                    'missing': None if np.isnan(getattr(model, 'missing', np.nan)) else float(model.missing),
+                },
+            }
+            # Modelos 'multi' usam entrada esparsa; as tabelas densas não se aplicam
+            if variant != MULTI_VARIANT and get_sparse_model_features(model) is None:
+                for cryo, (grid, values) in _prediction_tables(model).items():
+                    ref = add_blob(values.tobytes())
+                    entry['tables'][cryo] = {**ref, 'grid': grid, 'dtype': TABLE_DTYPE}
+            entries[f"{cell_type}/{variant}"] = entry
+
+    if not entries:
+        raise FileNotFoundError(f"Nenhum modelo encontrado em {models_dir}")
+
+    digest = hashlib.sha256()
+    for key in sorted(entries):
+        digest.update(key.encode())
+        digest.update(entries[key]['meta']['sha256'].encode())
+
+    index = json.dumps({
+        'format_version': FORMAT_VERSION,
+        'bundle_version': digest.hexdigest()[:16],
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'entries': entries,
+    }).encode('utf-8')
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(index))
+    data_start = _HEADER.size + len(index)
+    data_start += (-data_start) % ALIGNMENT
+
+    # Escrita em arquivo temporário + rename: leitores nunca veem meio arquivo
+    tmp = output.with_name(output.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(header)
+        f.write(index)
+        f.write(b'\0' * (data_start - _HEADER.size - len(index)))
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, output)
+
+    logger.info("Pacote de modelos (%d entradas) salvo em %s", len(entries), output)
+    return output
+
+
+class ModelBundle:
+    """Leitor somente leitura de um pacote de modelos mapeado em memória."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, index_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Arquivo não é um pacote de modelos: {self.path}")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Versão de pacote não suportada: {version}")
+
+        self.index = json.loads(self._mm[_HEADER.size:_HEADER.size + index_len].decode('utf-8'))
+        data_start = _HEADER.size + index_len
+        self._data_start = data_start + (-data_start) % ALIGNMENT
+        self.version = self.index['bundle_version']
+
+    def has(self, cell_type: str, variant: str) -> bool:
+        return f"{cell_type}/{variant}" in self.index['entries']
+
+    def meta(self, cell_type: str, variant: str) -> dict:
+        return self.index['entries'][f"{cell_type}/{variant}"]['meta']
+
+    def size(self, cell_type: str, variant: str) -> int:
+        """Tamanho em bytes do modelo serializado de (cell_type, variante)."""
+        return self.index['entries'][f"{cell_type}/{variant}"]['booster']['length']
+
+    def load_model(self, cell_type: str, variant: str) -> object:
+        """Desserializa o modelo de (cell_type, variante) a partir do mapa.
+
+        Entradas sem 'backend' (pacotes anteriores aos backends) são XGBoost.
+        """
+        entry = self.index['entries'][f"{cell_type}/{variant}"]
+        ref = entry['booster']
+        start = self._data_start + ref['offset']
+        backend = get_backend(entry['meta'].get('backend', 'xgboost'))
+        return backend.from_bytes(self._mm[start:start + ref['length']], meta=entry['meta'])
+
+    def table(self, cell_type: str, variant: str, cryoprotector: str) -> tuple[list, np.ndarray] | None:
+        """
+        Retorna (grade, % de queda prevista) pré-calculadas, sem cópia.
+
+        Returns:
+            tuple | None: Grade de concentrações e array float32 somente
+            leitura apoiado no mapa, ou None se não houver tabela
+        """
+        entry = self.index['entries'].get(f"{cell_type}/{variant}")
+        ref = entry['tables'].get(cryoprotector) if entry else None
+        if ref is None:
+            return None
+        dtype = np.dtype(ref['dtype'])
+        values = np.frombuffer(self._mm, dtype=dtype, count=ref['length'] // dtype.itemsize,
+                               offset=self._data_start + ref['offset'])
+        return ref['grid'], values
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def open_bundle(path: Path) -> ModelBundle | None:
+    """Abre o pacote se existir; retorna None (com log) caso contrário ou em erro."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        return ModelBundle(path)
+    except Exception as e:
+        logger.error("Erro ao abrir pacote de modelos %s: %s", path, e)
+        return None
+
+
+if __name__ == '__main__':
+    from src.model.registry import publish_object, update_manifest
+    logging.basicConfig(level=logging.INFO)
+    bundle_path = build_model_bundle()
+    # Publica o pacote e os .pkl empacotados (com seus conjuntos de teste)
+    # para os servidores que observam o manifesto
+    published = {}
+    for ct in VALID_CELL_TYPES:
+        for v in MODEL_VARIANTS:
+            path = _model_path(MODELS_DIR, ct, v)
+            if not path.exists():
+                continue
+            published[f"{ct}/{v}"] = entry = publish_object(MODELS_DIR, path.name, path.read_bytes())
+            holdout = holdout_path(ct, v)
+            if holdout.exists():
+                entry['holdout'] = publish_object(MODELS_DIR, f"holdout_{holdout.name}", holdout.read_bytes())
+    update_manifest(MODELS_DIR, published,
+                    bundle=publish_object(MODELS_DIR, bundle_path.name, bundle_path.read_bytes()))
@@ -0,0 +1,192 @@
+"""
+Cache de modelos carregados limitado por memória.
+
+Substitui o limite por contagem (`lru_cache(maxsize=32)`) por um orçamento
+em bytes. Cada carga mede o tempo de carregamento e o tamanho residente do
+modelo; a remoção segue o GreedyDual-Size: a prioridade de uma entrada é
+`L + custo / tamanho`, onde o custo é o tempo de recarga e `L` é a
+prioridade da última entrada removida (envelhecimento). Modelos grandes e
+baratos de recarregar saem primeiro; modelos caros e pequenos ficam.
+
+O tamanho residente é o aumento do RSS do processo durante a carga
+(Linux, `/proc/self/statm`), com o tamanho serializado do modelo como
+piso — sob carga concorrente, o RSS pode incluir alocações de outros threads.
+O tamanho serializado e a versão vêm do carregador (o artefato publicado),
+sem serializar o modelo de novo.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Hashable
+
+from src.model.backends import backend_of
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def process_rss() -> int | None:
+    """RSS atual do processo em bytes, ou None fora do Linux."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Entry:
+    __slots__ = ('model', 'backend', 'size', 'rss_delta', 'load_time', 'version', 'priority', 'hits', 'loaded_at')
+
+    def __init__(self, model: object, size: int, rss_delta: int | None, load_time: float, version: str) -> None:
+        self.model = model
+        try:
+            self.backend = backend_of(model).name
+        except TypeError:
+            self.backend = None
+        self.size = size
+        self.rss_delta = rss_delta
+        self.load_time = load_time
+        self.version = version
+        self.priority = 0.0
+        self.hits = 0
+        self.loaded_at = time.time()
+
+
+class ModelCache:
+    """Cache GreedyDual-Size de modelos sob um orçamento de memória.
+
+    Args:
+        loader: Função que carrega o modelo de uma chave e retorna (modelo,
+            tamanho serializado em bytes, versão); exceções propagam
+        budget_bytes: Orçamento total de memória residente dos modelos
+    """
+
+    def __init__(self, loader: Callable[[Hashable], tuple[object, int, str]], budget_bytes: int) -> None:
+        self.loader = loader
+        self.budget_bytes = budget_bytes
+        self._entries: dict[Hashable, _Entry] = {}
+        self._lock = threading.Lock()
+        self._key_locks: dict[Hashable, threading.Lock] = {}
+        self._inflation = 0.0
+        self._ever_loaded: set[Hashable] = set()
+        # Incrementada por `clear`: cargas iniciadas antes não são inseridas
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.reloads = 0
+        self.evictions = 0
+
+    def _priority(self, entry: _Entry) -> float:
+        return self._inflation + entry.load_time / max(entry.size, 1)
+
+    def get(self, key: Hashable) -> object:
+        """Retorna o modelo da chave, carregando (uma vez por chave) se preciso."""
+        return self.get_versioned(key)[0]
+
+    def get_versioned(self, key: Hashable) -> tuple[object, str]:
+        """Como `get`, mas retorna também a versão (hash) do modelo servido."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.hits += 1
+                entry.priority = self._priority(entry)
+                self.hits += 1
+                return entry.model, entry.version
+            self.misses += 1
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Uma carga por chave: requisições concorrentes esperam a primeira
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    return entry.model, entry.version
+                generation = self.generation
+            entry = self._load(key)
+            with self._lock:
+                # Um `clear` durante a carga (novos modelos publicados) torna o
+                # modelo carregado obsoleto: serve esta requisição, mas não fica
+                if self.generation == generation:
+                    self._insert(key, entry)
+                else:
+                    logger.info("Carga de %s descartada: cache esvaziado durante a carga", key)
+            return entry.model, entry.version
+
+    def _load(self, key: Hashable) -> _Entry:
+        rss_before = process_rss()
+        start = time.perf_counter()
+        model, serialized_size, version = self.loader(key)
+        load_time = time.perf_counter() - start
+        rss_after = process_rss()
+
+        rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        size = max(serialized_size, rss_delta or 0)
+        return _Entry(model, size, rss_delta, load_time, version)
+
+    def _insert(self, key: Hashable, entry: _Entry) -> None:
+        self.loads += 1
+        if key in self._ever_loaded:
+            self.reloads += 1
+        self._ever_loaded.add(key)
+        entry.priority = self._priority(entry)
+        self._entries[key] = entry
+
+        # Remove as entradas de menor prioridade até caber no orçamento
+        while self.resident_bytes > self.budget_bytes and len(self._entries) > 1:
+            victim_key = min((k for k in self._entries if k != key), key=lambda k: self._entries[k].priority)
+            victim = self._entries.pop(victim_key)
+            self._inflation = victim.priority
+            self.evictions += 1
+            logger.info("Modelo %s removido do cache (%d bytes, carga %.3f s)",
+                        victim_key, victim.size, victim.load_time)
+        if entry.size > self.budget_bytes:
+            logger.warning("Modelo %s (%d bytes) excede o orçamento do cache (%d bytes)",
+                           key, entry.size, self.budget_bytes)
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(e.size for e in self._entries.values())
+
+    def clear(self) -> None:
+        """Descarta todas as entradas (ex.: após publicar novos modelos).
+
+        Cargas em andamento terminam, mas seus modelos não são inseridos.
+        """
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._ever_loaded.clear()
+            self._inflation = 0.0
+
+    def stats(self) -> dict:
+        """Conjunto residente e contadores, para diagnóstico."""
+        with self._lock:
+            entries = [
+                {
+                    'key': list(key) if isinstance(key, tuple) else key,
+                    'size_bytes': e.size,
+                    'rss_delta_bytes': e.rss_delta,
+                    'load_time_s': e.load_time,
+                    'version': e.version,
+                    'backend': e.backend,
+                    'hits': e.hits,
+                    'priority': e.priority,
+                    'loaded_at': e.loaded_at,
+                }
+                for key, e in sorted(self._entries.items(), key=lambda kv: -kv[1].priority)
+            ]
+            return {
+                'budget_bytes': self.budget_bytes,
+                'resident_bytes': self.resident_bytes,
+                'entries': entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'loads': self.loads,
+                'reloads': self.reloads,
+                'evictions': self.evictions,
+                'process_rss_bytes': process_rss(),
+            }
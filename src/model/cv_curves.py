@@ -0,0 +1,150 @@
+"""
+Curvas de aprendizado e validação sobre folds de validação cruzada compartilhados.
+
+As duas curvas usam o mesmo conjunto de folds (KFold embaralhado com semente
+fixa) sobre o dataset completo da variante. Cada ajuste é identificado por
+(fold, tamanho do treino, valor do parâmetro) e executado uma única vez: o
+ponto de tamanho máximo da curva de aprendizado é o mesmo ajuste do ponto
+da curva de validação com o parâmetro original do modelo.
+
+Os ajustes rodam em paralelo via joblib com o XGBoost limitado a
+`xgb_threads` threads por ajuste, evitando a sobreinscrição de CPUs de
+`n_jobs=-1` combinado com o paralelismo interno do XGBoost.
+"""
+
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRAIN_SIZES = np.linspace(0.1, 1.0, 5)
+DEFAULT_PARAM_RANGE = np.arange(1, 11)
+MIN_SAMPLES = 4
+
+
+def _fit_and_score(model: object, X: np.ndarray, y: np.ndarray, train_idx: np.ndarray,
+                   test_idx: np.ndarray, params: dict) -> tuple[float, float]:
+    """Ajusta um clone do modelo e retorna (R² treino, R² validação)."""
+    est = clone(model).set_params(**params)
+    est.fit(X[train_idx], y[train_idx])
+    train_score = r2_score(y[train_idx], est.predict(X[train_idx])) if len(train_idx) > 1 else np.nan
+    test_score = r2_score(y[test_idx], est.predict(X[test_idx])) if len(test_idx) > 1 else np.nan
+    return float(train_score), float(test_score)
+
+
+class FoldFitCache:
+    """Resultados de ajustes por (fold, tamanho do treino, parâmetro, valor)."""
+
+    def __init__(self) -> None:
+        self._scores: dict[tuple, tuple[float, float]] = {}
+        self.requested = 0
+
+    def missing(self, keys: list[tuple]) -> list[tuple]:
+        """Registra os pedidos e retorna as chaves ainda não ajustadas (sem repetição)."""
+        self.requested += len(keys)
+        return [k for k in dict.fromkeys(keys) if k not in self._scores]
+
+    def store(self, key: tuple, scores: tuple[float, float]) -> None:
+        self._scores[key] = scores
+
+    def get(self, key: tuple) -> tuple[float, float]:
+        return self._scores[key]
+
+    @property
+    def fits(self) -> int:
+        return len(self._scores)
+
+
+def compute_cv_curves(
+    model: object,
+    X: pd.DataFrame,
+    y: pd.Series,
+    param_name: str = 'max_depth',
+    param_range: np.ndarray = DEFAULT_PARAM_RANGE,
+    train_sizes: np.ndarray = DEFAULT_TRAIN_SIZES,
+    n_splits: int = 5,
+    n_jobs: int | None = None,
+    xgb_threads: int = 1,
+    random_state: int = 42,
+    cache: FoldFitCache | None = None,
+) -> dict | None:
+    """
+    Calcula as curvas de aprendizado e de validação com folds compartilhados.
+
+    Args:
+        model: Estimador base (seus parâmetros definem a curva de aprendizado)
+        X: Features do dataset completo da variante
+        y: Alvo correspondente
+        param_name: Parâmetro variado na curva de validação
+        param_range: Valores do parâmetro
+        train_sizes: Frações do treino de cada fold na curva de aprendizado
+        n_splits: Número de folds (limitado ao número de amostras)
+        n_jobs: Processos paralelos (padrão: número de CPUs)
+        xgb_threads: Threads do XGBoost por ajuste
+        random_state: Semente dos folds
+        cache: Cache de ajustes a reutilizar entre chamadas (válido apenas
+            para os mesmos X, y, n_splits e random_state)
+
+    Returns:
+        dict | None: Tamanhos, faixa de parâmetros e matrizes de scores
+        (linhas = pontos da curva, colunas = folds), ou None se houver
+        menos de MIN_SAMPLES amostras
+    """
+    X_arr = np.asarray(X, dtype=float)
+    y_arr = np.asarray(y, dtype=float)
+    n_samples = len(y_arr)
+    if n_samples < MIN_SAMPLES:
+        logger.warning("Curvas CV ignoradas: apenas %d amostras", n_samples)
+        return None
+
+    cache = cache or FoldFitCache()
+    # Treino de cada fold em ordem aleatória fixa: os subconjuntos da curva de
+    # aprendizado são prefixos dessa ordem (e não das primeiras linhas do CSV)
+    rng = np.random.default_rng(random_state)
+    folds = [(rng.permutation(tr), te) for tr, te in
+             KFold(n_splits=min(n_splits, n_samples), shuffle=True, random_state=random_state).split(X_arr)]
+    base_value = model.get_params()[param_name]
+    param_range = [v.item() if hasattr(v, 'item') else v for v in param_range]
+
+    def size_for(fold_train: np.ndarray, frac: float) -> int:
+        return max(2, min(len(fold_train), int(round(frac * len(fold_train)))))
+
+    learning_keys = [[(i, size_for(tr, frac), param_name, base_value) for i, (tr, _) in enumerate(folds)]
+                     for frac in train_sizes]
+    validation_keys = [[(i, len(tr), param_name, value) for i, (tr, _) in enumerate(folds)]
+                       for value in param_range]
+
+    todo = cache.missing([k for row in learning_keys + validation_keys for k in row])
+    n_jobs = n_jobs or os.cpu_count() or 1
+    results = Parallel(n_jobs=min(n_jobs, max(1, len(todo))))(
+        delayed(_fit_and_score)(
+            model, X_arr, y_arr, folds[fold][0][:n_train], folds[fold][1],
+            {param_name: value, 'n_jobs': xgb_threads}
+        )
+        for fold, n_train, _, value in todo
+    )
+    for key, scores in zip(todo, results):
+        cache.store(key, scores)
+
+    def matrix(keys: list[list[tuple]], which: int) -> np.ndarray:
+        return np.array([[cache.get(k)[which] for k in row] for row in keys])
+
+    logger.info("Curvas CV: %d ajustes pedidos, %d executados", cache.requested, cache.fits)
+    return {
+        'train_sizes': np.array([np.mean([k[1] for k in row]) for row in learning_keys]),
+        'learning_train': matrix(learning_keys, 0),
+        'learning_test': matrix(learning_keys, 1),
+        'param_name': param_name,
+        'param_range': np.array(param_range),
+        'validation_train': matrix(validation_keys, 0),
+        'validation_test': matrix(validation_keys, 1),
+        'fits': cache.fits,
+        'requested': cache.requested,
+    }
@@ -0,0 +1,262 @@
+"""
+Monitoramento em fluxo das entradas e saídas das predições (drift).
+
+Para cada (cell_type, variante) o servidor mantém, por feature, um
+histograma de bins fixos sobre [CONCENTRATION_MIN, CONCENTRATION_MAX] e, para
+a viabilidade prevista, um histograma sobre [VIABILITY_MIN, VIABILITY_MAX].
+Cada observação custa O(1) (um índice de bin e alguns contadores) e a memória
+é fixa: o número de chaves e de features é limitado pelas constantes, e o
+tamanho de cada histograma não depende do volume de requisições. Quantis
+são interpolados dentro dos bins.
+
+As mesmas estatísticas são calculadas sobre o conjunto de treino e gravadas
+como atributo do booster (`cryo_training_stats`), de modo que viajam com o
+modelo (inclusive no pacote) e a comparação usa sempre o modelo servido.
+Como na leitura dos dados, concentração zero significa agente ausente: só
+valores > 0 entram nas estatísticas das features.
+"""
+
+import json
+import math
+import threading
+
+import numpy as np
+
+from src.constants import (
+    CONCENTRATION_MAX, CONCENTRATION_MIN, DRIFT_HISTOGRAM_BINS, DRIFT_PSI_BINS, VIABILITY_MAX, VIABILITY_MIN
+)
+from src.model.backends import get_model_attr
+
+TRAINING_STATS_ATTR = 'cryo_training_stats'
+VIABILITY_KEY = 'viability'
+QUANTILES = (0.05, 0.5, 0.95)
+
+
+class FixedHistogram:
+    """Histograma de bins fixos com contagens fora da faixa, média e extremos."""
+
+    __slots__ = ('lo', 'hi', 'counts', 'n', 'total', 'total_sq', 'min', 'max', 'below', 'above')
+
+    def __init__(self, lo: float, hi: float, bins: int = DRIFT_HISTOGRAM_BINS) -> None:
+        self.lo = float(lo)
+        self.hi = float(hi)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.n = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.below = 0
+        self.above = 0
+
+    def add(self, value: float) -> None:
+        """Incorpora um valor (O(1))."""
+        self.n += 1
+        self.total += value
+        self.total_sq += value * value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value < self.lo:
+            self.below += 1
+        elif value > self.hi:
+            self.above += 1
+        bins = len(self.counts)
+        idx = int((value - self.lo) / (self.hi - self.lo) * bins)
+        self.counts[min(max(idx, 0), bins - 1)] += 1
+
+    def add_many(self, values: np.ndarray) -> None:
+        """Incorpora vários valores (usado no treino)."""
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        self.n += int(values.size)
+        self.total += float(values.sum())
+        self.total_sq += float((values ** 2).sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.below += int((values < self.lo).sum())
+        self.above += int((values > self.hi).sum())
+        bins = len(self.counts)
+        idx = np.clip(((values - self.lo) / (self.hi - self.lo) * bins).astype(int), 0, bins - 1)
+        self.counts += np.bincount(idx, minlength=bins)
+
+    def quantile(self, q: float) -> float | None:
+        """Quantil aproximado (interpolação linear dentro do bin)."""
+        if self.n == 0:
+            return None
+        cumulative = np.cumsum(self.counts)
+        target = q * self.n
+        idx = int(np.searchsorted(cumulative, target, side='left'))
+        idx = min(idx, len(self.counts) - 1)
+        before = cumulative[idx - 1] if idx > 0 else 0
+        inside = self.counts[idx]
+        width = (self.hi - self.lo) / len(self.counts)
+        fraction = (target - before) / inside if inside else 0.0
+        return float(min(max(self.lo + (idx + fraction) * width, self.min), self.max))
+
+    def summary(self) -> dict:
+        if self.n == 0:
+            return {'n': 0}
+        mean = self.total / self.n
+        variance = max(self.total_sq / self.n - mean * mean, 0.0)
+        return {
+            'n': self.n,
+            'min': self.min,
+            'max': self.max,
+            'mean': mean,
+            'std': math.sqrt(variance),
+            'quantiles': {f"p{int(q * 100)}": self.quantile(q) for q in QUANTILES},
+        }
+
+    def to_dict(self) -> dict:
+        """Resumo com as contagens por bin (formato gravado no modelo)."""
+        return {**self.summary(), 'lo': self.lo, 'hi': self.hi, 'counts': self.counts.tolist()}
+
+
+def population_stability_index(expected: list[int] | np.ndarray, actual: list[int] | np.ndarray,
+                               bins: int = DRIFT_PSI_BINS) -> float | None:
+    """
+    PSI entre duas distribuições de contagens com os mesmos bins.
+
+    Os histogramas são agrupados em `bins` faixas antes do cálculo, para que
+    poucas observações ao vivo não dominem o índice. Referência usual:
+    < 0.1 estável, 0.1-0.25 moderado, > 0.25 drift relevante.
+    """
+    expected = np.asarray(expected, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    if expected.sum() == 0 or actual.sum() == 0 or len(expected) % bins:
+        return None
+    expected = expected.reshape(bins, -1).sum(axis=1)
+    actual = actual.reshape(bins, -1).sum(axis=1)
+    eps = 1e-4
+    p = np.maximum(expected / expected.sum(), eps)
+    q = np.maximum(actual / actual.sum(), eps)
+    return float(((q - p) * np.log(q / p)).sum())
+
+
+def _feature_histogram() -> FixedHistogram:
+    return FixedHistogram(CONCENTRATION_MIN, CONCENTRATION_MAX)
+
+
+def _viability_histogram() -> FixedHistogram:
+    return FixedHistogram(VIABILITY_MIN, VIABILITY_MAX)
+
+
+def training_statistics(X, drops) -> dict:
+    """
+    Estatísticas do conjunto de treino no formato comparado pelo monitor.
+
+    Args:
+        X: DataFrame de features (colunas do modelo)
+        drops: Alvo (% de queda da viabilidade)
+
+    Returns:
+        dict: {coluna: histograma, ..., 'viability': histograma}
+    """
+    stats = {}
+    for col in X.columns:
+        values = np.asarray(X[col], dtype=float)
+        values = values[values > 0]
+        if values.size:
+            hist = _feature_histogram()
+            hist.add_many(values)
+            stats[col] = hist.to_dict()
+    viability = _viability_histogram()
+    viability.add_many(np.clip(100.0 - np.asarray(drops, dtype=float), VIABILITY_MIN, VIABILITY_MAX))
+    stats[VIABILITY_KEY] = viability.to_dict()
+    return stats
+
+
+def get_training_statistics(model: object) -> dict | None:
+    """Estatísticas de treino gravadas com o modelo, ou None (modelos antigos)."""
+    raw = get_model_attr(model, TRAINING_STATS_ATTR)
+    return json.loads(raw) if raw else None
+
+
+class DriftMonitor:
+    """Histogramas ao vivo por (cell_type, variante), com atualização O(1)."""
+
+    def __init__(self) -> None:
+        self._sketches: dict[tuple[str, str], dict[str, FixedHistogram]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, cell_type: str, variant: str, inputs: dict[str, float], viability: float) -> None:
+        """
+        Registra uma predição servida.
+
+        Args:
+            cell_type: Tipo celular
+            variant: Variante pedida
+            inputs: Concentração por coluna do modelo (zeros são ignorados)
+            viability: Viabilidade prevista (%)
+        """
+        with self._lock:
+            sketch = self._sketches.get((cell_type, variant))
+            if sketch is None:
+                sketch = self._sketches[(cell_type, variant)] = {VIABILITY_KEY: _viability_histogram()}
+            for col, value in inputs.items():
+                if value > 0:
+                    hist = sketch.get(col)
+                    if hist is None:
+                        hist = sketch[col] = _feature_histogram()
+                    hist.add(float(value))
+            sketch[VIABILITY_KEY].add(float(viability))
+
+    def keys(self) -> list[tuple[str, str]]:
+        with self._lock:
+            return sorted(self._sketches)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._sketches.clear()
+
+    def report(self, cell_type: str, variant: str, training: dict | None) -> dict:
+        """
+        Compara os histogramas ao vivo de uma chave com as estatísticas de treino.
+
+        Para cada feature: resumo ao vivo e de treino, contagens abaixo do
+        menor valor > 0 e acima do máximo vistos no treino, e o PSI.
+        """
+        with self._lock:
+            snapshot = {name: (hist.summary(), _copy(hist))
+                        for name, hist in self._sketches.get((cell_type, variant), {}).items()}
+        report = {}
+        for name, (live, hist) in snapshot.items():
+            train = (training or {}).get(name)
+            entry = {'live': live, 'training': None, 'psi': None}
+            if train is not None and train.get('n'):
+                entry['training'] = {k: train[k] for k in ('n', 'min', 'max', 'mean', 'std', 'quantiles')}
+                entry['psi'] = population_stability_index(train['counts'], hist.counts)
+                if name != VIABILITY_KEY:
+                    below, above = _outside_range(hist, train['min'], train['max'])
+                    entry['below_training_min'] = below
+                    entry['above_training_max'] = above
+                    entry['out_of_range_fraction'] = (below + above) / live['n'] if live['n'] else 0.0
+            report[name] = entry
+        return report
+
+
+def _copy(hist: FixedHistogram) -> FixedHistogram:
+    copy = FixedHistogram(hist.lo, hist.hi, len(hist.counts))
+    for attr in FixedHistogram.__slots__:
+        setattr(copy, attr, getattr(hist, attr))
+    copy.counts = hist.counts.copy()
+    return copy
+
+
+def _outside_range(hist: FixedHistogram, lo: float, hi: float) -> tuple[int, int]:
+    """Contagens abaixo de `lo` e acima de `hi`, com resolução de um bin.
+
+    Valores fora do histograma contam sempre; dentro dele, contam os bins
+    inteiramente fora da faixa (o bin que contém o limite não), de modo que a
+    contagem nunca acusa valores da faixa.
+    """
+    counts = hist.counts.copy()
+    # Valores fora de [lo, hi] do histograma foram somados aos bins extremos
+    counts[0] -= hist.below
+    counts[-1] -= hist.above
+    width = (hist.hi - hist.lo) / len(counts)
+    edges = hist.lo + width * np.arange(len(counts) + 1)
+    below = hist.below + int(counts[edges[1:] <= lo].sum())
+    above = hist.above + int(counts[edges[:-1] > hi].sum())
+    return below, above
@@ -0,0 +1,122 @@
+"""
+Contribuições por feature das predições (explicação local).
+
+Usa a decomposição nativa do XGBoost (`Booster.predict(pred_contribs=True)`,
+TreeSHAP exato), que retorna para cada linha a contribuição de cada feature
+e o valor base, somando exatamente a predição. Todas as linhas de um mesmo
+modelo são avaliadas em uma única chamada; os resultados ficam em um cache
+LRU com a mesma chave das predições: (cell_type, variante, linha de features).
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+from xgboost import DMatrix
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 4096
+
+
+def predict_contributions(model: object, rows) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calcula as contribuições das features para um lote de linhas.
+
+    Args:
+        model: XGBRegressor treinado
+        rows: Linhas densas (lista/array) ou matriz esparsa (modelos 'multi')
+
+    Returns:
+        tuple: (contribuições [n_linhas, n_features], valor base [n_linhas]),
+        na escala da saída do modelo (% de queda da viabilidade)
+    """
+    X = rows if sparse.issparse(rows) else np.asarray(rows, dtype=float)
+    missing = model.missing if model.missing is not None else np.nan
+    contribs = model.get_booster().predict(DMatrix(X, missing=missing), pred_contribs=True,
+                                           validate_features=False)
+    return contribs[:, :-1], contribs[:, -1]
+
+
+class ContributionCache:
+    """Cache LRU de contribuições por (cell_type, variante, linha de features)."""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[tuple, tuple[np.ndarray, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Incrementada por `clear`: valores calculados antes não são inseridos
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> tuple[np.ndarray, float] | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: tuple[np.ndarray, float], generation: int | None = None) -> None:
+        """Insere o valor, a menos que o cache tenha sido esvaziado desde `generation`."""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+
+def explain_rows(model: object, key: tuple, rows: list[tuple[float, ...]],
+                 cache: ContributionCache | None = None, to_matrix=None,
+                 generation: int | None = None) -> list[tuple[np.ndarray, float]]:
+    """
+    Contribuições de várias linhas de um modelo, com cache.
+
+    Apenas as linhas ausentes do cache são avaliadas, em uma única chamada.
+
+    Args:
+        model: Modelo da chave
+        key: (cell_type, variante)
+        rows: Linhas de features como tuplas (hasheáveis)
+        cache: Cache compartilhado (opcional)
+        to_matrix: Converte as linhas pendentes na entrada do modelo
+            (padrão: array denso)
+        generation: `cache.generation` lida antes de obter `model`; se o
+            cache for esvaziado depois (modelos recarregados), as
+            contribuições deste modelo não são guardadas
+
+    Returns:
+        list: (contribuições, valor base) de cada linha, na ordem de `rows`
+    """
+    results: list[tuple[np.ndarray, float] | None] = [None] * len(rows)
+    pending: dict[tuple, list[int]] = {}
+    for i, row in enumerate(rows):
+        cached = cache.get(key + (row,)) if cache is not None else None
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.setdefault(row, []).append(i)
+
+    if pending:
+        unique = list(pending)
+        X = to_matrix(unique) if to_matrix is not None else np.asarray(unique, dtype=float)
+        contribs, bias = predict_contributions(model, X)
+        for row, values, base in zip(unique, contribs, bias):
+            value = (values, float(base))
+            if cache is not None:
+                cache.put(key + (row,), value, generation=generation)
+            for i in pending[row]:
+                results[i] = value
+    return results
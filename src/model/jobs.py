@@ -0,0 +1,186 @@
+"""
+Executor local de jobs de retreinamento para a área de desenvolvedor.
+
+Cada job roda a função de treinamento em um processo separado (contexto
+'spawn'), de modo que o treino e a geração de gráficos não disputam o GIL
+nem a memória com o servidor. O processo envia eventos de progresso por uma
+`multiprocessing.Queue`; um thread do servidor drena a fila, acrescenta os
+eventos ao histórico do job e acorda quem os acompanha (ex.: o stream SSE).
+
+Apenas um job roda por vez: todos escrevem no mesmo diretório de modelos.
+"""
+
+import importlib
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+import uuid
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Estados de um job
+QUEUED, RUNNING, SUCCEEDED, FAILED = 'queued', 'running', 'succeeded', 'failed'
+FINISHED_STATES = {SUCCEEDED, FAILED}
+MAX_JOBS_KEPT = 20
+
+
+def _resolve(target: str) -> Callable:
+    """Importa 'modulo:funcao'."""
+    module, _, name = target.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def _worker(target: str, events: mp.Queue, kwargs: dict) -> None:
+    """Ponto de entrada do processo do job: roda `target` e reporta o resultado."""
+    def progress(event: dict) -> None:
+        events.put({**event, 'ts': time.time()})
+
+    start = time.perf_counter()
+    try:
+        _resolve(target)(progress=progress, **kwargs)
+    except Exception as e:
+        events.put({'stage': 'job', 'status': FAILED, 'message': str(e),
+                    'elapsed': time.perf_counter() - start, 'ts': time.time()})
+    else:
+        events.put({'stage': 'job', 'status': SUCCEEDED,
+                    'elapsed': time.perf_counter() - start, 'ts': time.time()})
+
+
+class TrainingJob:
+    """Estado e histórico de eventos de um job."""
+
+    def __init__(self, job_id: str, params: dict) -> None:
+        self.id = job_id
+        self.params = params
+        self.status = QUEUED
+        self.events: list[dict] = []
+        self.created_at = time.time()
+        self.finished_at: float | None = None
+        self.cond = threading.Condition()
+
+    def add_event(self, event: dict) -> None:
+        with self.cond:
+            self.events.append(event)
+            self.cond.notify_all()
+
+    def finish(self, status: str) -> None:
+        with self.cond:
+            self.status = status
+            self.finished_at = time.time()
+            self.cond.notify_all()
+
+    def wait_events(self, since: int, timeout: float) -> tuple[list[dict], bool]:
+        """
+        Espera eventos a partir do índice `since`.
+
+        Returns:
+            tuple: (novos eventos, job finalizado)
+        """
+        with self.cond:
+            if len(self.events) <= since and self.status not in FINISHED_STATES:
+                self.cond.wait(timeout)
+            return self.events[since:], self.status in FINISHED_STATES
+
+    def to_dict(self, include_events: bool = True) -> dict:
+        with self.cond:
+            data = {
+                'id': self.id,
+                'status': self.status,
+                'params': self.params,
+                'created_at': self.created_at,
+                'finished_at': self.finished_at,
+                'n_events': len(self.events),
+            }
+            if include_events:
+                data['events'] = list(self.events)
+        return data
+
+
+class TrainingJobRunner:
+    """Dispara e acompanha jobs de treinamento em processos separados.
+
+    Args:
+        target: Função de treinamento como 'modulo:funcao', importada apenas
+            no processo filho e chamada como `função(progress=callback, **params)`
+        on_success: Chamado no servidor após um job bem-sucedido (ex.:
+            recarregar os modelos publicados)
+    """
+
+    def __init__(self, target: str, on_success: Callable[[], None] | None = None) -> None:
+        self.target = target
+        self.on_success = on_success
+        self._jobs: dict[str, TrainingJob] = {}
+        self._lock = threading.Lock()
+        self._ctx = mp.get_context('spawn')
+
+    def submit(self, **params) -> TrainingJob:
+        """
+        Inicia um job com os parâmetros dados.
+
+        Raises:
+            RuntimeError: Se já houver um job em andamento
+        """
+        with self._lock:
+            if any(job.status not in FINISHED_STATES for job in self._jobs.values()):
+                raise RuntimeError("Já existe um job de treinamento em andamento")
+            job = TrainingJob(uuid.uuid4().hex[:12], params)
+            self._jobs[job.id] = job
+            self._prune()
+
+        events = self._ctx.Queue()
+        process = self._ctx.Process(target=_worker, args=(self.target, events, params), daemon=True)
+        try:
+            process.start()
+        except Exception:
+            job.finish(FAILED)
+            raise
+        job.status = RUNNING
+        job.add_event({'stage': 'job', 'status': RUNNING, 'ts': time.time()})
+        threading.Thread(target=self._drain, args=(job, process, events), daemon=True,
+                         name=f"training-job-{job.id}").start()
+        logger.info("Job de treinamento %s iniciado: %s", job.id, params)
+        return job
+
+    def _drain(self, job: TrainingJob, process, events: mp.Queue) -> None:
+        """Move os eventos do processo para o job até o evento final."""
+        status = None
+        while status is None:
+            try:
+                event = events.get(timeout=1.0)
+            except queue.Empty:
+                if not process.is_alive():
+                    job.add_event({'stage': 'job', 'status': FAILED, 'ts': time.time(),
+                                   'message': f"Processo encerrado (código {process.exitcode})"})
+                    status = FAILED
+                continue
+            job.add_event(event)
+            if event.get('stage') == 'job':
+                status = event['status']
+        process.join()
+
+        if status == SUCCEEDED and self.on_success is not None:
+            try:
+                self.on_success()
+                job.add_event({'stage': 'publish', 'status': 'done', 'ts': time.time()})
+            except Exception as e:
+                logger.error("Erro ao publicar modelos do job %s: %s", job.id, e)
+                job.add_event({'stage': 'publish', 'status': 'error', 'message': str(e), 'ts': time.time()})
+                status = FAILED
+        job.finish(status)
+        logger.info("Job de treinamento %s finalizado: %s", job.id, status)
+
+    def _prune(self) -> None:
+        """Descarta os jobs finalizados mais antigos além de MAX_JOBS_KEPT."""
+        finished = sorted((j for j in self._jobs.values() if j.status in FINISHED_STATES),
+                          key=lambda j: j.created_at)
+        for job in finished[:max(0, len(self._jobs) - MAX_JOBS_KEPT)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str) -> TrainingJob | None:
+        return self._jobs.get(job_id)
+
+    def list(self) -> list[TrainingJob]:
+        return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
@@ -0,0 +1,85 @@
+"""
+Features do modelo conjunto (todos os tipos celulares em um só booster).
+
+O modelo conjunto recebe, além de DMSO e TREHALOSE, o tipo celular e a classe
+da formulação ('dmso_only', 'trehalose_only', 'both') como colunas
+categóricas do pandas. As categorias usadas no treino são gravadas como
+atributo do booster; o servidor monta os quadros de entrada com as mesmas
+categorias, de modo que os códigos coincidem com os do treino.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.constants import CELL_TYPES_LIST, JOINT_CONTEXTS, MODEL_FEATURES
+
+CELL_TYPE_COLUMN = 'cell_type'
+CONTEXT_COLUMN = 'context'
+JOINT_FEATURES = MODEL_FEATURES + [CELL_TYPE_COLUMN, CONTEXT_COLUMN]
+DEFAULT_CATEGORIES = {CELL_TYPE_COLUMN: CELL_TYPES_LIST, CONTEXT_COLUMN: JOINT_CONTEXTS}
+
+
+def formulation_context(dmso: np.ndarray, trehalose: np.ndarray) -> np.ndarray:
+    """Classe da formulação de cada linha (vetorizado).
+
+    Examples:
+        >>> formulation_context(np.array([10, 0, 5]), np.array([0, 10, 5]))
+        array(['dmso_only', 'trehalose_only', 'both'], dtype='<U14')
+    """
+    dmso = np.asarray(dmso, dtype=float)
+    trehalose = np.asarray(trehalose, dtype=float)
+    return np.select(
+        [(dmso > 0) & (trehalose > 0), dmso > 0],
+        ['both', 'dmso_only'],
+        default='trehalose_only'
+    )
+
+
+def build_joint_frame(dmso: np.ndarray, trehalose: np.ndarray, cell_types: np.ndarray | list[str],
+                      categories: dict[str, list[str]] | None = None) -> pd.DataFrame:
+    """
+    Monta o quadro de entrada do modelo conjunto.
+
+    Args:
+        dmso: Concentrações de DMSO, uma por linha
+        trehalose: Concentrações de TREHALOSE, uma por linha
+        cell_types: Tipo celular de cada linha
+        categories: Categorias por coluna (padrão: DEFAULT_CATEGORIES)
+
+    Returns:
+        pd.DataFrame: Colunas JOINT_FEATURES, com as categóricas tipadas
+    """
+    categories = categories or DEFAULT_CATEGORIES
+    dmso = np.asarray(dmso, dtype=float)
+    trehalose = np.asarray(trehalose, dtype=float)
+    return pd.DataFrame({
+        MODEL_FEATURES[0]: dmso,
+        MODEL_FEATURES[1]: trehalose,
+        CELL_TYPE_COLUMN: pd.Categorical(np.asarray(cell_types), categories=categories[CELL_TYPE_COLUMN]),
+        CONTEXT_COLUMN: pd.Categorical(formulation_context(dmso, trehalose),
+                                       categories=categories[CONTEXT_COLUMN]),
+    })
+
+
+def build_compare_frame(formulations: list[tuple[float, float]], cell_types: list[str],
+                        categories: dict[str, list[str]] | None = None) -> pd.DataFrame:
+    """Grade (tipo celular × formulação) em um só quadro, ordenada por tipo celular."""
+    pairs = np.asarray(formulations, dtype=float).reshape(-1, 2)
+    n = len(pairs)
+    return build_joint_frame(
+        np.tile(pairs[:, 0], len(cell_types)),
+        np.tile(pairs[:, 1], len(cell_types)),
+        np.repeat(cell_types, n),
+        categories,
+    )
+
+
+def get_joint_categories(model: object) -> dict[str, list[str]] | None:
+    """Retorna as categorias gravadas no treino do modelo conjunto, ou None."""
+    try:
+        raw = model.get_booster().attr('cryo_categories')
+    except Exception:
+        return None
+    return json.loads(raw) if raw else None
@@ -0,0 +1,256 @@
+"""
+Publicação atômica e versionada dos modelos treinados.
+
+Cada modelo (e o pacote `bundle.cryo`) publicado vira um objeto imutável em
+`models/versions/`, nomeado pelo hash do conteúdo
+(`xgboost_hepg2_both-<sha12>.pkl`), gravado em arquivo temporário + rename.
+O manifesto `models/manifest.json` aponta para o conjunto publicado e é
+sempre a última coisa gravada (também por rename): um leitor vê o conjunto
+anterior inteiro ou o novo inteiro, nunca um modelo pela metade ou um pacote
+de um treino com modelos de outro.
+
+Formato do manifesto:
+    {
+        "format_version": 1,
+        "version": 7,                    # incrementado a cada publicação
+        "published_at": "2026-10-19T12:00:00",
+        "models": {"hepg2/both": {"path": "versions/xgboost_hepg2_both-1a2b3c4d5e6f.pkl",
+                                  "sha256": "...", "size": 123456, "published_at": "...",
+                                  "holdout": {"path": "versions/holdout_hepg2_both-....joblib", ...}}},
+        "bundle": {"path": "versions/bundle-....cryo", "sha256": "...", ...}
+    }
+
+Os servidores observam o manifesto (`ManifestWatcher`) e recarregam quando a
+versão muda. Os `.pkl` de `models/xgboost_*.pkl` continuam sendo gravados
+(também de forma atômica) para as ferramentas que os leem diretamente.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from src.constants import MODEL_VERSIONS_KEEP
+
+try:
+    import fcntl
+except ImportError:  # Windows: publicações concorrentes não são serializadas
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest.json"
+VERSIONS_DIRNAME = "versions"
+MANIFEST_FORMAT_VERSION = 1
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """
+    Grava `data` em `path` sem expor conteúdo parcial.
+
+    Escreve em um temporário no mesmo diretório, força o conteúdo para o
+    disco e o renomeia sobre `path` (`os.replace` é atômico no mesmo sistema
+    de arquivos): leitores abrem o arquivo antigo ou o novo, inteiros.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def manifest_path(models_dir: Path) -> Path:
+    return Path(models_dir) / MANIFEST_FILENAME
+
+
+def publish_object(models_dir: Path, name: str, data: bytes) -> dict:
+    """
+    Grava um objeto imutável em `versions/`, endereçado pelo conteúdo.
+
+    Args:
+        models_dir: Diretório de modelos
+        name: Nome lógico (ex.: 'xgboost_hepg2_both.pkl', 'bundle.cryo')
+        data: Conteúdo serializado
+
+    Returns:
+        dict: Entrada do manifesto ({'path', 'sha256', 'size', 'published_at'}),
+        com `path` relativo a `models_dir`
+
+    Examples:
+        >>> publish_object(MODELS_DIR, 'xgboost_rat.pkl', raw)['path']  # doctest: +SKIP
+        'versions/xgboost_rat-9f86d081884c.pkl'
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    stem, suffix = os.path.splitext(name)
+    relative = f"{VERSIONS_DIRNAME}/{stem}-{digest[:12]}{suffix}"
+    target = Path(models_dir) / relative
+    # Mesmo hash, mesmo conteúdo: republicar um modelo inalterado não regrava
+    if not target.exists():
+        atomic_write(target, data)
+    return {'path': relative, 'sha256': digest, 'size': len(data),
+            'published_at': datetime.now().isoformat(timespec='seconds')}
+
+
+def read_manifest(models_dir: Path) -> dict | None:
+    """Manifesto publicado, ou None se não existir ou for ilegível (com log)."""
+    path = manifest_path(models_dir)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.error("Manifesto de modelos ilegível %s: %s", path, e)
+        return None
+
+
+@contextmanager
+def _manifest_lock(models_dir: Path):
+    """Serializa as publicações (leitura + escrita do manifesto) entre processos."""
+    if fcntl is None:
+        yield
+        return
+    with open(Path(models_dir) / f"{MANIFEST_FILENAME}.lock", 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def update_manifest(models_dir: Path, models: dict[str, dict] | None = None,
+                    bundle: dict | None = None) -> dict:
+    """
+    Publica um conjunto de objetos: grava o novo manifesto por último.
+
+    As entradas de `models` ('tipo/variante' → entrada de `publish_object`)
+    substituem as publicadas; as demais são mantidas. Depois da troca, as
+    versões antigas além de MODEL_VERSIONS_KEEP por modelo são removidas.
+
+    Args:
+        models_dir: Diretório de modelos
+        models: Modelos publicados neste conjunto
+        bundle: Pacote de modelos publicado junto (entrada de `publish_object`)
+
+    Returns:
+        dict: Manifesto gravado
+    """
+    models_dir = Path(models_dir)
+    models_dir.mkdir(parents=True, exist_ok=True)
+    with _manifest_lock(models_dir):
+        current = read_manifest(models_dir) or {}
+        manifest = {
+            'format_version': MANIFEST_FORMAT_VERSION,
+            'version': int(current.get('version', 0)) + 1,
+            'published_at': datetime.now().isoformat(timespec='seconds'),
+            'models': {**current.get('models', {}), **(models or {})},
+        }
+        if bundle or current.get('bundle'):
+            manifest['bundle'] = bundle or current['bundle']
+        atomic_write(manifest_path(models_dir), json.dumps(manifest, indent=2).encode('utf-8'))
+        _prune_versions(models_dir, manifest)
+
+    logger.info("Manifesto de modelos v%d publicado (%d modelos%s)", manifest['version'],
+                len(manifest['models']), ', com pacote' if 'bundle' in manifest else '')
+    return manifest
+
+
+def _prune_versions(models_dir: Path, manifest: dict) -> None:
+    """Remove as versões mais antigas de cada objeto, preservando as referenciadas."""
+    referenced = {entry['path'] for entry in manifest['models'].values()}
+    referenced |= {entry['holdout']['path'] for entry in manifest['models'].values() if entry.get('holdout')}
+    if manifest.get('bundle'):
+        referenced.add(manifest['bundle']['path'])
+    by_name: dict[str, list[Path]] = {}
+    for path in (models_dir / VERSIONS_DIRNAME).glob('*-*.*'):
+        if path.name.endswith('.tmp'):
+            continue
+        by_name.setdefault(path.name.rsplit('-', 1)[0], []).append(path)
+    for paths in by_name.values():
+        paths.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+        for path in paths[MODEL_VERSIONS_KEEP:]:
+            if f"{VERSIONS_DIRNAME}/{path.name}" not in referenced:
+                path.unlink(missing_ok=True)
+
+
+def published_entry(manifest: dict | None, cell_type: str, variant: str) -> dict | None:
+    """Entrada publicada de (tipo celular, variante), ou None."""
+    return (manifest or {}).get('models', {}).get(f"{cell_type}/{variant}")
+
+
+def read_published(models_dir: Path, entry: dict) -> bytes:
+    """
+    Conteúdo de um objeto publicado, conferido contra o hash do manifesto.
+
+    Raises:
+        FileNotFoundError: Se o objeto não existir
+        ValueError: Se o conteúdo não corresponder ao hash
+    """
+    data = (Path(models_dir) / entry['path']).read_bytes()
+    if hashlib.sha256(data).hexdigest() != entry['sha256']:
+        raise ValueError(f"Hash divergente em {entry['path']}")
+    return data
+
+
+class ManifestWatcher:
+    """Detecta novas publicações do manifesto, com no máximo uma verificação por intervalo.
+
+    Barato o bastante para rodar a cada requisição: entre verificações nada
+    é feito, e numa verificação só um `stat` é feito, lendo o manifesto
+    apenas se o arquivo mudou.
+
+    Args:
+        models_dir: Diretório de modelos
+        interval: Segundos mínimos entre verificações
+    """
+
+    def __init__(self, models_dir: Path, interval: float) -> None:
+        self.path = manifest_path(models_dir)
+        self.models_dir = Path(models_dir)
+        self.interval = interval
+        self.version: int | None = None
+        self._stat: tuple | None = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _file_stat(self) -> tuple | None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def sync(self) -> dict | None:
+        """Lê o manifesto atual e o marca como carregado."""
+        with self._lock:
+            self._stat = self._file_stat()
+            manifest = read_manifest(self.models_dir)
+            self.version = manifest.get('version') if manifest else None
+            return manifest
+
+    def changed(self) -> bool:
+        """Se há uma versão publicada diferente da carregada (chame `sync` ao recarregar)."""
+        now = time.monotonic()
+        if now < self._next_check or not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._next_check = now + self.interval
+            stat = self._file_stat()
+            if stat == self._stat:
+                return False
+            self._stat = stat
+            manifest = read_manifest(self.models_dir)
+            return (manifest.get('version') if manifest else None) != self.version
+        finally:
+            self._lock.release()
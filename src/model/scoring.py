@@ -0,0 +1,151 @@
+"""
+Pontuação vetorizada de tabelas de formulações (triagem offline).
+
+Cada linha é uma formulação (uma coluna por crioprotetor, com os nomes de
+CRYOPROTECTOR_COLUMNS) e, opcionalmente, o tipo celular. A variante é
+escolhida como nas rotas de predição: linhas só com DMSO e/ou TREHALOSE usam
+o modelo denso da sua classe (`dmso_only`, `trehalose_only`, `both`, com
+fallback para `default` feito pelo carregador) e linhas com qualquer outro
+agente usam o modelo 'multi' com entrada esparsa. As linhas são agrupadas
+por (tipo celular, variante) e cada grupo é avaliado em um único `predict`.
+
+Linhas inválidas não interrompem a pontuação: recebem `viability` vazia e a
+mensagem em `error`.
+"""
+
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src.constants import (
+    CRYOPROTECTOR_COLUMNS, FEATURE_MAP, MULTI_VARIANT, VALID_CELL_TYPES, VIABILITY_DECIMAL_PLACES, VIABILITY_MAX,
+    VIABILITY_MIN
+)
+from src.model.backends import predict_batch
+from src.model.joint import formulation_context
+from src.model.trainer import get_sparse_model_features
+
+CELL_TYPE_COLUMN = 'cell_type'
+RESULT_COLUMNS = ['model_variant', 'model_version', 'viability', 'error']
+
+# (tipo celular, variante pedida) → (modelo, variante efetiva, versão)
+ModelLoader = Callable[[str, str], tuple[object, str, str | None]]
+
+
+def agent_columns(columns: list[str]) -> dict[str, str]:
+    """
+    Colunas de entrada que são crioprotetores, mapeadas ao nome do agente.
+
+    Examples:
+        >>> agent_columns(['id', 'dmso', 'Trehalose', 'GLICEROL'])
+        {'dmso': 'DMSO', 'Trehalose': 'TREHALOSE', 'GLICEROL': 'GLICEROL'}
+    """
+    return {col: str(col).strip().upper() for col in columns if str(col).strip().upper() in CRYOPROTECTOR_COLUMNS}
+
+
+def formulation_variants(concentrations: pd.DataFrame) -> np.ndarray:
+    """Variante pedida por linha: 'multi' se houver agente além de DMSO/TREHALOSE, senão a classe densa."""
+    zeros = np.zeros(len(concentrations))
+    extra = [agent for agent in concentrations if agent not in FEATURE_MAP]
+    has_extra = concentrations[extra].gt(0).any(axis=1).to_numpy()
+    dense = formulation_context(concentrations.get('DMSO', zeros), concentrations.get('TREHALOSE', zeros))
+    return np.where(has_extra, MULTI_VARIANT, dense)
+
+
+def _sparse_matrix(concentrations: pd.DataFrame, features: list[str]) -> sparse.csr_matrix:
+    """Matriz esparsa nas colunas do modelo 'multi' (agentes ausentes = 0)."""
+    agent_of = {col: agent for agent, col in CRYOPROTECTOR_COLUMNS.items()}
+    zeros = np.zeros(len(concentrations), dtype=np.float32)
+    columns = [concentrations[agent_of[f]].to_numpy(dtype=np.float32) if agent_of.get(f) in concentrations else zeros
+               for f in features]
+    return sparse.csr_matrix(np.column_stack(columns))
+
+
+def score_frame(df: pd.DataFrame, load_model: ModelLoader, cell_type: str | None = None) -> pd.DataFrame:
+    """
+    Pontua um bloco de formulações.
+
+    Args:
+        df: Bloco de entrada (colunas de crioprotetores e, sem `cell_type`,
+            a coluna CELL_TYPE_COLUMN)
+        load_model: Carregador (tipo celular, variante) → (modelo, variante
+            efetiva, versão); deve lançar FileNotFoundError ou RuntimeError
+            quando não houver modelo
+        cell_type: Tipo celular de todas as linhas
+
+    Returns:
+        pd.DataFrame: `df` com as colunas RESULT_COLUMNS acrescentadas
+
+    Raises:
+        ValueError: Se não houver coluna de crioprotetor, ou de tipo celular
+            sem `cell_type`
+    """
+    agents = agent_columns(list(df.columns))
+    if not agents:
+        raise ValueError(f"Nenhuma coluna de crioprotetor ({', '.join(CRYOPROTECTOR_COLUMNS)})")
+    if cell_type is None and CELL_TYPE_COLUMN not in df.columns:
+        raise ValueError(f"Informe o tipo celular ou a coluna '{CELL_TYPE_COLUMN}'")
+
+    n = len(df)
+    error = np.full(n, None, dtype=object)
+
+    def fail(mask: np.ndarray, message: str) -> None:
+        """Marca as linhas de `mask` ainda sem erro."""
+        error[mask & pd.isna(error)] = message
+
+    def rows_mask(rows: np.ndarray) -> np.ndarray:
+        mask = np.zeros(n, dtype=bool)
+        mask[rows] = True
+        return mask
+
+    if cell_type is not None:
+        cells = np.full(n, str(cell_type).lower(), dtype=object)
+    else:
+        cells = df[CELL_TYPE_COLUMN].astype(str).str.strip().str.lower().to_numpy(dtype=object)
+    fail(~np.isin(cells, list(VALID_CELL_TYPES)), 'Tipo celular inválido')
+
+    conc = pd.DataFrame(index=df.index)
+    for col, agent in agents.items():
+        values = pd.to_numeric(df[col], errors='coerce')
+        fail((values.isna() & df[col].notna()).to_numpy(), f'Concentração inválida de {agent}')
+        conc[agent] = values.fillna(0.0).to_numpy(dtype=float)
+    fail((conc < 0).any(axis=1).to_numpy(), 'Concentração negativa')
+    fail(~(conc > 0).any(axis=1).to_numpy(), 'A formulação deve ter ao menos um crioprotetor com concentração > 0.')
+
+    requested = formulation_variants(conc)
+    served = np.full(n, None, dtype=object)
+    version = np.full(n, None, dtype=object)
+    viability = np.full(n, np.nan)
+
+    valid = pd.isna(error)
+    groups = pd.DataFrame({'cell': cells[valid], 'variant': requested[valid]}, index=np.flatnonzero(valid))
+    for (ct, variant), group in groups.groupby(['cell', 'variant']):
+        rows = group.index.to_numpy()
+        try:
+            model, served_variant, model_version = load_model(ct, variant)
+        except (FileNotFoundError, RuntimeError) as e:
+            fail(rows_mask(rows), str(e))
+            continue
+        block = conc.iloc[rows]
+        if variant == MULTI_VARIANT:
+            features = get_sparse_model_features(model)
+            if features is None:
+                fail(rows_mask(rows), f'Modelo multi-crioprotetor não encontrado: {ct}')
+                continue
+            known = {agent for agent, col in CRYOPROTECTOR_COLUMNS.items() if col in features}
+            unsupported = block[[a for a in block if a not in known]].gt(0).any(axis=1).to_numpy()
+            fail(rows_mask(rows[unsupported]), 'Crioprotetor não suportado pelo modelo')
+            rows, block = rows[~unsupported], block[~unsupported]
+            if not len(rows):
+                continue
+            X = _sparse_matrix(block, features)
+        else:
+            X = np.column_stack([block.get(agent, np.zeros(len(block))) for agent in FEATURE_MAP])
+        drops = np.asarray(predict_batch(model, X), dtype=float)
+        viability[rows] = np.round(np.clip(100.0 - drops, VIABILITY_MIN, VIABILITY_MAX), VIABILITY_DECIMAL_PLACES)
+        served[rows] = served_variant
+        version[rows] = model_version
+
+    return df.assign(model_variant=served, model_version=version, viability=viability, error=error)
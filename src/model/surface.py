@@ -0,0 +1,157 @@
+"""
+Superfície de resposta DMSO × TREHALOSE em formato binário.
+
+A grade inteira é avaliada de forma vetorizada: as células são agrupadas pela
+classe da formulação (`formulation_context`) e cada modelo de variante faz um
+único `predict` sobre todas as suas células. O resultado é serializado como
+um cabeçalho fixo seguido da matriz de viabilidade em float32 ou uint16
+(quantizada em [value_min, value_max]), em ordem row-major com a TREHALOSE
+nas linhas e o DMSO nas colunas. As superfícies ficam em um cache LRU cuja
+chave inclui a versão (hash) de cada modelo usado, de modo que um modelo
+republicado gera uma nova superfície.
+
+Layout do cabeçalho (little-endian, 36 bytes, alinhado a 4 para Float32Array):
+
+    magic 'CRYS' | versão u8 | dtype u8 (1=float32, 2=uint16) | n_dmso u16 |
+    n_trehalose u16 | dmso_min f32 | dmso_max f32 | tre_min f32 | tre_max f32 |
+    value_min f32 | value_max f32 | 2 bytes de preenchimento
+"""
+
+import struct
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+from src.constants import SURFACE_CACHE_SIZE, VIABILITY_MAX, VIABILITY_MIN
+from src.model.joint import formulation_context
+
+SURFACE_MAGIC = b'CRYS'
+SURFACE_FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBBHH6f2x')
+DTYPES = {'float32': (1, np.dtype('<f4')), 'uint16': (2, np.dtype('<u2'))}
+UINT16_MAX = np.iinfo(np.uint16).max
+
+
+def surface_grid(dmso_range: tuple[float, float], tre_range: tuple[float, float],
+                 n_dmso: int, n_tre: int) -> tuple[np.ndarray, np.ndarray]:
+    """Eixos da grade (pontos igualmente espaçados, extremos inclusos)."""
+    return np.linspace(*dmso_range, n_dmso), np.linspace(*tre_range, n_tre)
+
+
+def evaluate_surface(dmso_axis: np.ndarray, tre_axis: np.ndarray,
+                     predict_variant: Callable[[str, np.ndarray], np.ndarray]) -> np.ndarray:
+    """
+    Viabilidade (%) em todos os pontos da grade.
+
+    Args:
+        dmso_axis: Concentrações de DMSO (colunas)
+        tre_axis: Concentrações de TREHALOSE (linhas)
+        predict_variant: Função (variante, X [n, 2]) → % de queda, chamada uma
+            vez por classe de formulação presente na grade
+
+    Returns:
+        np.ndarray: Matriz [len(tre_axis), len(dmso_axis)] em [0, 100]
+    """
+    dmso, tre = np.meshgrid(dmso_axis, tre_axis)
+    dmso, tre = dmso.ravel(), tre.ravel()
+    contexts = formulation_context(dmso, tre)
+    drops = np.empty(dmso.size, dtype=float)
+    for variant in np.unique(contexts):
+        idx = np.flatnonzero(contexts == variant)
+        drops[idx] = predict_variant(str(variant), np.column_stack([dmso[idx], tre[idx]]))
+    viability = np.clip(100.0 - drops, VIABILITY_MIN, VIABILITY_MAX)
+    return viability.reshape(len(tre_axis), len(dmso_axis))
+
+
+def encode_surface(values: np.ndarray, dmso_axis: np.ndarray, tre_axis: np.ndarray,
+                   dtype: str = 'float32') -> bytes:
+    """
+    Serializa a grade com o cabeçalho binário.
+
+    Args:
+        values: Matriz [n_trehalose, n_dmso] de viabilidade
+        dmso_axis: Eixo do DMSO
+        tre_axis: Eixo da TREHALOSE
+        dtype: 'float32' ou 'uint16' (quantizado em [VIABILITY_MIN, VIABILITY_MAX])
+
+    Returns:
+        bytes: Cabeçalho + dados
+
+    Raises:
+        ValueError: Se o dtype não for suportado
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype inválido: {dtype}. Use {', '.join(DTYPES)}")
+    code, np_dtype = DTYPES[dtype]
+    if dtype == 'uint16':
+        scaled = (values - VIABILITY_MIN) / (VIABILITY_MAX - VIABILITY_MIN) * UINT16_MAX
+        data = np.rint(scaled).astype(np_dtype)
+    else:
+        data = values.astype(np_dtype)
+    header = HEADER.pack(
+        SURFACE_MAGIC, SURFACE_FORMAT_VERSION, code, len(dmso_axis), len(tre_axis),
+        dmso_axis[0], dmso_axis[-1], tre_axis[0], tre_axis[-1], VIABILITY_MIN, VIABILITY_MAX,
+    )
+    return header + data.tobytes()
+
+
+def decode_surface(payload: bytes) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lê um payload de `encode_surface` (usado por clientes Python e scripts).
+
+    Returns:
+        tuple: (viabilidade [n_trehalose, n_dmso] em float, eixo DMSO, eixo TREHALOSE)
+
+    Raises:
+        ValueError: Se o cabeçalho for inválido
+    """
+    (magic, version, code, n_dmso, n_tre,
+     d_min, d_max, t_min, t_max, v_min, v_max) = HEADER.unpack_from(payload)
+    if magic != SURFACE_MAGIC or version != SURFACE_FORMAT_VERSION:
+        raise ValueError("Payload de superfície inválido")
+    np_dtype = next(dt for c, dt in DTYPES.values() if c == code)
+    values = np.frombuffer(payload, dtype=np_dtype, offset=HEADER.size, count=n_dmso * n_tre)
+    values = values.astype(float).reshape(n_tre, n_dmso)
+    if np_dtype == DTYPES['uint16'][1]:
+        values = v_min + values / UINT16_MAX * (v_max - v_min)
+    return values, np.linspace(d_min, d_max, n_dmso), np.linspace(t_min, t_max, n_tre)
+
+
+class SurfaceCache:
+    """Cache LRU de payloads de superfície (chave inclui as versões dos modelos)."""
+
+    def __init__(self, maxsize: int = SURFACE_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[tuple, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        # Incrementada por `clear`: valores calculados antes não são inseridos
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> bytes | None:
+        with self._lock:
+            payload = self._data.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, key: tuple, payload: bytes, generation: int | None = None) -> None:
+        """Insere o payload, a menos que o cache tenha sido esvaziado desde `generation`."""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = payload
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
@@ -1,10 +1,24 @@
-from xgboost import XGBRegressor
+from sklearn.metrics import mean_absolute_error
 from sklearn.model_selection import train_test_split
+from scipy import sparse
+import io
 import joblib
+import json
+import numpy as np
 import pandas as pd
 import logging
 from pathlib import Path
-from src.data.loader import load_raw_data
+from src.constants import (
+    CELL_TYPES_LIST, INCREMENTAL_MAX_MAE_INCREASE, INCREMENTAL_MAX_NEW_FRACTION, INCREMENTAL_MAX_TREES,
+    INCREMENTAL_TREES, JOINT_MODEL, MULTI_FEATURES, MULTI_VARIANT
+)
+from src.data.loader import (
+    DEFAULT_CHUNKSIZE, iter_raw_chunks, load_raw_data, partition_variants, variant_mask, variant_masks
+)
+from src.model.backends import ModelBackend, backend_for, backend_of, get_backend
+from src.model.drift import TRAINING_STATS_ATTR, training_statistics
+from src.model.registry import atomic_write, publish_object, update_manifest
+from src.model.joint import CELL_TYPE_COLUMN, DEFAULT_CATEGORIES, build_joint_frame
 
 logger = logging.getLogger(__name__)
 
@@ -15,73 +29,388 @@ FEATURES = ['% DMSO', 'TREHALOSE']
 TARGET = '% QUEDA DA VIABILIDADE'
 MIN_CONC = 0
 MAX_CONC = 100
+# Conjuntos de teste e dados completos de cada variante, lidos pela etapa de análise
+HOLDOUT_DIR = MODELS_DIR / "holdout"
+# Árvores acrescentadas por atualizações incrementais desde o último treino completo
+INCREMENTAL_TREES_ATTR = 'cryo_incremental_trees'
+
+
+def model_path(cell_type: str, variant: str) -> Path:
+    """Caminho do `.pkl` de (tipo celular, variante), qualquer que seja o backend."""
+    suffix = '' if variant == 'default' else f"_{variant}"
+    return MODELS_DIR / f"xgboost_{cell_type}{suffix}.pkl"
+
+
+def holdout_path(cell_type: str, variant: str) -> Path:
+    """Caminho do conjunto de teste salvo de (tipo celular, variante)."""
+    return HOLDOUT_DIR / f"{cell_type}_{variant}.joblib"
+
+
+def load_holdout(cell_type: str, variant: str) -> dict[str, pd.DataFrame | pd.Series | None]:
+    """
+    Lê o conjunto de teste gravado no treino.
+
+    Returns:
+        dict: {'X_test', 'y_test', 'X_full', 'y_full'}
+
+    Raises:
+        FileNotFoundError: Se a variante não foi treinada com esta versão
+    """
+    path = holdout_path(cell_type, variant)
+    if not path.exists():
+        raise FileNotFoundError(f"Conjunto de teste não encontrado: {path}")
+    return joblib.load(path)
+
+
+def load_partitions(cell_type: str, variants: list[str],
+                    chunksize: int = DEFAULT_CHUNKSIZE) -> tuple[pd.DataFrame, dict[str, np.ndarray]]:
+    """
+    Lê e limpa o CSV do tipo celular uma vez e particiona as linhas por variante.
+
+    O arquivo é lido em blocos (`iter_raw_chunks`), só com as colunas de
+    features e alvo, e cada bloco é reduzido às linhas de alguma das
+    `variants` assim que chega: a memória de pico é a dessas linhas mais um
+    bloco, não a do arquivo. As linhas mantêm como índice a posição no CSV.
+
+    Args:
+        cell_type: Tipo celular
+        variants: Variantes a particionar
+        chunksize: Linhas por bloco lido
+
+    Returns:
+        tuple: (quadro com features e alvo numéricos, {variante: índices}),
+        para `CryoModelTrainer.train_and_save(data=(quadro, índices))`
+    """
+    features = MULTI_FEATURES if MULTI_VARIANT in variants else FEATURES
+    kept = []
+    for chunk in iter_raw_chunks(cell_type, features, chunksize=chunksize):
+        keep = np.zeros(len(chunk), dtype=bool)
+        for mask in variant_masks(chunk, variants).values():
+            keep |= mask
+        kept.append(chunk[keep])
+    df = pd.concat(kept) if kept else pd.DataFrame(columns=list(dict.fromkeys(FEATURES + features + [TARGET])),
+                                                   dtype=float)
+    return df, partition_variants(df, variants)
+
+
+def row_keys(X: pd.DataFrame, y: pd.Series) -> pd.Series:
+    """
+    Chave estável de cada linha: hash do conteúdo (features e alvo) e ordem entre linhas idênticas.
+
+    Não depende da posição no CSV: inserir ou remover uma linha não muda a
+    chave das demais. Uma linha alterada passa a ter outra chave.
+
+    Returns:
+        pd.Series: Chaves (texto), com o índice de `X`
+    """
+    digest = pd.util.hash_pandas_object(pd.concat([X, y], axis=1).astype(float), index=False)
+    return digest.astype(str) + ':' + digest.groupby(digest).cumcount().astype(str)
+
+
+def get_sparse_model_features(model: object) -> list[str] | None:
+    """Retorna as colunas de um modelo 'multi' (entrada esparsa), ou None.
+
+    A lista é gravada como atributo do booster no treino, de modo que
+    modelos antigos continuam válidos quando novos agentes são adicionados
+    a MULTI_FEATURES. Contém só os agentes presentes nos dados de treino:
+    os demais são recusados na predição, em vez de tratados como zero.
+    """
+    try:
+        raw = model.get_booster().attr('cryo_features')
+    except Exception:
+        return None
+    return json.loads(raw) if raw else None
+
 
 class CryoModelTrainer:
-    def __init__(self, cell_type: str, variant: str = 'default') -> None:
-        """Inicializa o treinador para o tipo celular e variante."""
+    def __init__(self, cell_type: str, variant: str = 'default', backend: str | None = None,
+                 publish: bool = True) -> None:
+        """Inicializa o treinador para o tipo celular e variante.
+
+        A variante 'multi' usa as colunas de crioprotetores (MULTI_FEATURES)
+        presentes nos dados de treino e treina sobre matriz esparsa. Com `missing=0.0`,
+        concentração zero e entrada ausente na matriz esparsa são
+        equivalentes, então predições densas e esparsas coincidem.
+
+        Com `cell_type=JOINT_MODEL` ('joint'), treina um único modelo para
+        todos os tipos celulares (CELL_TYPES_LIST), com tipo celular e classe
+        da formulação como features categóricas (`src.model.joint`). Esse
+        modo usa todas as linhas válidas de DMSO/TREHALOSE e ignora `variant`.
+
+        O estimador vem do backend `backend` (`src.model.backends`), ou do
+        configurado para o par em MODEL_BACKENDS. Backends além do XGBoost
+        atendem apenas as variantes densas.
+
+        Cada modelo salvo é também publicado como objeto versionado
+        (`src.model.registry`); com `publish=False` o manifesto não é
+        atualizado e a entrada fica em `self.published`, para o chamador
+        publicar um conjunto de modelos de uma vez (`train_all_models`).
+
+        Raises:
+            ValueError: Se o backend não existir ou não atender a variante
+        """
         self.cell_type = cell_type
+        self.joint = cell_type == JOINT_MODEL
         self.variant = variant
-        self.model = XGBRegressor(
-            objective='reg:squarederror',
-            n_estimators=500,
-            max_depth=5,
-            learning_rate=0.1,
-            subsample=0.9,
-            colsample_bytree=0.8
-        )
+        self.backend: ModelBackend = get_backend(backend) if backend else backend_for(cell_type, variant)
+        if not self.backend.supports(variant, joint=self.joint):
+            raise ValueError(f"Backend {self.backend.name} não atende {cell_type} ({variant})")
+        self.features = MULTI_FEATURES if variant == MULTI_VARIANT else FEATURES
+        self.X_full: pd.DataFrame | None = None
+        self.y_full: pd.Series | None = None
+        self.model = self._build_model()
+        self.publish = publish
+        self.published: dict | None = None
 
-    def _filter_variant(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Filtra o DataFrame de acordo com a variante desejada."""
-        dm_col = FEATURES[0]
-        tr_col = FEATURES[1]
-        if self.variant == 'dmso_only':
-            return df[(df[dm_col] > 0) & (df[tr_col] == 0)]
-        if self.variant == 'trehalose_only':
-            return df[(df[tr_col] > 0) & (df[dm_col] == 0)]
-        if self.variant == 'both':
-            return df[(df[dm_col] > 0) & (df[tr_col] > 0)]
-        return df
-
-    def prepare_data(self, df: pd.DataFrame):
-        """Prepara e valida os dados para treinamento."""
-        for col in FEATURES + [TARGET]:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-
-        df = df.dropna(subset=FEATURES + [TARGET])
-        
-        # Excluir controle contaminado: onde ambas as colunas são 0
-        dm_col = FEATURES[0]
-        tr_col = FEATURES[1]
-        df = df[~((df[dm_col] == 0) & (df[tr_col] == 0))]
-        
-        # Para modelo DEFAULT: usar apenas dados "puros" (um ou outro crioprotetor)
-        if self.variant == 'default':
-            df = df[((df[dm_col] > 0) & (df[tr_col] == 0)) | ((df[dm_col] == 0) & (df[tr_col] > 0))]
-        
-        mask_low = (df[FEATURES] >= MIN_CONC).all(axis=1)
-        mask_high = (df[FEATURES] <= MAX_CONC).all(axis=1)
-        df = df[mask_low & mask_high]
-        df = self._filter_variant(df)
+    @property
+    def model_key(self) -> str:
+        """Chave 'tipo/variante' do modelo no manifesto."""
+        return f"{self.cell_type}/{'default' if self.joint else self.variant}"
 
-        return train_test_split(
-            df[FEATURES],
-            df[TARGET],
+    def _build_model(self, **params) -> object:
+        return self.backend.build(self.variant, joint=self.joint, **params)
+
+    def _matrix(self, X: pd.DataFrame):
+        """Entrada do modelo: esparsa na variante 'multi' (só concentrações não nulas), senão o quadro."""
+        if self.variant == MULTI_VARIANT:
+            return sparse.csr_matrix(X.to_numpy(dtype=float))
+        return X
+
+    def prepare_data(self, df: pd.DataFrame, rows: np.ndarray | None = None):
+        """Prepara e valida os dados para treinamento.
+
+        A seleção de linhas (controles, faixa de concentração e filtro da
+        variante) é a de `variant_mask`, compartilhada com a leitura em fluxo.
+        Com `rows` (índices de `load_partitions`), `df` já está limpo e é
+        compartilhado entre as variantes: nada é recalculado nem alterado, e
+        as linhas só são copiadas na divisão treino/teste.
+        """
+        if rows is None:
+            for col in self.features + [TARGET]:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+
+            if self.joint:
+                return self._prepare_joint_data(df)
+            rows = np.flatnonzero(variant_mask(df, self.variant).to_numpy())
+
+        if self.variant == MULTI_VARIANT:
+            # Só os agentes usados (> 0) em alguma linha da variante: sobre os
+            # demais o modelo não aprendeu nada, e a predição os recusa
+            used = df[MULTI_FEATURES].iloc[rows].fillna(0.0).gt(0).any(axis=0)
+            self.features = [col for col in MULTI_FEATURES if used[col]]
+        X = df[self.features]
+        if self.variant == MULTI_VARIANT:
+            # Célula vazia em coluna de agente significa agente não usado
+            X = X.fillna(0.0)
+        y = df[TARGET]
+
+        # Dataset completo da variante, usado nas curvas CV da análise
+        self.X_full, self.y_full = X.iloc[rows], y.iloc[rows]
+
+        # Dividir os índices equivale a dividir as linhas (mesma permutação)
+        train_rows, test_rows = train_test_split(
+            rows,
             test_size=0.2,
             random_state=42
         )
+        return X.iloc[train_rows], X.iloc[test_rows], y.iloc[train_rows], y.iloc[test_rows]
     
-    def train_and_save(self):
-        """Executa treinamento e salva o modelo."""
-        df = load_raw_data(self.cell_type)
-        X_train, X_test, y_train, y_test = self.prepare_data(df)
+    def _prepare_joint_data(self, df: pd.DataFrame):
+        """Seleciona as linhas válidas de todos os tipos e monta as features categóricas.
+
+        A divisão treino/teste é estratificada por tipo celular, para que
+        todos os tipos estejam representados no conjunto de teste.
+        """
+        # Sem filtro de variante: todas as linhas com DMSO e/ou TREHALOSE
+        df = df[variant_mask(df, None)]
+        X = build_joint_frame(df[FEATURES[0]], df[FEATURES[1]], df[CELL_TYPE_COLUMN])
+        y = df[TARGET].reset_index(drop=True)
+
+        self.X_full, self.y_full = X, y
+
+        return train_test_split(
+            X,
+            y,
+            test_size=0.2,
+            random_state=42,
+            stratify=X[CELL_TYPE_COLUMN]
+        )
+
+    def _load_data(self) -> pd.DataFrame:
+        """Carrega o CSV do tipo celular, ou de todos os tipos no modo conjunto."""
+        if not self.joint:
+            return load_raw_data(self.cell_type, features=self.features)
+        frames = []
+        for cell_type in CELL_TYPES_LIST:
+            df = load_raw_data(cell_type, features=self.features)[self.features + [TARGET]]
+            frames.append(df.assign(**{CELL_TYPE_COLUMN: cell_type}))
+        return pd.concat(frames, ignore_index=True)
+
+    def train_and_save(self, data: tuple[pd.DataFrame, np.ndarray] | None = None):
+        """Executa treinamento e salva o modelo.
+
+        Args:
+            data: (quadro limpo, índices da variante) de `load_partitions`;
+                sem ele, o CSV do tipo celular é lido e limpo aqui
+        """
+        if data is None:
+            X_train, X_test, y_train, y_test = self.prepare_data(self._load_data())
+        else:
+            X_train, X_test, y_train, y_test = self.prepare_data(*data)
 
         if len(X_train) < 10:
             raise ValueError("Dados insuficientes para treinamento")
 
-        self.model.fit(X_train, y_train)
-        suffix = '' if self.variant == 'default' else f"_{self.variant}"
-        model_path = MODELS_DIR / f"xgboost_{self.cell_type}{suffix}.pkl"
-        joblib.dump(self.model, model_path)
+        self.model = self.backend.fit(self.model, self._matrix(X_train), y_train)
+        if self.variant == MULTI_VARIANT:
+            self.model.get_booster().set_attr(cryo_features=json.dumps(self.features))
+        elif self.joint:
+            self.model.get_booster().set_attr(cryo_categories=json.dumps(DEFAULT_CATEGORIES))
+        self._save(X_train, y_train, X_test, y_test)
+        return X_test, y_test
+
+    def _save(self, X_train: pd.DataFrame, y_train: pd.Series, X_test: pd.DataFrame, y_test: pd.Series) -> None:
+        """Grava o modelo e, fora do modo conjunto, as estatísticas de treino e o conjunto de teste."""
+        if not self.joint:
+            # Referência do monitor de drift, gravada junto com o modelo
+            self.backend.set_attrs(
+                self.model, **{TRAINING_STATS_ATTR: json.dumps(training_statistics(X_train, y_train))})
+        path = model_path(self.cell_type, 'default' if self.joint else self.variant)
+        raw = self.backend.dumps(self.model)
+        # Escrita atômica: servidores e a etapa de análise nunca leem um .pkl pela metade
+        atomic_write(path, raw)
+        self.published = publish_object(MODELS_DIR, path.name, raw)
+        if not self.joint:
+            buf = io.BytesIO()
+            joblib.dump({'X_test': X_test, 'y_test': y_test, 'X_full': self.X_full, 'y_full': self.y_full}, buf)
+            holdout = holdout_path(self.cell_type, self.variant)
+            atomic_write(holdout, buf.getvalue())
+            # Publicado com o modelo: os gráficos de uma versão usam o seu
+            # conjunto de teste, mesmo que outro treino já tenha regravado holdout/
+            self.published['holdout'] = publish_object(MODELS_DIR, f"holdout_{holdout.name}", buf.getvalue())
+        if self.publish:
+            update_manifest(MODELS_DIR, {self.model_key: self.published})
+
+        logger.info("Modelo (%s, %s) salvo em %s (%s)", self.variant, self.backend.name, path,
+                    self.published['path'])
+
+    def update_incremental(self, data: tuple[pd.DataFrame, np.ndarray] | None = None) -> dict:
+        """Atualiza o modelo salvo com as linhas novas, continuando o boosting.
+
+        As linhas já vistas são as de `X_full` do conjunto de teste salvo; as
+        demais linhas da variante no CSV atual são novas. As linhas são
+        comparadas pelo conteúdo (`row_keys`), não pela posição no CSV:
+        inserir ou remover uma linha não muda a identidade das seguintes. O booster salvo
+        recebe até INCREMENTAL_TREES árvores (`xgb_model`), ajustadas sobre o
+        conjunto de treino anterior mais as linhas novas: as linhas antigas,
+        já bem ajustadas, ancoram as árvores novas, que se concentram nos
+        resíduos das novas. O conjunto de teste não muda, para que o MAE antes
+        e depois seja comparável.
+
+        Cai para o treino completo (`train_and_save`) quando:
+            - não há modelo ou conjunto de teste salvo;
+            - o backend não suporta continuar o treino (só o XGBoost suporta),
+              ou o modelo salvo é de outro backend;
+            - linhas já vistas foram alteradas ou removidas (não há como
+              desfazer o que o booster aprendeu com elas; uma linha alterada
+              é uma linha vista que sumiu mais uma nova);
+            - na variante 'multi', as linhas usam um agente que o modelo
+              salvo não tem como coluna;
+            - as linhas novas passam de INCREMENTAL_MAX_NEW_FRACTION das vistas;
+            - as árvores incrementais acumuladas atingem INCREMENTAL_MAX_TREES;
+            - o MAE no conjunto de teste piora mais que
+              INCREMENTAL_MAX_MAE_INCREASE (relativo).
+
+        Args:
+            data: (quadro limpo, índices da variante) de `load_partitions`;
+                sem ele, o CSV do tipo celular é lido aqui
+
+        Returns:
+            dict: {'mode': 'incremental' | 'full' | 'unchanged', 'reason',
+            'new_rows', 'trees_added', 'incremental_trees', 'mae_before',
+            'mae_after'}
+
+        Raises:
+            ValueError: No modo conjunto, ou com dados insuficientes no treino completo
+        """
+        if self.joint:
+            raise ValueError("O modelo conjunto não tem atualização incremental")
+        if data is None:
+            df, partitions = load_partitions(self.cell_type, [self.variant])
+            data = (df, partitions[self.variant])
+        path = model_path(self.cell_type, self.variant)
+        if not path.exists() or not holdout_path(self.cell_type, self.variant).exists():
+            return self._full_update(data, "modelo ou conjunto de teste ausente")
+        if not self.backend.incremental:
+            return self._full_update(data, f"backend {self.backend.name} sem atualização incremental")
+
+        df, rows = data
+        holdout = load_holdout(self.cell_type, self.variant)
+        if self.variant == MULTI_VARIANT:
+            # As colunas são as do modelo salvo; um agente novo exige outro modelo
+            self.features = list(holdout['X_full'].columns)
+            others = [col for col in MULTI_FEATURES if col not in self.features]
+            if df[others].iloc[rows].fillna(0.0).gt(0).to_numpy().any():
+                return self._full_update(data, "agente ausente do modelo salvo")
+        X = df[self.features]
+        if self.variant == MULTI_VARIANT:
+            X = X.fillna(0.0)
+        y = df[TARGET]
+        current = row_keys(X.iloc[rows], y.iloc[rows])
+        seen = row_keys(holdout['X_full'], holdout['y_full'])
+        # Conjunto de teste também pelo conteúdo: os rótulos salvos são posições
+        # no CSV de quando ele foi gravado
+        test_keys = row_keys(holdout['X_test'], holdout['y_test'])
+        test = set(test_keys)
+
+        if not set(seen) <= set(current):
+            return self._full_update(data, "linhas já usadas no treino foram alteradas ou removidas")
+        new = current.index[~current.isin(set(seen))]
+        if new.empty:
+            return {'mode': 'unchanged', 'reason': "nenhuma linha nova", 'new_rows': 0, 'trees_added': 0,
+                    'incremental_trees': None, 'mae_before': None, 'mae_after': None}
+        if len(new) > INCREMENTAL_MAX_NEW_FRACTION * len(seen):
+            return self._full_update(data, f"{len(new)} linhas novas (> {INCREMENTAL_MAX_NEW_FRACTION:.0%} das vistas)")
+
+        previous = self.backend.load(path)
+        if not self.backend.owns(previous):
+            return self._full_update(data, f"modelo salvo é de outro backend ({backend_of(previous).name})")
+        added = int(previous.get_booster().attr(INCREMENTAL_TREES_ATTR) or 0)
+        trees = min(INCREMENTAL_TREES, INCREMENTAL_MAX_TREES - added)
+        if trees <= 0:
+            return self._full_update(data, f"limite de {INCREMENTAL_MAX_TREES} árvores incrementais atingido")
+
+        # Reindexado às posições atuais, como `X_full`, ao ser gravado de novo
+        positions = pd.Series(current.index, index=current.to_numpy())
+        X_test = holdout['X_test'].set_axis(positions.loc[test_keys.to_numpy()].to_numpy())
+        y_test = holdout['y_test'].set_axis(X_test.index)
+        # Treino: todas as linhas atuais fora do conjunto de teste (as vistas e as novas)
+        train = current.index[~current.isin(test)]
+        X_train, y_train = X.loc[train], y.loc[train]
+        updated = self._build_model(n_estimators=trees)
+        self.backend.fit(updated, self._matrix(X_train), y_train, xgb_model=previous.get_booster())
+
+        mae_before = float(mean_absolute_error(y_test, self.backend.predict(previous, self._matrix(X_test))))
+        mae_after = float(mean_absolute_error(y_test, self.backend.predict(updated, self._matrix(X_test))))
+        if mae_after > mae_before * (1 + INCREMENTAL_MAX_MAE_INCREASE):
+            return self._full_update(data, f"MAE de teste piorou de {mae_before:.3f} para {mae_after:.3f}")
+
+        self.model = updated
+        self.model.get_booster().set_attr(**{INCREMENTAL_TREES_ATTR: str(added + trees)})
+        if self.variant == MULTI_VARIANT:
+            self.model.get_booster().set_attr(cryo_features=json.dumps(self.features))
+        self.X_full, self.y_full = X.loc[current.index], y.loc[current.index]
+        self._save(X_train, y_train, X_test, y_test)
+        logger.info("Modelo (%s) atualizado: %d linhas novas, +%d árvores, MAE de teste %.3f -> %.3f",
+                    self.variant, len(new), trees, mae_before, mae_after)
+        return {'mode': 'incremental', 'reason': None, 'new_rows': len(new), 'trees_added': trees,
+                'incremental_trees': added + trees, 'mae_before': mae_before, 'mae_after': mae_after}
 
-        logger.info(f"Modelo ({self.variant}) salvo em {model_path}")
-        return X_test, y_test
\ No newline at end of file
+    def _full_update(self, data: tuple[pd.DataFrame, np.ndarray], reason: str) -> dict:
+        """Treino completo no lugar de uma atualização incremental."""
+        logger.info("Modelo (%s): treino completo (%s)", self.variant, reason)
+        self.model = self._build_model()
+        X_test, y_test = self.train_and_save(data=data)
+        mae = float(mean_absolute_error(y_test, self.backend.predict(self.model, self._matrix(X_test))))
+        return {'mode': 'full', 'reason': reason, 'new_rows': None, 'trees_added': None,
+                'incremental_trees': 0, 'mae_before': None, 'mae_after': mae}
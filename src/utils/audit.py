@@ -0,0 +1,197 @@
+"""
+Registro de auditoria das predições servidas (rastreabilidade do laboratório).
+
+O thread da requisição apenas monta um dict e o coloca em uma fila limitada;
+um thread de fundo agrupa os registros em lotes (por tamanho ou tempo),
+serializa cada lote como linhas JSON e o acrescenta ao arquivo atual como um
+membro gzip independente. Arquivos são apenas acrescidos e, ao atingir o
+tamanho ou a idade máxima, fechados e substituídos por um novo — nunca
+reescritos. Um arquivo com vários membros é um gzip válido (`zcat`,
+`gzip.open`), e um encerramento abrupto perde no máximo o lote em escrita.
+
+Com a fila cheia, a política `drop` descarta o registro (contado em
+`dropped`) e `block` espera até `block_timeout` segundos antes de descartar.
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.constants import (
+    AUDIT_BATCH_SIZE, AUDIT_BLOCK_TIMEOUT_MS, AUDIT_FLUSH_INTERVAL_S, AUDIT_QUEUE_SIZE, AUDIT_ROTATE_MB,
+    AUDIT_ROTATE_S
+)
+from src.utils.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ('drop', 'block')
+_STOP = object()
+
+
+class AuditLog:
+    """Sink assíncrono de auditoria com fila limitada e escrita em lotes.
+
+    Args:
+        directory: Diretório dos arquivos `audit-<timestamp>.jsonl.gz`
+        policy: 'drop' ou 'block' quando a fila está cheia
+        max_queue: Capacidade da fila (registros)
+        batch_size: Registros por lote (escrita imediata ao completar)
+        flush_interval: Espera máxima (s) de um registro antes da escrita
+        rotate_bytes: Tamanho comprimido que fecha o arquivo atual
+        rotate_seconds: Idade que fecha o arquivo atual
+        block_timeout: Espera máxima (s) da política 'block'
+        compresslevel: Nível gzip dos lotes
+
+    Raises:
+        ValueError: Se a política for inválida
+    """
+
+    def __init__(self, directory: Path, policy: str = 'drop', max_queue: int = AUDIT_QUEUE_SIZE,
+                 batch_size: int = AUDIT_BATCH_SIZE, flush_interval: float = AUDIT_FLUSH_INTERVAL_S,
+                 rotate_bytes: int = AUDIT_ROTATE_MB * 1024 * 1024, rotate_seconds: float = AUDIT_ROTATE_S,
+                 block_timeout: float = AUDIT_BLOCK_TIMEOUT_MS / 1000, compresslevel: int = 6) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Política inválida: {policy}. Use {', '.join(POLICIES)}")
+        self.directory = Path(directory)
+        self.policy = policy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.block_timeout = block_timeout
+        self.compresslevel = compresslevel
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._file_path: Path | None = None
+        self._file_opened = 0.0
+        self._file_seq = 0
+        self.submitted = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.files = 0
+        self.write_errors = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+
+    def record(self, **fields) -> bool:
+        """
+        Enfileira um registro (com `ts` do momento da chamada).
+
+        Returns:
+            bool: False se o registro foi descartado (fila cheia)
+        """
+        fields['ts'] = time.time()
+        try:
+            if self.policy == 'block':
+                self._queue.put(fields, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(fields)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def _run(self) -> None:
+        """Laço do escritor: monta lotes e grava até receber o sinal de parada."""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+        self._close_file()
+
+    def _write(self, batch: list[dict]) -> None:
+        try:
+            payload = b''.join(dumps(record) + b'\n' for record in batch)
+            member = gzip.compress(payload, compresslevel=self.compresslevel)
+            handle = self._current_file()
+            handle.write(member)
+            handle.flush()
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.write_errors += 1
+            logger.error("Falha ao gravar lote de auditoria (%d registros): %s", len(batch), e)
+
+    def _current_file(self):
+        """Arquivo aberto para acréscimo, rotacionado por tamanho ou idade."""
+        if self._file is not None:
+            too_big = self._file.tell() >= self.rotate_bytes
+            too_old = time.monotonic() - self._file_opened >= self.rotate_seconds
+            if too_big or too_old:
+                self._close_file()
+        if self._file is None:
+            self._file_seq += 1
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            self._file_path = self.directory / f"audit-{stamp}-{self._file_seq:04d}.jsonl.gz"
+            self._file = open(self._file_path, 'ab')
+            self._file_opened = time.monotonic()
+            self.files += 1
+        return self._file
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Grava os registros pendentes e para o escritor."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Fila de auditoria cheia no encerramento; registros pendentes podem ser perdidos")
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        """Contadores do sink, para diagnóstico."""
+        return {
+            'policy': self.policy,
+            'queued': self._queue.qsize(),
+            'capacity': self._queue.maxsize,
+            'submitted': self.submitted,
+            'written': self.written,
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'files': self.files,
+            'write_errors': self.write_errors,
+            'current_file': str(self._file_path) if self._file_path else None,
+        }
+
+
+def read_audit_file(path: Path) -> list[dict]:
+    """Lê todos os registros de um arquivo de auditoria (todos os membros gzip)."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def open_audit_log(directory: Path, policy: str = 'drop', **options) -> AuditLog:
+    """Cria o sink e registra seu encerramento na saída do processo."""
+    audit = AuditLog(directory, policy=policy, **options)
+    atexit.register(audit.close)
+    return audit
@@ -0,0 +1,109 @@
+"""
+Redução de curvas densas para um orçamento de pontos, preservando a forma.
+
+Usa o Largest-Triangle-Three-Buckets (LTTB, Steinarsson 2013): o primeiro e
+o último ponto são mantidos e, entre eles, a curva é dividida em baldes de
+tamanho igual; de cada balde fica o ponto que forma o maior triângulo com o
+ponto escolhido no balde anterior e a média do balde seguinte. Picos, vales
+e mudanças de inclinação sobrevivem; trechos quase lineares viram poucos
+pontos.
+
+Antes do LTTB, pontos colineares com os vizinhos são descartados sem perda
+(a interpolação linear dos restantes reproduz a curva). As curvas do
+XGBoost são constantes por partes, então isso costuma bastar: sobram só as
+bordas de cada degrau, e o LTTB atua apenas quando elas excedem o orçamento.
+"""
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Índices dos pontos mantidos pelo LTTB.
+
+    Args:
+        x: Abscissas crescentes
+        y: Ordenadas
+        n_out: Pontos desejados (>= 3)
+
+    Returns:
+        np.ndarray: Índices crescentes, incluindo o primeiro e o último
+
+    Examples:
+        >>> x = np.arange(7.0)
+        >>> lttb_indices(x, np.array([0, 0, 0, 5, 0, 0, 0.0]), 3).tolist()
+        [0, 3, 6]
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Baldes internos: pontos 1..n-2 divididos em n_out - 2 faixas
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(int) + 1
+    edges[-1] = n - 1
+    indices = np.empty(n_out, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def collinear_mask(x: np.ndarray, y: np.ndarray, tolerance: float = 1e-9) -> np.ndarray:
+    """
+    Máscara dos pontos necessários: descarta os colineares com os vizinhos.
+
+    Examples:
+        >>> x = np.arange(6.0)
+        >>> collinear_mask(x, np.array([1, 1, 1, 2, 2, 2.0])).tolist()
+        [True, False, True, True, False, True]
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    mask = np.ones(len(x), dtype=bool)
+    if len(x) > 2:
+        cross = (y[1:-1] - y[:-2]) * (x[2:] - x[1:-1]) - (y[2:] - y[1:-1]) * (x[1:-1] - x[:-2])
+        mask[1:-1] = np.abs(cross) > tolerance
+    return mask
+
+
+def downsample_curve(x: np.ndarray, y: np.ndarray, max_points: int,
+                     keep: tuple[int, ...] = ()) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reduz a curva (x, y) a no máximo `max_points` pontos.
+
+    Descarta os pontos colineares (sem perda) e, se ainda exceder o
+    orçamento, aplica o LTTB.
+
+    Args:
+        x: Abscissas crescentes
+        y: Ordenadas
+        max_points: Orçamento de pontos (>= 3 + len(keep))
+        keep: Índices que devem sobreviver (ex.: o ótimo); cada um ocupa o
+            lugar de um ponto do LTTB
+
+    Returns:
+        tuple: (x reduzido, y reduzido)
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) <= max_points:
+        return x, y
+    mask = collinear_mask(x, y)
+    mask[list(keep)] = True
+    candidates = np.flatnonzero(mask)
+    if len(candidates) > max_points:
+        extra = [k for k in dict.fromkeys(keep) if 0 < k < len(x) - 1]
+        chosen = candidates[lttb_indices(x[candidates], y[candidates], max_points - len(extra))]
+        candidates = np.union1d(chosen, extra).astype(int)
+    return x[candidates], y[candidates]
@@ -6,13 +6,17 @@ de dados usadas em múltiplos pontos da aplicação.
 """
 
 import logging
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from scipy import sparse
 from src.constants import (
     FEATURE_MAP, MODEL_FEATURES, VALID_CELL_TYPES, VALID_CRYOPROTECTORS,
     CONCENTRATION_RANGES, VIABILITY_MIN, VIABILITY_MAX, VIABILITY_DECIMAL_PLACES,
-    FLOAT_TOLERANCE
+    FLOAT_TOLERANCE, CRYOPROTECTOR_COLUMNS, MULTI_FEATURES, CONCENTRATION_MIN, CONCENTRATION_MAX,
+    CONCENTRATION_STEP
 )
+from src.data.loader import scan_csv
 
 logger = logging.getLogger(__name__)
 
@@ -54,7 +58,7 @@ def parse_percent_value(value: object) -> float | None:
         s = s.replace(',', '.')
         return float(s)
     except Exception as e:
-        logger.debug(f"Falha ao fazer parse de '{value}': {e}")
+        logger.debug("Falha ao fazer parse de '%s': %s", value, e)
         return None
 
 
@@ -92,11 +96,78 @@ def build_feature_row(cryoprotector: str, concentration: float) -> dict:
         # DMSO ou TREHALOSE: coloca valor apenas na coluna correspondente
         row[FEATURE_MAP[cryo]] = float(concentration)
     else:
-        logger.warning(f"Crioprotetor desconhecido: {cryo}")
+        logger.warning("Crioprotetor desconhecido: %s", cryo)
     
     return row
 
 
+def build_feature_matrix(cryoprotector: str, concentrations: np.ndarray) -> np.ndarray:
+    """
+    Matriz de features (uma linha por concentração), como `build_feature_row`.
+    
+    Examples:
+        >>> build_feature_matrix('TREHALOSE', np.array([5.0, 10.0])).tolist()
+        [[0.0, 5.0], [0.0, 10.0]]
+    """
+    cryo = cryoprotector.upper()
+    concentrations = np.asarray(concentrations, dtype=float)
+    X = np.zeros((len(concentrations), len(MODEL_FEATURES)))
+    columns = MODEL_FEATURES if cryo == 'BOTH' else [FEATURE_MAP[cryo]] if cryo in FEATURE_MAP else []
+    for col in columns:
+        X[:, MODEL_FEATURES.index(col)] = concentrations
+    return X
+
+
+def build_sparse_feature_matrix(formulations: list[dict[str, float]],
+                                features: list[str] | None = None) -> sparse.csr_matrix:
+    """
+    Constrói a matriz esparsa (CSR) de features para modelos 'multi'.
+    
+    Cada formulação ocupa uma linha e apenas as concentrações não nulas são
+    armazenadas, então memória e custo crescem com o número de agentes
+    usados, não com o número de agentes suportados.
+    
+    Args:
+        formulations: Lista de {crioprotetor: concentração}, ex. {'DMSO': 10}
+        features: Colunas do modelo, na ordem (padrão: MULTI_FEATURES)
+        
+    Returns:
+        sparse.csr_matrix: Matriz (n_formulações × n_features)
+        
+    Raises:
+        ValueError: Se um crioprotetor for desconhecido ou não suportado pelo modelo
+        
+    Examples:
+        >>> build_sparse_feature_matrix([{'DMSO': 10, 'GLICEROL': 5}]).nnz
+        2
+    """
+    features = features or MULTI_FEATURES
+    index = {col: i for i, col in enumerate(features)}
+    indptr = [0]
+    indices: list[int] = []
+    data: list[float] = []
+    
+    for formulation in formulations:
+        row = {}
+        for name, conc in formulation.items():
+            col = CRYOPROTECTOR_COLUMNS.get(str(name).upper())
+            if col is None:
+                raise ValueError(f"Crioprotetor desconhecido: {name}")
+            if col not in index:
+                raise ValueError(f"Crioprotetor não suportado pelo modelo: {name}")
+            if conc:
+                row[index[col]] = float(conc)
+        for i in sorted(row):
+            indices.append(i)
+            data.append(row[i])
+        indptr.append(len(indices))
+    
+    return sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(formulations), len(features))
+    )
+
+
 # ========== VIABILITY PROCESSING ==========
 
 def clamp_viability(value: float) -> float:
@@ -163,13 +234,19 @@ def validate_cryoprotector(cryoprotector: str) -> tuple[bool, str | None]:
     return True, None
 
 
-def validate_concentration(concentration: float, cryoprotector: str) -> tuple[bool, str | None]:
+def validate_concentration(concentration: float, cryoprotector: str,
+                           step: float = CONCENTRATION_STEP) -> tuple[bool, str | None]:
     """
     Valida se a concentração é válida para o crioprotetor.
     
+    Com o passo padrão, a concentração deve estar na grade de
+    CONCENTRATION_RANGES; com outro `step`, em qualquer múltiplo dele dentro
+    de [CONCENTRATION_MIN, CONCENTRATION_MAX].
+    
     Args:
         concentration: Valor de concentração
         cryoprotector: Tipo de crioprotetor
+        step: Resolução da grade (%)
         
     Returns:
         tuple: (is_valid, error_message)
@@ -183,14 +260,38 @@ def validate_concentration(concentration: float, cryoprotector: str) -> tuple[bo
     if not allowed:
         return False, f"Crioprotetor inválido: {cryoprotector}"
     
-    # Converte allowed para float se necessário e verifica tolerância
-    allowed_floats = [float(c) for c in allowed]
-    if not any(abs(conc_float - c) < max(FLOAT_TOLERANCE, 0.1) for c in allowed_floats):
-        return False, f"Concentração {conc_float} não permitida. Valores: {allowed}"
+    if step == CONCENTRATION_STEP:
+        # Converte allowed para float se necessário e verifica tolerância
+        allowed_floats = [float(c) for c in allowed]
+        if not any(abs(conc_float - c) < max(FLOAT_TOLERANCE, 0.1) for c in allowed_floats):
+            return False, f"Concentração {conc_float} não permitida. Valores: {allowed}"
+        return True, None
     
+    if not CONCENTRATION_MIN <= conc_float <= CONCENTRATION_MAX:
+        return False, f"Concentração deve estar entre {CONCENTRATION_MIN} e {CONCENTRATION_MAX}"
+    # Fora da grade de 5%, a tolerância acompanha o passo pedido
+    tolerance = max(FLOAT_TOLERANCE, min(0.1, step / 10))
+    offset = (conc_float - CONCENTRATION_MIN) / step
+    if abs(offset - round(offset)) * step > tolerance:
+        return False, f"Concentração {conc_float} fora da grade de resolução {step:g}%"
     return True, None
 
 
+def concentration_grid(step: float, start: float = CONCENTRATION_MIN, stop: float = CONCENTRATION_MAX) -> np.ndarray:
+    """
+    Grade de concentrações de `start` a `stop` (inclusive) com passo `step`.
+    
+    Os valores são arredondados para eliminar o erro acumulado de ponto
+    flutuante (0.30000000000000004 → 0.3).
+    
+    Examples:
+        >>> concentration_grid(2.5, 0, 10).tolist()
+        [0.0, 2.5, 5.0, 7.5, 10.0]
+    """
+    n_points = int(np.floor((stop - start) / step + 1e-9)) + 1
+    return np.round(start + step * np.arange(n_points), 6)
+
+
 def validate_input(cell_type: str, cryoprotector: str) -> list[str]:
     """
     Valida combinação de tipo celular e crioprotetor.
@@ -236,28 +337,21 @@ def get_available_both_combinations(cell_type: str) -> list[tuple[float, float]]
     try:
         path = RAW_DATA_DIR / f"{cell_type}.csv"
         if not path.exists():
-            logger.warning(f"Arquivo não encontrado: {path}")
+            logger.warning("Arquivo não encontrado: %s", path)
             return []
         
-        df = pd.read_csv(path, dtype=str, engine='python')
         dmso_col = FEATURE_MAP['DMSO']
         tre_col = FEATURE_MAP['TREHALOSE']
         
-        if dmso_col not in df.columns or tre_col not in df.columns:
-            logger.warning(f"Colunas esperadas não encontradas em {path}")
+        header = pd.read_csv(path, dtype=str, nrows=0).columns
+        if dmso_col not in header or tre_col not in header:
+            logger.warning("Colunas esperadas não encontradas em %s", path)
             return []
         
-        dmso_vals = df[dmso_col].map(parse_percent_value)
-        tre_vals = df[tre_col].map(parse_percent_value)
-        
-        pairs = pd.DataFrame({dmso_col: dmso_vals, tre_col: tre_vals}).dropna()
-        # Filtra pares onde ambos > 0
-        pairs = pairs[(pairs[dmso_col] > 0) & (pairs[tre_col] > 0)]
-        pairs = pairs.drop_duplicates().sort_values(by=[dmso_col, tre_col])
-        
-        return [(float(r[dmso_col]), float(r[tre_col])) for _, r in pairs.iterrows()]
+        # Leitura em blocos: apenas os pares únicos ficam em memória
+        return scan_csv(path, [dmso_col, tre_col]).sorted_pairs()
     except Exception as e:
-        logger.error(f"Erro ao extrair combinações para {cell_type}: {e}")
+        logger.error("Erro ao extrair combinações para %s: %s", cell_type, e)
         return []
 
 
@@ -279,21 +373,15 @@ def get_min_nonzero_feature(cell_type: str, feature_col: str) -> float | None:
     try:
         path = RAW_DATA_DIR / f"{cell_type}.csv"
         if not path.exists():
-            logger.debug(f"Arquivo não encontrado: {path}")
-            return None
-        
-        df = pd.read_csv(path, dtype=str, engine='python')
-        if feature_col not in df.columns:
-            logger.debug(f"Coluna {feature_col} não encontrada em {path}")
+            logger.debug("Arquivo não encontrado: %s", path)
             return None
         
-        vals = df[feature_col].map(parse_percent_value).dropna()
-        vals = vals[vals > 0]
-        
-        if vals.empty:
+        header = pd.read_csv(path, dtype=str, nrows=0).columns
+        if feature_col not in header:
+            logger.debug("Coluna %s não encontrada em %s", feature_col, path)
             return None
         
-        return float(vals.min())
+        return scan_csv(path, [feature_col]).min_nonzero[feature_col]
     except Exception as e:
-        logger.error(f"Erro ao obter min_nonzero para {feature_col} em {cell_type}: {e}")
+        logger.error("Erro ao obter min_nonzero para %s em %s: %s", feature_col, cell_type, e)
         return None
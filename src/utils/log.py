@@ -0,0 +1,169 @@
+"""
+Configuração de logging de baixo custo para o caminho das requisições.
+
+Os registros são enfileirados pelo thread da requisição e formatados/escritos
+por um thread de fundo (`QueueListener`). A mensagem só é interpolada no
+thread escritor, a saída é JSON estruturado e linhas INFO de rotas de alto
+volume podem ser amostradas por rota.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, TextIO
+
+DEFAULT_LOG_LEVEL = 'INFO'
+
+logger = logging.getLogger(__name__)
+
+# Atributos padrão de LogRecord que não são copiados como campos extras
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+# Escritor ativo; substituído (e parado) a cada nova configuração
+_listener: QueueListener | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como uma linha JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class LazyQueueHandler(QueueHandler):
+    """QueueHandler que não formata no thread de origem.
+
+    O `QueueHandler` padrão interpola a mensagem em `prepare()`, ou seja, no
+    thread da requisição. Como a fila é em processo, o registro pode seguir
+    intacto e ser formatado apenas pelo `QueueListener`.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class RouteSamplingFilter(logging.Filter):
+    """Amostra registros INFO por rota.
+
+    Args:
+        rates: Mapeamento {rota: fração mantida (0-1)}
+        route_getter: Função que retorna a rota atual (ou None fora de requisição)
+    """
+
+    def __init__(self, rates: dict[str, float], route_getter: Callable[[], str | None]) -> None:
+        super().__init__()
+        self.rates = rates
+        self.route_getter = route_getter
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.INFO or not self.rates:
+            return True
+        route = self.route_getter()
+        if route is None:
+            return True
+        rate = self.rates.get(route)
+        if rate is None:
+            return True
+        record.route = route
+        return random.random() < rate
+
+
+def parse_sampling(spec: str | None) -> dict[str, float]:
+    """
+    Interpreta a especificação de amostragem por rota.
+
+    Args:
+        spec: Texto no formato '/predict=0.1,/specific-predict=0.05'
+
+    Returns:
+        dict: Mapeamento {rota: fração mantida}
+
+    Examples:
+        >>> parse_sampling('/predict=0.1')
+        {'/predict': 0.1}
+    """
+    rates = {}
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        route, rate = item.split('=', 1)
+        rates[route.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+def stop_logging() -> None:
+    """Esvazia a fila e para o thread escritor, se houver."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging(
+    level: str | None = None,
+    sampling: dict[str, float] | None = None,
+    route_getter: Callable[[], str | None] | None = None,
+    stream: TextIO | None = None,
+) -> QueueListener:
+    """
+    Configura o logger raiz com fila, escritor em thread de fundo e saída JSON.
+
+    Args:
+        level: Nível de log (padrão: env LOG_LEVEL ou INFO); um nome
+            desconhecido é registrado como aviso e tratado como INFO
+        sampling: Frações por rota (padrão: env LOG_SAMPLING)
+        route_getter: Retorna a rota da requisição atual, para a amostragem
+        stream: Destino da saída (padrão: stderr)
+
+    Returns:
+        QueueListener: Escritor iniciado (parado automaticamente na saída)
+    """
+    global _listener
+    stop_logging()
+    level = (level or os.getenv('LOG_LEVEL', DEFAULT_LOG_LEVEL)).upper()
+    if sampling is None:
+        sampling = parse_sampling(os.getenv('LOG_SAMPLING'))
+
+    writer = logging.StreamHandler(stream or sys.stderr)
+    writer.setFormatter(JsonFormatter())
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = LazyQueueHandler(log_queue)
+    if sampling and route_getter is not None:
+        handler.addFilter(RouteSamplingFilter(sampling, route_getter))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    # `getLevelName` devolve o número apenas para nomes registrados
+    # (`getLevelNamesMapping` só existe a partir do Python 3.11)
+    valid = isinstance(logging.getLevelName(level), int)
+    root.setLevel(level if valid else DEFAULT_LOG_LEVEL)
+
+    _listener = QueueListener(log_queue, writer, respect_handler_level=True)
+    _listener.start()
+    if not valid:
+        # Um LOG_LEVEL inválido não pode impedir a importação do servidor
+        logger.warning("LOG_LEVEL inválido: %r; usando %s", level, DEFAULT_LOG_LEVEL)
+    return _listener
+
+
+atexit.register(stop_logging)
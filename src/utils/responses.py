@@ -0,0 +1,113 @@
+"""
+Camada de resposta das APIs de predição.
+
+`json_response` serializa com `orjson` quando instalado (dependência
+opcional; sem ela usa o `json` da stdlib em formato compacto) e pode limitar
+a precisão dos floats a VIABILITY_DECIMAL_PLACES. `init_compression`
+registra um hook que comprime com gzip as respostas acima de um tamanho
+mínimo quando o cliente aceita gzip.
+"""
+
+import gzip
+import json
+import logging
+
+import numpy as np
+from flask import Flask, Response, request
+
+from src.constants import GZIP_LEVEL, GZIP_MIN_SIZE, VIABILITY_DECIMAL_PLACES
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript'
+}
+
+
+def round_floats(obj: object, places: int) -> object:
+    """
+    Arredonda recursivamente os floats de listas, tuplas e dicts.
+
+    Examples:
+        >>> round_floats({'v': [93.8312, 1]}, 2)
+        {'v': [93.83, 1]}
+    """
+    if isinstance(obj, (float, np.floating)):
+        return round(float(obj), places)
+    if isinstance(obj, dict):
+        return {k: round_floats(v, places) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [round_floats(v, places) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return np.round(obj.astype(float), places).tolist()
+    return obj
+
+
+def dumps(payload: object) -> bytes:
+    """Serializa para JSON compacto em UTF-8 (orjson se disponível)."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def _default(obj: object) -> object:
+    """Conversão de tipos numpy para o encoder da stdlib."""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Objeto não serializável: {type(obj).__name__}")
+
+
+def json_response(payload: object, status: int = 200,
+                  places: int | None = VIABILITY_DECIMAL_PLACES) -> Response:
+    """
+    Resposta JSON para payloads de predição.
+
+    Args:
+        payload: Dados da resposta (aceita tipos numpy)
+        status: Código HTTP
+        places: Casas decimais máximas dos floats (None = sem arredondamento)
+
+    Returns:
+        Response: Resposta `application/json`
+    """
+    if places is not None:
+        payload = round_floats(payload, places)
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+def _accepts_gzip() -> bool:
+    return request.accept_encodings['gzip'] > 0
+
+
+def init_compression(app: Flask, min_size: int = GZIP_MIN_SIZE, level: int = GZIP_LEVEL) -> None:
+    """
+    Comprime com gzip as respostas grandes quando o cliente aceita.
+
+    Respostas em streaming (ex.: SSE), arquivos servidos diretamente, já
+    codificadas ou menores que `min_size` bytes são enviadas como estão.
+
+    Args:
+        app: Aplicação Flask
+        min_size: Tamanho mínimo (bytes) para comprimir
+        level: Nível de compressão gzip (1-9)
+    """
+    @app.after_request
+    def _compress(response: Response) -> Response:
+        if (response.direct_passthrough or response.is_streamed
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or 'Content-Encoding' in response.headers
+                or not 200 <= response.status_code < 300):
+            return response
+        response.vary.add('Accept-Encoding')
+        if (response.content_length or 0) < min_size or not _accepts_gzip():
+            return response
+        response.set_data(gzip.compress(response.get_data(), compresslevel=level))
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
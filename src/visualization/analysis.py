@@ -0,0 +1,135 @@
+"""
+Pré-geração dos gráficos de análise, separada do ajuste dos modelos.
+
+Os gráficos são gerados sob demanda pelo servidor (`graph_cache`); esta etapa
+opcional (`train_models.py --analysis` / `--analysis-only`) preenche o mesmo
+cache de antemão. Cada (tipo celular, variante) é renderizado a partir do
+modelo publicado e do conjunto de teste publicado com ele
+(`graph_cache.graph_sources`), em processos separados: a renderização
+(matplotlib, Plotly, SHAP, curvas CV) é bem mais lenta que o ajuste do
+XGBoost e independente entre variantes. Uma falha em uma análise é
+registrada e não interrompe as demais.
+"""
+
+import logging
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable
+
+from src.model.registry import read_manifest
+from src.model.trainer import MODELS_DIR
+from src.visualization.graph_cache import (
+    FIGURE_FILES, file_digest, graph_digest, graph_dir, graph_sources, render_graphs
+)
+
+logger = logging.getLogger(__name__)
+
+
+def render_analysis(cell_type: str, variant: str, n_jobs: int | None = 1) -> tuple[str, float]:
+    """
+    Gera todos os gráficos e métricas de uma variante no cache do modelo salvo.
+
+    Args:
+        cell_type: Tipo celular
+        variant: Variante do modelo
+        n_jobs: Processos das curvas CV (None: número de CPUs). O padrão, 1,
+            é o de `render_all` com vários processos de análise, que já
+            ocupam as CPUs
+
+    Returns:
+        tuple: (caminho do metrics.html, segundos gastos)
+
+    Raises:
+        FileNotFoundError: Se o modelo ou o conjunto de teste não existirem
+    """
+    # Importação tardia: matplotlib/Plotly só são carregados nos processos de análise
+    from src.visualization.plotter import GRAPHS_DIR
+
+    start = time.perf_counter()
+    path, holdout, digest = graph_sources(MODELS_DIR, read_manifest(MODELS_DIR), cell_type, variant)
+    for source in (path, holdout):
+        if not source.exists():
+            raise FileNotFoundError(f"Artefato de análise não encontrado: {source}")
+    digest = digest or graph_digest(file_digest(path), file_digest(holdout))
+    output_dir = graph_dir(GRAPHS_DIR, cell_type, variant, digest)
+    render_graphs(list(FIGURE_FILES), path, holdout, output_dir, n_jobs=n_jobs)
+    return str(output_dir / "metrics.html"), time.perf_counter() - start
+
+
+def render_all(targets: list[tuple[str, str]], max_workers: int | None = None,
+               on_event: Callable[[dict], None] | None = None) -> dict[tuple[str, str], str | None]:
+    """
+    Renderiza as análises de vários (tipo celular, variante) em paralelo.
+
+    Dentro de um processo daemon (ex.: job de retreinamento da área de
+    desenvolvedor), que não pode criar processos filhos, a renderização é
+    sequencial.
+
+    Args:
+        targets: Pares (tipo celular, variante)
+        max_workers: Processos de análise (padrão: número de CPUs)
+        on_event: Callback com um dict por evento ({'stage': 'analysis',
+            'status', 'cell_type', 'variant', 'elapsed', 'message'})
+
+    Returns:
+        dict: (tipo, variante) → caminho do metrics.html, ou None se falhou
+    """
+    emit = on_event or (lambda event: None)
+    workers = min(max_workers or os.cpu_count() or 1, len(targets))
+    results: dict[tuple[str, str], str | None] = {}
+
+    def finish(target: tuple[str, str], call: Callable[[], tuple[str, float]], start: float) -> None:
+        cell_type, variant = target
+        try:
+            metrics_path, elapsed = call()
+        except Exception as e:
+            results[target] = None
+            logger.error("Falha na análise de %s (%s): %s", cell_type, variant, e)
+            emit({'stage': 'analysis', 'status': 'error', 'cell_type': cell_type, 'variant': variant,
+                  'elapsed': time.perf_counter() - start, 'message': str(e)})
+            return
+        results[target] = metrics_path
+        logger.info("Análise de %s (%s) salva em %s (%.1f s)", cell_type, variant, metrics_path, elapsed)
+        emit({'stage': 'analysis', 'status': 'done', 'cell_type': cell_type, 'variant': variant,
+              'elapsed': elapsed})
+
+    if workers <= 1 or mp.current_process().daemon:
+        # Uma análise por vez: as curvas CV podem usar todas as CPUs pedidas
+        n_jobs = 1 if mp.current_process().daemon else max_workers
+        for target in targets:
+            emit({'stage': 'analysis', 'status': 'start', 'cell_type': target[0], 'variant': target[1]})
+            finish(target, lambda: render_analysis(*target, n_jobs=n_jobs), time.perf_counter())
+    else:
+        _render_parallel(targets, workers, emit, finish)
+
+    failed = [t for t, path in results.items() if path is None]
+    if failed:
+        logger.warning("Análises com falha: %s", failed)
+    return results
+
+
+
+def _render_parallel(targets: list[tuple[str, str]], workers: int, emit: Callable[[dict], None],
+                     finish: Callable) -> None:
+    """Distribui as análises em um pool de processos."""
+    start = time.perf_counter()
+    broken = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for target in targets:
+            futures[pool.submit(render_analysis, *target)] = target
+            emit({'stage': 'analysis', 'status': 'start', 'cell_type': target[0], 'variant': target[1]})
+        for future in as_completed(futures):
+            if isinstance(future.exception(), BrokenProcessPool):
+                broken.append(futures[future])
+                continue
+            finish(futures[future], future.result, start)
+
+    # Um processo que morre (ex.: falta de memória) invalida o pool inteiro:
+    # as análises pendentes são refeitas, cada uma em seu próprio processo
+    for target in broken:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            finish(target, pool.submit(render_analysis, *target).result, time.perf_counter())
@@ -0,0 +1,260 @@
+"""
+Gráficos de análise gerados sob demanda, com cache em disco por versão do modelo.
+
+O treino só grava o que os gráficos precisam: o modelo e o conjunto de teste,
+publicados juntos no manifesto (`src.model.registry`). Cada grupo de figuras
+de FIGURE_FILES é gerado na primeira requisição de um dos seus arquivos, em
+um processo de trabalho, e gravado em:
+
+    <raiz>/<tipo>_<variante>/<sha12 do modelo>-<sha12 do conjunto de teste>/<arquivo>
+
+Os dois arquivos lidos são os objetos imutáveis da entrada publicada, nunca
+`models/holdout/`, que o próximo treino regrava antes de publicar: os
+gráficos de uma versão vêm sempre do modelo e do conjunto de teste dela.
+Um modelo novo tem outro hash e, portanto, gráficos novos; as versões
+anteriores além de GRAPH_CACHE_KEEP são removidas. Requisições simultâneas
+do mesmo grupo esperam a mesma geração, e os arquivos só aparecem no
+diretório final por rename, inteiros.
+"""
+
+import hashlib
+import logging
+import multiprocessing as mp
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from pathlib import Path
+
+import joblib
+
+from src.constants import GRAPH_CACHE_KEEP, MODEL_VARIANTS, VALID_CELL_TYPES
+from src.model.registry import published_entry
+from src.model.trainer import holdout_path, model_path
+
+logger = logging.getLogger(__name__)
+
+DIGEST_LENGTH = 12
+
+# Figuras da análise: grupo → arquivos gerados juntos. O grupo é a unidade de
+# geração sob demanda; os gráficos SHAP e as curvas CV compartilham cálculos
+# caros e por isso saem juntos.
+FIGURE_FILES: dict[str, tuple[str, ...]] = {
+    'metrics': ('metrics.html',),
+    'real_vs_predicted': ('real_vs_predicted.html',),
+    'error_distribution': ('error_distribution.html',),
+    'shap': ('shap_importance.html', 'shap_summary.html', 'shap_summary.png'),
+    'cv_curves': ('learning_curve.html', 'learning_curve.png', 'validation_curve.html', 'validation_curve.png'),
+    'residual_plot': ('residual_plot.html', 'residual_plot.png'),
+}
+
+
+def figure_of(filename: str) -> str | None:
+    """Grupo de FIGURE_FILES que gera `filename`, ou None."""
+    for figure, files in FIGURE_FILES.items():
+        if filename in files:
+            return figure
+    return None
+
+
+def parse_graph_key(key: str) -> tuple[str, str]:
+    """
+    (tipo celular, variante) de um diretório de gráficos ('hepg2' = 'hepg2_default').
+
+    Raises:
+        ValueError: Se o tipo celular ou a variante forem inválidos
+
+    Examples:
+        >>> parse_graph_key('rat_dmso_only')
+        ('rat', 'dmso_only')
+    """
+    cell_type, _, variant = key.lower().partition('_')
+    variant = variant or 'default'
+    if cell_type not in VALID_CELL_TYPES or variant not in MODEL_VARIANTS:
+        raise ValueError(f"Gráficos inválidos: {key}")
+    return cell_type, variant
+
+
+def graph_dir(root: Path, cell_type: str, variant: str, digest: str) -> Path:
+    """Diretório dos gráficos de uma versão do modelo."""
+    return Path(root) / f"{cell_type}_{variant}" / digest
+
+
+def graph_digest(model_sha: str, holdout_sha: str) -> str:
+    """Versão dos gráficos: hashes do modelo e do conjunto de teste."""
+    return f"{model_sha[:DIGEST_LENGTH]}-{holdout_sha[:DIGEST_LENGTH]}"
+
+
+def graph_sources(models_dir: Path, manifest: dict | None, cell_type: str,
+                  variant: str) -> tuple[Path, Path, str | None]:
+    """
+    (modelo, conjunto de teste, versão dos gráficos) de (tipo celular, variante).
+
+    Com a entrada publicada no manifesto, os objetos dela e a versão vinda
+    dos hashes registrados; sem ela (modelos anteriores ao manifesto), os
+    arquivos de `models/`, e a versão é calculada do conteúdo em `GraphCache.get`.
+    """
+    entry = published_entry(manifest, cell_type, variant)
+    if entry is not None and entry.get('holdout'):
+        return (Path(models_dir) / entry['path'], Path(models_dir) / entry['holdout']['path'],
+                graph_digest(entry['sha256'], entry['holdout']['sha256']))
+    model_file = Path(models_dir) / (entry['path'] if entry else model_path(cell_type, variant).name)
+    return model_file, holdout_path(cell_type, variant), None
+
+
+def file_digest(path: Path) -> str:
+    """Hash (sha256, DIGEST_LENGTH caracteres) do conteúdo de `path`, calculado uma vez por versão do arquivo."""
+    st = os.stat(path)
+    return _file_digest(str(path), st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=64)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:DIGEST_LENGTH]
+
+
+def render_graphs(figures: list[str], model_file: Path, holdout_file: Path, output_dir: Path,
+                  n_jobs: int = 1) -> Path:
+    """
+    Gera grupos de figuras a partir do modelo e do conjunto de teste salvos.
+
+    As figuras são geradas em um diretório temporário ao lado de
+    `output_dir` e movidas arquivo a arquivo (rename) para ele. Quem chama
+    já roda em um pool de processos (`GraphCache`, `analysis.render_all`),
+    então as curvas CV usam `n_jobs` processos (padrão: 1), sem multiplicar
+    os processos da máquina.
+
+    Returns:
+        Path: `output_dir`
+
+    Raises:
+        FileNotFoundError: Se o modelo ou o conjunto de teste não existirem
+    """
+    # Importação tardia: matplotlib/Plotly/SHAP só são carregados nos processos de análise
+    from src.visualization.plotter import render_figure
+
+    model = joblib.load(model_file)
+    holdout = joblib.load(holdout_file)
+    output_dir = Path(output_dir)
+    tmp = output_dir.parent / f".{output_dir.name}.{os.getpid()}.tmp"
+    tmp.mkdir(parents=True, exist_ok=True)
+    try:
+        for figure in figures:
+            render_figure(figure, model, holdout['X_test'], holdout['y_test'], tmp,
+                          X_full=holdout['X_full'], y_full=holdout['y_full'], n_jobs=n_jobs)
+        output_dir.mkdir(exist_ok=True)
+        for path in tmp.iterdir():
+            os.replace(path, output_dir / path.name)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    _prune(output_dir)
+    return output_dir
+
+
+def _prune(current: Path) -> None:
+    """Mantém os gráficos das GRAPH_CACHE_KEEP versões mais recentes do modelo."""
+    versions = [p for p in current.parent.iterdir() if p.is_dir() and not p.name.startswith('.') and p != current]
+    versions.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in versions[max(GRAPH_CACHE_KEEP - 1, 0):]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class GraphCache:
+    """Geração sob demanda e deduplicada dos gráficos de análise.
+
+    Args:
+        root: Diretório raiz do cache
+        workers: Processos de geração (matplotlib não é seguro entre threads)
+        wait_s: Espera máxima de uma requisição pela geração
+
+    Examples:
+        >>> cache = GraphCache(GRAPHS_DIR, workers=1, wait_s=30)  # doctest: +SKIP
+        >>> cache.get('hepg2', 'both', 'shap_summary.png', *graph_sources(MODELS_DIR, manifest, 'hepg2', 'both'))
+        PosixPath('static/graphs/hepg2_both/792dfcf97042-5d41402abc4b/shap_summary.png')
+    """
+
+    def __init__(self, root: Path, workers: int, wait_s: float) -> None:
+        self.root = Path(root)
+        self.workers = workers
+        self.wait_s = wait_s
+        self._pool: ProcessPoolExecutor | None = None
+        self._inflight: dict[tuple[str, str, str, str], Future] = {}
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    def _submit(self, key: tuple[str, str, str, str], model_file: Path, holdout_file: Path,
+                output_dir: Path) -> Future:
+        """Gera o grupo uma única vez, reaproveitando a geração em andamento."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            if self._pool is None:
+                # spawn: o processo de trabalho não herda os threads do servidor
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context('spawn'))
+            figure = key[3]
+            try:
+                future = self._pool.submit(render_graphs, [figure], model_file, holdout_file, output_dir)
+            except BrokenProcessPool:
+                self._pool = None
+                raise
+            self._inflight[key] = future
+            self.renders += 1
+        future.add_done_callback(lambda f: self._done(key, f))
+        return future
+
+    def _done(self, key: tuple[str, str, str, str], future: Future) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+            # Um processo que morre invalida o pool: o próximo pedido cria outro
+            if isinstance(future.exception(), BrokenProcessPool):
+                self._pool = None
+        if future.exception() is not None:
+            logger.error("Falha ao gerar gráficos %s: %s", key, future.exception())
+
+    def get(self, cell_type: str, variant: str, filename: str, model_file: Path, holdout_file: Path,
+            digest: str | None = None) -> Path | None:
+        """
+        Arquivo de gráfico da versão atual do modelo, gerando-o se preciso.
+
+        Args:
+            cell_type: Tipo celular
+            variant: Variante do modelo
+            filename: Arquivo de FIGURE_FILES (ex.: 'shap_summary.png')
+            model_file: `.pkl` do modelo
+            holdout_file: Conjunto de teste gravado com o modelo
+            digest: Versão dos gráficos (padrão: `graph_digest` calculado
+                dos dois arquivos)
+
+        Returns:
+            Path | None: Caminho do arquivo, ou None se a geração não terminou
+            em `wait_s` (ela continua; repita a requisição)
+
+        Raises:
+            FileNotFoundError: Se o arquivo não se aplica ao modelo (ex.: PNG
+                do SHAP de um backend sem árvores) ou faltarem os artefatos
+            ValueError: Se `filename` não for um gráfico de análise
+        """
+        figure = figure_of(filename)
+        if figure is None:
+            raise ValueError(f"Gráfico inválido: {filename}")
+        digest = digest or graph_digest(file_digest(model_file), file_digest(holdout_file))
+        output_dir = graph_dir(self.root, cell_type, variant, digest)
+        path = output_dir / filename
+        if path.exists():
+            return path
+        future = self._submit((cell_type, variant, digest, figure), Path(model_file), Path(holdout_file), output_dir)
+        try:
+            future.result(timeout=self.wait_s)
+        except FutureTimeoutError:  # não é o TimeoutError embutido antes do Python 3.11
+            return None
+        if not path.exists():
+            raise FileNotFoundError(f"Gráfico não disponível para este modelo: {filename}")
+        return path
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'renders': self.renders, 'in_progress': len(self._inflight)}
@@ -1,13 +1,15 @@
 import logging
+from datetime import datetime
 from pathlib import Path
 
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 import pandas as pd
-import shap
 from sklearn.metrics import mean_squared_error, r2_score
-from sklearn.model_selection import learning_curve, validation_curve
+from src.model.backends import backend_of
+from src.model.cv_curves import compute_cv_curves
+from src.visualization.graph_cache import FIGURE_FILES
 import matplotlib
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
@@ -17,22 +19,46 @@ logger = logging.getLogger(__name__)
 # Definir GRAPHS_DIR
 GRAPHS_DIR = Path(__file__).parent.parent.parent / "static" / "graphs"
 
-def generate_model_analysis(model: object, X_test: pd.DataFrame, y_test: pd.Series, cell_type: str) -> None:
-    """
-    Gera análise do modelo e salva gráficos e métricas em HTML.
-    Args:
-        model (object): Modelo treinado.
-        X_test (pd.DataFrame): Dados de teste.
-        y_test (pd.Series): Valores reais.
-        cell_type (str): Tipo celular.
-    Returns:
-        None
-    """
-    # Criar diretório específico para o tipo celular
-    graph_dir = GRAPHS_DIR / cell_type
-    graph_dir.mkdir(exist_ok=True, parents=True)  # Garante criação recursiva
-    # 1. Calcular métricas
-    # Converte colunas para float se necessário
+def _plot_cv_curves(curves: dict, graph_dir: Path) -> None:
+    """Salva as curvas de aprendizado e validação (PNG + HTML)."""
+    plt.figure()
+    plt.plot(curves['train_sizes'], np.nanmean(curves['learning_train'], axis=1), 'o-', color='r', label='Treino')
+    plt.plot(curves['train_sizes'], np.nanmean(curves['learning_test'], axis=1), 'o-', color='g', label='Validação')
+    plt.title('Curva de Aprendizado')
+    plt.xlabel('Tamanho do Treino')
+    plt.ylabel('Score (R²)')
+    plt.legend(loc='best')
+    plt.tight_layout()
+    plt.savefig(str(graph_dir / "learning_curve.png"), bbox_inches='tight')
+    plt.close()
+    with open(graph_dir / "learning_curve.html", "w", encoding="utf-8") as f:
+        f.write('<h3>Curva de Aprendizado</h3><img src="learning_curve.png" style="max-width:100%;">')
+
+    param_name = curves['param_name']
+    plt.figure()
+    plt.plot(curves['param_range'], np.nanmean(curves['validation_train'], axis=1), label="Treino", color="r")
+    plt.plot(curves['param_range'], np.nanmean(curves['validation_test'], axis=1), label="Validação", color="g")
+    plt.title(f"Curva de Validação: {param_name}")
+    plt.xlabel(param_name)
+    plt.ylabel("Score (R²)")
+    plt.legend(loc="best")
+    plt.tight_layout()
+    plt.savefig(str(graph_dir / "validation_curve.png"), bbox_inches='tight')
+    plt.close()
+    with open(graph_dir / "validation_curve.html", "w", encoding="utf-8") as f:
+        f.write(f'<h3>Curva de Validação ({param_name})</h3><img src="validation_curve.png" style="max-width:100%;">')
+
+
+def _write_placeholders(graph_dir: Path, pages: dict[str, str], message: str) -> None:
+    """Grava páginas de aviso no lugar de gráficos que não puderam ser gerados."""
+    for name, title in pages.items():
+        with open(graph_dir / f"{name}.html", "w", encoding="utf-8") as f:
+            f.write(f'<h3>{title}</h3><p>{message}</p>')
+
+
+def _prepare_test_data(X_test: pd.DataFrame, y_test: pd.Series) -> tuple[pd.DataFrame, pd.Series]:
+    """Converte o conjunto de teste para float (aceita '%' e vírgula decimal)."""
+    X_test = X_test.copy()
     for col in X_test.columns:
         # Normalize: operate on string representation safely to avoid dtype issues
         s = (
@@ -45,7 +71,7 @@ def generate_model_analysis(model: object, X_test: pd.DataFrame, y_test: pd.Seri
         )
         mask_invalid = ~s.str.match(r'^-?\d+(\.\d+)?$')
         if mask_invalid.any():
-            logger.warning(f"Valores problemáticos em {col}: {X_test[col][mask_invalid].unique()}")
+            logger.warning("Valores problemáticos em %s: %s", col, X_test[col][mask_invalid].unique())
         X_test.loc[:, col] = pd.to_numeric(s, errors='coerce')
     X_test = X_test.astype(float)
     logger.debug('Dtypes após conversão: %s', X_test.dtypes)
@@ -59,12 +85,13 @@ def generate_model_analysis(model: object, X_test: pd.DataFrame, y_test: pd.Seri
             .str.strip()
         )
         y_test = pd.to_numeric(y_test, errors='coerce')
-    y_test = y_test.astype(float)
-    y_pred = model.predict(X_test)
+    return X_test, y_test.astype(float)
+
+
+def _render_metrics(y_test: pd.Series, y_pred: np.ndarray, graph_dir: Path) -> None:
     rmse = np.sqrt(mean_squared_error(y_test, y_pred))
     r2 = r2_score(y_test, y_pred)
-    # 2. Gerar HTML das métricas (inclui timestamp para verificação)
-    from datetime import datetime
+    # Inclui timestamp para verificação
     generated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     metrics_html = f"""
     <div class="metrics-grid">
@@ -82,11 +109,11 @@ def generate_model_analysis(model: object, X_test: pd.DataFrame, y_test: pd.Seri
     <hr>
     <div class="generated-meta"><small>Gerado em: {generated_at}</small></div>
     """
-    # 3. Salvar arquivo de métricas
-    metrics_path = graph_dir / "metrics.html"
-    with open(metrics_path, "w", encoding="utf-8") as f:
+    with open(graph_dir / "metrics.html", "w", encoding="utf-8") as f:
         f.write(metrics_html)
-    # Gráfico 1: Valores Reais vs. Previstos
+
+
+def _render_real_vs_predicted(y_test: pd.Series, y_pred: np.ndarray, graph_dir: Path) -> None:
     fig1 = make_subplots(rows=1, cols=1)
     fig1.add_trace(go.Scatter(
         x=y_test,
@@ -109,7 +136,35 @@ def generate_model_analysis(model: object, X_test: pd.DataFrame, y_test: pd.Seri
         template='plotly_white'
     )
     fig1.write_html(str(graph_dir / "real_vs_predicted.html"), include_plotlyjs='cdn')
-    # Gráfico 2: Importância de Features com SHAP
+
+
+def _render_error_distribution(y_test: pd.Series, y_pred: np.ndarray, graph_dir: Path) -> None:
+    fig3 = go.Figure()
+    fig3.add_trace(go.Histogram(
+        x=y_test - y_pred,
+        marker_color='#7E57C2',
+        opacity=0.75,
+        name='Distribuição de Erros'
+    ))
+    fig3.update_layout(
+        title='Distribuição dos Erros de Predição',
+        xaxis_title='Erro (Real - Previsto)',
+        yaxis_title='Contagem',
+        template='plotly_white'
+    )
+    fig3.write_html(str(graph_dir / "error_distribution.html"), include_plotlyjs='cdn')
+
+
+def _render_shap(model: object, X_test: pd.DataFrame, graph_dir: Path) -> None:
+    """SHAP (TreeExplainer), apenas para backends de árvores."""
+    backend = backend_of(model)
+    if not backend.tree_based:
+        _write_placeholders(graph_dir, {'shap_importance': 'Impacto Médio das Variáveis (SHAP)',
+                                        'shap_summary': 'SHAP Summary Plot'},
+                            f'Indisponível para modelos {backend.name}.')
+        return
+    # Importação tardia: o shap é pesado e só é usado na análise
+    import shap
     explainer = shap.TreeExplainer(model)
     shap_values = explainer.shap_values(X_test)
     fig2 = go.Figure()
@@ -127,67 +182,35 @@ def generate_model_analysis(model: object, X_test: pd.DataFrame, y_test: pd.Seri
         template='plotly_white'
     )
     fig2.write_html(str(graph_dir / "shap_importance.html"), include_plotlyjs='cdn')
-    # Gráfico 3: Distribuição de Erros
-    errors = y_test - y_pred
-    fig3 = go.Figure()
-    fig3.add_trace(go.Histogram(
-        x=errors,
-        marker_color='#7E57C2',
-        opacity=0.75,
-        name='Distribuição de Erros'
-    ))
-    fig3.update_layout(
-        title='Distribuição dos Erros de Predição',
-        xaxis_title='Erro (Real - Previsto)',
-        yaxis_title='Contagem',
-        template='plotly_white'
-    )
-    fig3.write_html(str(graph_dir / "error_distribution.html"), include_plotlyjs='cdn')
-    # Gráfico 4: SHAP Summary Plot (salva como PNG e HTML)
+    # SHAP Summary Plot (salva como PNG e HTML)
     shap.summary_plot(shap_values, X_test, show=False)
     plt.tight_layout()
     plt.savefig(str(graph_dir / "shap_summary.png"), bbox_inches='tight')
     plt.close()
     with open(graph_dir / "shap_summary.html", "w", encoding="utf-8") as f:
         f.write('<h3>SHAP Summary Plot</h3><img src="shap_summary.png" style="max-width:100%;">')
-    # Gráfico 5: Curva de Aprendizado
-    train_sizes, train_scores, test_scores = learning_curve(model, X_test, y_test, cv=5, n_jobs=-1,
-                                                           train_sizes=np.linspace(0.1, 1.0, 5))
-    train_scores_mean = np.mean(train_scores, axis=1)
-    test_scores_mean = np.mean(test_scores, axis=1)
-    plt.figure()
-    plt.plot(train_sizes, train_scores_mean, 'o-', color='r', label='Treino')
-    plt.plot(train_sizes, test_scores_mean, 'o-', color='g', label='Validação')
-    plt.title('Curva de Aprendizado')
-    plt.xlabel('Tamanho do Treino')
-    plt.ylabel('Score')
-    plt.legend(loc='best')
-    plt.tight_layout()
-    plt.savefig(str(graph_dir / "learning_curve.png"), bbox_inches='tight')
-    plt.close()
-    with open(graph_dir / "learning_curve.html", "w", encoding="utf-8") as f:
-        f.write('<h3>Curva de Aprendizado</h3><img src="learning_curve.png" style="max-width:100%;">')
-    # Gráfico 6: Curva de Validação para max_depth
-    param_range = np.arange(1, 11)
-    train_scores, test_scores = validation_curve(model, X_test, y_test, param_name="max_depth",
-                                                param_range=param_range, cv=5, n_jobs=-1)
-    train_scores_mean = np.mean(train_scores, axis=1)
-    test_scores_mean = np.mean(test_scores, axis=1)
-    plt.figure()
-    plt.plot(param_range, train_scores_mean, label="Treino", color="r")
-    plt.plot(param_range, test_scores_mean, label="Validação", color="g")
-    plt.title("Curva de Validação: max_depth")
-    plt.xlabel("max_depth")
-    plt.ylabel("Score")
-    plt.legend(loc="best")
-    plt.tight_layout()
-    plt.savefig(str(graph_dir / "validation_curve.png"), bbox_inches='tight')
-    plt.close()
-    with open(graph_dir / "validation_curve.html", "w", encoding="utf-8") as f:
-        f.write('<h3>Curva de Validação (max_depth)</h3><img src="validation_curve.png" style="max-width:100%;">')
-    # Gráfico 7: Residual Plot
+
+
+def _render_cv_curves(model: object, X_full: pd.DataFrame, y_full: pd.Series, graph_dir: Path,
+                      n_jobs: int | None = None) -> None:
+    """Curvas sobre o dataset completo, com folds CV compartilhados.
+
+    A curva de validação varia max_depth, que só existe nos backends de árvores.
+    """
+    backend = backend_of(model)
+    cv_pages = {'learning_curve': 'Curva de Aprendizado', 'validation_curve': 'Curva de Validação (max_depth)'}
+    curves = compute_cv_curves(model, X_full, y_full, n_jobs=n_jobs) if backend.tree_based else None
+    if curves is not None:
+        _plot_cv_curves(curves, graph_dir)
+    elif backend.tree_based:
+        _write_placeholders(graph_dir, cv_pages, 'Dados insuficientes para validação cruzada.')
+    else:
+        _write_placeholders(graph_dir, cv_pages, f'Indisponível para modelos {backend.name}.')
+
+
+def _render_residual_plot(y_test: pd.Series, y_pred: np.ndarray, graph_dir: Path) -> None:
     plt.figure()
-    plt.scatter(y_pred, errors, alpha=0.7, color='#009688')
+    plt.scatter(y_pred, y_test - y_pred, alpha=0.7, color='#009688')
     plt.axhline(0, color='red', linestyle='--')
     plt.title('Residual Plot')
     plt.xlabel('Valor Previsto')
@@ -199,6 +222,67 @@ def generate_model_analysis(model: object, X_test: pd.DataFrame, y_test: pd.Seri
         f.write('<h3>Residual Plot</h3><img src="residual_plot.png" style="max-width:100%;">')
 
 
+def render_figure(figure: str, model: object, X_test: pd.DataFrame, y_test: pd.Series, graph_dir: Path,
+                  X_full: pd.DataFrame | None = None, y_full: pd.Series | None = None,
+                  n_jobs: int | None = None) -> None:
+    """
+    Gera um grupo de FIGURE_FILES em `graph_dir`.
+
+    Args:
+        figure: Chave de FIGURE_FILES
+        model: Modelo treinado (de qualquer backend de src.model.backends)
+        X_test: Dados de teste
+        y_test: Valores reais
+        graph_dir: Diretório de saída (já existente)
+        X_full: Dataset completo da variante, para as curvas de
+            aprendizado/validação (padrão: X_test)
+        y_full: Alvo do dataset completo (padrão: y_test)
+        n_jobs: Processos das curvas CV (padrão: número de CPUs); use 1
+            quando a chamada já roda em um pool de processos
+
+    Raises:
+        ValueError: Se o grupo não existir
+    """
+    if figure not in FIGURE_FILES:
+        raise ValueError(f"Gráfico inválido: {figure}")
+    X_test, y_test = _prepare_test_data(X_test, y_test)
+    if figure == 'shap':
+        _render_shap(model, X_test, graph_dir)
+        return
+    if figure == 'cv_curves':
+        if X_full is None or y_full is None:
+            X_full, y_full = X_test, y_test
+        _render_cv_curves(model, X_full, y_full, graph_dir, n_jobs=n_jobs)
+        return
+    y_pred = backend_of(model).predict(model, X_test)
+    {
+        'metrics': _render_metrics,
+        'real_vs_predicted': _render_real_vs_predicted,
+        'error_distribution': _render_error_distribution,
+        'residual_plot': _render_residual_plot,
+    }[figure](y_test, y_pred, graph_dir)
 
 
-    return metrics_path
\ No newline at end of file
+def generate_model_analysis(model: object, X_test: pd.DataFrame, y_test: pd.Series, cell_type: str,
+                            X_full: pd.DataFrame | None = None, y_full: pd.Series | None = None,
+                            graph_dir: Path | None = None, n_jobs: int | None = None) -> Path:
+    """
+    Gera todos os gráficos e métricas de FIGURE_FILES em HTML/PNG.
+    Args:
+        model (object): Modelo treinado (de qualquer backend de src.model.backends).
+        X_test (pd.DataFrame): Dados de teste.
+        y_test (pd.Series): Valores reais.
+        cell_type (str): Tipo celular.
+        X_full (pd.DataFrame): Dataset completo da variante, para as curvas
+            de aprendizado/validação (padrão: X_test).
+        y_full (pd.Series): Alvo do dataset completo (padrão: y_test).
+        graph_dir (Path): Diretório de saída (padrão: GRAPHS_DIR / cell_type).
+        n_jobs (int): Processos das curvas CV (padrão: número de CPUs).
+    Returns:
+        Path: Caminho do metrics.html
+    """
+    graph_dir = Path(graph_dir or GRAPHS_DIR / cell_type)
+    graph_dir.mkdir(exist_ok=True, parents=True)  # Garante criação recursiva
+    for figure in FIGURE_FILES:
+        render_figure(figure, model, X_test, y_test, graph_dir, X_full=X_full, y_full=y_full, n_jobs=n_jobs)
+    return graph_dir / "metrics.html"
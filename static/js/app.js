@@ -16,6 +16,9 @@ const CONCENTRATION_RANGES = {
     'TREHALOSE': Array.from({length: 21}, (_, i) => i * 5),
     'BOTH': Array.from({length: 21}, (_, i) => i * 5)
 };
+// Passo (%) da curva e do slider; o servidor avalia a grade densa e envia no máximo CURVE_MAX_POINTS pontos
+const CURVE_RESOLUTION = 0.5;
+const CURVE_MAX_POINTS = 200;
 
 // Mapeamento de rótulos, populado a partir da configuração injetada na template
 const CP_LABELS = (typeof AppConfig !== 'undefined' && AppConfig.CRYOPROTECTORS) ? Object.fromEntries(AppConfig.CRYOPROTECTORS) : {};
@@ -28,7 +31,9 @@ function updatePlotDebounced() {
 async function updatePlot() {
     const payload = {
         cell_type: document.getElementById('cellType').value,
-        cryoprotector: document.getElementById('cryoprotector').value
+        cryoprotector: document.getElementById('cryoprotector').value,
+        resolution: CURVE_RESOLUTION,
+        max_points: CURVE_MAX_POINTS
     };
     showSpinner();
     try {
@@ -46,7 +51,7 @@ async function updatePlot() {
         const trace = {
             x: currentData.concentrations,
             y: currentData.viability,
-            mode: 'lines+markers',
+            mode: currentData.concentrations.length > 40 ? 'lines' : 'lines+markers',
             name: 'Viabilidade',
             line: {color: '#2196F3', width: 3},
             marker: {size: 8}
@@ -81,6 +86,57 @@ async function updatePlot() {
     }
 }
 
+// Superfície DMSO × TREHALOSE (/surface): cabeçalho binário + grade float32/uint16
+const SURFACE_HEADER_SIZE = 36;
+
+async function fetchSurface(cellType, resolution = 101) {
+    const response = await fetch(`/surface/${encodeURIComponent(cellType)}?resolution=${resolution}&dtype=uint16`);
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+    const buffer = await response.arrayBuffer();
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    if (magic !== 'CRYS') throw new Error('Payload de superfície inválido');
+    const dtype = view.getUint8(5);
+    const nDmso = view.getUint16(6, true);
+    const nTre = view.getUint16(8, true);
+    const [dMin, dMax, tMin, tMax, vMin, vMax] = [0, 1, 2, 3, 4, 5].map(i => view.getFloat32(10 + 4 * i, true));
+    const raw = dtype === 1
+        ? new Float32Array(buffer, SURFACE_HEADER_SIZE, nDmso * nTre)
+        : new Uint16Array(buffer, SURFACE_HEADER_SIZE, nDmso * nTre);
+    const scale = dtype === 1 ? null : (vMax - vMin) / 65535;
+    const axis = (lo, hi, n) => Array.from({length: n}, (_, i) => lo + (hi - lo) * i / (n - 1));
+    const z = Array.from({length: nTre}, (_, row) => Array.from(
+        raw.subarray(row * nDmso, (row + 1) * nDmso), v => scale === null ? v : vMin + v * scale
+    ));
+    return {x: axis(dMin, dMax, nDmso), y: axis(tMin, tMax, nTre), z};
+}
+
+async function updateSurface() {
+    const container = document.getElementById('surfacePlot');
+    if (!container) return;
+    if (document.getElementById('cryoprotector').value.toUpperCase() !== 'BOTH') {
+        container.classList.add('d-none');
+        return;
+    }
+    try {
+        const surface = await fetchSurface(document.getElementById('cellType').value);
+        container.classList.remove('d-none');
+        const trace = {...surface, type: 'heatmap', colorscale: 'Viridis', zmin: 0, zmax: 100,
+                       colorbar: {title: 'Viabilidade (%)'}};
+        const layout = {
+            title: 'Superfície de Viabilidade: DMSO × TREHALOSE',
+            xaxis: { title: 'DMSO (%)' },
+            yaxis: { title: 'TREHALOSE (%)' },
+            autosize: true,
+            margin: { t: 60, r: 30, l: 60, b: 60 }
+        };
+        Plotly.react('surfacePlot', [trace], layout, {responsive: true, displayModeBar: false});
+    } catch (error) {
+        container.classList.add('d-none');
+        console.error('Erro ao carregar superfície:', error);
+    }
+}
+
 // Download button handler (fora da função updatePlot)
 document.addEventListener('DOMContentLoaded', () => {
     const downloadBtn = document.getElementById('downloadPlotBtn');
@@ -131,7 +187,8 @@ async function calculateSpecificViability() {
             body: JSON.stringify({
                 cell_type: cellType,
                 cryoprotector: document.getElementById('cryoprotector').value,
-                concentration: conc
+                concentration: conc,
+                resolution: CURVE_RESOLUTION
             })
         });
         const data = await response.json();
@@ -224,7 +281,7 @@ document.addEventListener('DOMContentLoaded', () => {
         newInput.className = 'form-range';
         newInput.min = Math.min(...values);
         newInput.max = Math.max(...values);
-        newInput.step = 5;
+        newInput.step = CURVE_RESOLUTION;
         newInput.value = values[0];
         currentConcSpan.parentNode.insertBefore(newInput, currentConcSpan.parentNode.firstChild.nextSibling);
         concentrationInput = newInput;
@@ -244,10 +301,14 @@ document.addEventListener('DOMContentLoaded', () => {
         updatePlotDebounced();
     }
 
-    cellTypeSelect.addEventListener('change', updatePlotDebounced);
+    cellTypeSelect.addEventListener('change', () => {
+        updatePlotDebounced();
+        updateSurface();
+    });
     cryoprotectorSelect.addEventListener('change', () => {
         updateConcentrationInput();
         updatePlotDebounced();
+        updateSurface();
     });
 
     // Inicialização
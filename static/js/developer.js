@@ -1,9 +1,102 @@
 window.downloadGraph = function(cellType, plotName) {
-    const url = `/static/graphs/${cellType}/${plotName}.png`;
+    const url = `/graphs/${cellType}/${plotName}.png`;
     const link = document.createElement('a');
     link.href = url;
     link.download = `${plotName}_${cellType}.png`;
     document.body.appendChild(link);
     link.click();
     document.body.removeChild(link);
-};
\ No newline at end of file
+};
+
+// Retreinamento em segundo plano com progresso via Server-Sent Events
+function describeJobEvent(ev) {
+    const target = ev.cell_type ? ` ${ev.cell_type.toUpperCase()}/${ev.variant}` : '';
+    const elapsed = ev.elapsed !== undefined ? ` (${ev.elapsed.toFixed(1)} s)` : '';
+    const message = ev.message ? ` - ${ev.message}` : '';
+    return `[${ev.stage}]${target} ${ev.status}${elapsed}${message}`;
+}
+
+function followTrainingJob(jobId) {
+    const status = document.getElementById('jobStatus');
+    const list = document.getElementById('jobEvents');
+    const button = document.getElementById('startJobBtn');
+    const source = new EventSource(`/developer/jobs/${jobId}/events`);
+
+    source.onmessage = function(e) {
+        const ev = JSON.parse(e.data);
+        const item = document.createElement('li');
+        item.textContent = describeJobEvent(ev);
+        if (ev.status === 'error' || ev.status === 'failed') item.classList.add('text-danger');
+        list.appendChild(item);
+        list.scrollTop = list.scrollHeight;
+    };
+    source.addEventListener('end', function(e) {
+        const result = JSON.parse(e.data);
+        status.textContent = `Job ${jobId}: ${result.status}`;
+        button.disabled = false;
+        source.close();
+        // Recarrega os gráficos do tipo selecionado com os modelos novos
+        document.getElementById('modelSelector').dispatchEvent(new Event('change'));
+    });
+}
+
+async function startTrainingJob() {
+    const checked = cls => Array.from(document.querySelectorAll(`.${cls}:checked`)).map(el => el.value);
+    const status = document.getElementById('jobStatus');
+    const button = document.getElementById('startJobBtn');
+    button.disabled = true;
+    document.getElementById('jobEvents').innerHTML = '';
+    try {
+        const response = await fetch('/developer/jobs', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({cell_types: checked('job-cell-type'), variants: checked('job-variant')})
+        });
+        const data = await response.json();
+        if (!response.ok) {
+            status.textContent = data.error || (data.errors || []).join('; ');
+            button.disabled = false;
+            return;
+        }
+        status.textContent = `Job ${data.id}: ${data.status}`;
+        followTrainingJob(data.id);
+    } catch (err) {
+        status.textContent = 'Erro ao iniciar retreinamento: ' + err;
+        button.disabled = false;
+    }
+}
+
+// Gráficos PNG gerados sob demanda: enquanto a geração não termina, o
+// servidor responde 503 com Retry-After (as páginas HTML se recarregam
+// sozinhas; as imagens são pedidas de novo aqui)
+const GRAPH_IMAGE_RETRIES = 30;
+
+async function retryGraphImage(img) {
+    const url = img.src.split('?')[0];
+    const attempt = Number(img.dataset.retries || 0) + 1;
+    if (attempt > GRAPH_IMAGE_RETRIES) return;
+    img.dataset.retries = attempt;
+    try {
+        const response = await fetch(url, {cache: 'no-store'});
+        if (response.status === 503) {
+            const delay = Number(response.headers.get('Retry-After') || 2) * 1000;
+            setTimeout(() => { img.src = `${url}?retry=${attempt}`; }, delay);
+        } else if (response.ok) {
+            img.src = `${url}?retry=${attempt}`;
+        }
+    } catch (err) {
+        console.warn('Erro ao carregar gráfico', url, err);
+    }
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    const button = document.getElementById('startJobBtn');
+    if (button) button.addEventListener('click', startTrainingJob);
+
+    document.querySelectorAll('img[src^="/graphs/"]').forEach(img => {
+        img.addEventListener('load', () => { delete img.dataset.retries; });
+        img.addEventListener('error', () => retryGraphImage(img));
+        // A primeira resposta pode ter chegado antes deste script
+        if (img.complete && img.naturalWidth === 0) retryGraphImage(img);
+    });
+});
@@ -1,8 +1,16 @@
+import argparse
+import json
 import logging
+import time
 from pathlib import Path
-from src.model.trainer import CryoModelTrainer
-from src.visualization.plotter import generate_model_analysis
-import joblib
+from sklearn.metrics import mean_absolute_error, r2_score
+from src.constants import JOINT_MODEL
+from src.data.store import DatasetStore
+from src.model.backends import BACKENDS, get_backend
+from src.model.trainer import CryoModelTrainer, holdout_path, load_partitions
+from src.model.bundle import build_model_bundle
+from src.model.registry import publish_object, update_manifest
+from src.visualization.analysis import render_all
 
 logger = logging.getLogger(__name__)
 
@@ -12,61 +20,274 @@ MODELS_DIR = BASE_DIR / "models"
 RAW_DATA_DIR = BASE_DIR / "data" / "raw"
 CELL_TYPES = ['hepg2', 'rat', 'mice']
 
-def train_all_models():
-    """Treina e salva modelos para todos os tipos celulares."""
+VARIANTS = ['default', 'dmso_only', 'trehalose_only', 'both', 'multi']
+# Versão do armazenamento de dados usada no último treino de cada (tipo, variante)
+DATASET_VERSIONS_PATH = MODELS_DIR / "dataset_versions.json"
+
+
+def _read_trained_versions() -> dict[str, dict[str, int]]:
+    if not DATASET_VERSIONS_PATH.exists():
+        return {}
+    with open(DATASET_VERSIONS_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _record_trained_version(cell_type: str, variant: str, version: int) -> None:
+    versions = _read_trained_versions()
+    versions.setdefault(cell_type, {})[variant] = version
+    with open(DATASET_VERSIONS_PATH, 'w', encoding='utf-8') as f:
+        json.dump(versions, f, indent=2, sort_keys=True)
+
+
+def changed_partitions(store: DatasetStore | None = None) -> dict[str, list[str]]:
+    """Variantes de cada tipo celular cujos dados mudaram desde o último treino.
+
+    Usa o diff linha a linha do armazenamento versionado (`src.data.store`)
+    entre a versão registrada no último treino de cada variante e o head.
+    Tipos celulares sem armazenamento, ou variantes nunca treinadas a partir
+    dele, são sempre incluídos.
+    """
+    store = store or DatasetStore()
+    trained = _read_trained_versions()
+    partitions = {}
+    for cell_type in CELL_TYPES:
+        if not store.exists(cell_type):
+            partitions[cell_type] = list(VARIANTS)
+            continue
+        versions = trained.get(cell_type, {})
+        changed = {v for v in VARIANTS if v not in versions}
+        for version in set(versions.values()):
+            affected = set(store.changed_partitions(cell_type, version))
+            changed |= {v for v in VARIANTS if versions.get(v) == version and v in affected}
+        if changed:
+            partitions[cell_type] = [v for v in VARIANTS if v in changed]
+    return partitions
+
+
+def parse_backends(specs: list[str]) -> dict[str, str]:
+    """Lê as opções `--backend`: 'nome' (todos os pares) ou 'tipo/variante=nome'.
+
+    Returns:
+        dict: 'tipo/variante' (ou '*') → backend
+
+    Raises:
+        ValueError: Se um backend não existir
+
+    Examples:
+        >>> parse_backends(['random_forest', 'rat/both=gaussian_process'])
+        {'*': 'random_forest', 'rat/both': 'gaussian_process'}
+    """
+    backends = {}
+    for spec in specs:
+        pair, _, name = spec.rpartition('=')
+        get_backend(name)
+        backends[pair or '*'] = name
+    return backends
+
+
+def _pair_backend(backends: dict[str, str] | None, cell_type: str, variant: str) -> str | None:
+    """Backend pedido para o par, ou None (o configurado em MODEL_BACKENDS).
+
+    Um backend para todos os pares ('*') vale apenas para as variantes que ele atende.
+    """
+    if not backends:
+        return None
+    if f"{cell_type}/{variant}" in backends:
+        return backends[f"{cell_type}/{variant}"]
+    name = backends.get('*')
+    return name if name and get_backend(name).supports(variant) else None
+
+
+def _emit(progress, **event) -> None:
+    """Envia um evento de progresso, se houver callback."""
+    if progress is not None:
+        progress(event)
+
+
+def train_all_models(cell_types: list[str] | None = None, variants: list[str] | None = None,
+                     progress=None, partitions: dict[str, list[str]] | None = None,
+                     analysis: bool = False, analysis_workers: int | None = None,
+                     incremental: bool = False, backends: dict[str, str] | None = None) -> None:
+    """Treina e salva modelos para os tipos celulares e variantes pedidos.
+
+    Args:
+        cell_types: Tipos celulares (padrão: CELL_TYPES)
+        variants: Variantes (padrão: VARIANTS)
+        progress: Callback opcional chamado com um dict por etapa
+            ({'stage', 'status', 'cell_type', 'variant', 'elapsed'}), usado
+            pelo executor de jobs da área de desenvolvedor
+        partitions: Variantes por tipo celular ({tipo: [variantes]}); quando
+            dado, substitui `cell_types` × `variants`
+        analysis: Pré-gera os gráficos de análise após o treino (`render_all`);
+            sem ele, o servidor os gera na primeira requisição
+        analysis_workers: Processos da etapa de análise (padrão: número de CPUs)
+        incremental: Atualiza os modelos salvos com as linhas novas
+            (`CryoModelTrainer.update_incremental`) em vez de retreiná-los;
+            cada variante cai para o treino completo quando necessário
+        backends: Backend por 'tipo/variante' (ou '*' para todos os pares
+            atendidos), como em `parse_backends`; os demais usam MODEL_BACKENDS
+    """
+    if partitions is None:
+        partitions = {ct: list(variants or VARIANTS) for ct in cell_types or CELL_TYPES}
+    cell_types = list(partitions)
+    store = DatasetStore()
     try:
         # Verificar arquivos necessários
-        required_files = ['hepg2.csv', 'rat.csv', 'mice.csv']
-        for file in required_files:
-            if not (RAW_DATA_DIR / file).exists():
-                raise FileNotFoundError(f"Arquivo {file} não encontrado")
-
-        variants = ['default', 'dmso_only', 'trehalose_only', 'both']
+        for cell_type in cell_types:
+            if not (RAW_DATA_DIR / f"{cell_type}.csv").exists():
+                raise FileNotFoundError(f"Arquivo {cell_type}.csv não encontrado")
 
-        # Treinar modelos
-        for cell_type in CELL_TYPES:
+        # Treinar modelos; a análise (opcional) é uma etapa separada, em paralelo
+        trained: list[tuple[str, str]] = []
+        # Modelos gravados neste treino, publicados juntos no manifesto ao final
+        published: dict[str, dict] = {}
+        for cell_type in cell_types:
             logger.info("%s", "="*40)
             logger.info("Treinando modelos para: %s", cell_type.upper())
             logger.info("%s", "="*40)
+            # Versão dos dados lida neste treino (o head materializado em data/raw)
+            version = store.head(cell_type) if store.exists(cell_type) else None
+            # CSV lido e limpo uma vez; cada variante recebe seus índices
+            data, rows = load_partitions(cell_type, partitions[cell_type])
 
-            for variant in variants:
+            for variant in partitions[cell_type]:
+                stage = 'train'
+                start = time.perf_counter()
                 try:
                     logger.info("Treinando variante: %s", variant)
-                    trainer = CryoModelTrainer(cell_type, variant=variant)
-                    X_test, y_test = trainer.train_and_save()
+                    _emit(progress, stage=stage, status='start', cell_type=cell_type, variant=variant)
+                    trainer = CryoModelTrainer(cell_type, variant=variant,
+                                               backend=_pair_backend(backends, cell_type, variant), publish=False)
+                    if incremental:
+                        update = trainer.update_incremental(data=(data, rows[variant]))
+                        if trainer.published is not None:
+                            published[trainer.model_key] = trainer.published
+                        _emit(progress, stage=stage, status='done', cell_type=cell_type, variant=variant,
+                              elapsed=time.perf_counter() - start, mode=update['mode'],
+                              message=update['reason'])
+                        if version is not None:
+                            _record_trained_version(cell_type, variant, version)
+                        if update['mode'] != 'unchanged':
+                            trained.append((cell_type, variant))
+                        continue
+                    X_test, y_test = trainer.train_and_save(data=(data, rows[variant]))
 
                     if X_test is None:
                         logger.error("Falha no treinamento para %s (variante %s)", cell_type, variant)
+                        _emit(progress, stage=stage, status='error', cell_type=cell_type, variant=variant,
+                              elapsed=time.perf_counter() - start)
                         continue
-
-                    # Carregar modelo para análise
-                    suffix = '' if variant == 'default' else f"_{variant}"
-                    model_path = MODELS_DIR / f"xgboost_{cell_type}{suffix}.pkl"
-                    model = joblib.load(model_path)
-
-                    # Gerar análise
-                    logger.info("Gerando gráficos de análise para %s (%s)...", cell_type, variant)
-                    metrics_path = generate_model_analysis(model, X_test, y_test, f"{cell_type}_{variant}")
-
-                    logger.info("[%s - %s] Treinamento e análise concluídos!", cell_type.upper(), variant)
-                    logger.info("Métricas salvas em: %s", metrics_path)
+                    _emit(progress, stage=stage, status='done', cell_type=cell_type, variant=variant,
+                          elapsed=time.perf_counter() - start)
+                    published[trainer.model_key] = trainer.published
+                    if version is not None:
+                        _record_trained_version(cell_type, variant, version)
+                    trained.append((cell_type, variant))
+                    logger.info("[%s - %s] Treinamento concluído!", cell_type.upper(), variant)
 
                 except ValueError as ve:
                     logger.warning("Dados insuficientes para %s (%s): %s", cell_type, variant, ve)
+                    _emit(progress, stage=stage, status='skipped', cell_type=cell_type, variant=variant,
+                          elapsed=time.perf_counter() - start, message=str(ve))
                     continue
                 except Exception as e:
                     logger.exception("Erro em %s (%s): %s", cell_type, variant, str(e))
+                    _emit(progress, stage=stage, status='error', cell_type=cell_type, variant=variant,
+                          elapsed=time.perf_counter() - start, message=str(e))
                     continue
 
             logger.info("\nProcesso de treinamento finalizado para %s!", cell_type)
 
+        # Empacotar todos os modelos em um único arquivo mapeável
+        start = time.perf_counter()
+        _emit(progress, stage='bundle', status='start')
+        bundle_path = build_model_bundle(MODELS_DIR)
+        logger.info("Pacote de modelos salvo em: %s", bundle_path)
+        # Manifesto por último: os servidores passam ao novo conjunto (modelos + pacote) de uma vez
+        update_manifest(MODELS_DIR, published,
+                        bundle=publish_object(MODELS_DIR, bundle_path.name, bundle_path.read_bytes()))
+        _emit(progress, stage='bundle', status='done', elapsed=time.perf_counter() - start)
+
+        # Análise depois da publicação: `render_analysis` lê o manifesto para
+        # renderizar o modelo e o conjunto de teste recém-publicados
+        if analysis and trained:
+            render_all(trained, max_workers=analysis_workers, on_event=progress)
+
     except Exception as e:
         logger.exception("ERRO GLOBAL: %s", str(e))
         raise
 
+
+def render_analyses(partitions: dict[str, list[str]] | None = None, workers: int | None = None,
+                    progress=None) -> dict[tuple[str, str], str | None]:
+    """Etapa de análise isolada: renderiza as variantes já treinadas.
+
+    Usa os modelos e conjuntos de teste salvos; variantes sem conjunto de
+    teste (treinadas antes desta versão) precisam ser retreinadas.
+    """
+    partitions = partitions or {ct: list(VARIANTS) for ct in CELL_TYPES}
+    targets = [(ct, v) for ct, variants in partitions.items() for v in variants
+               if holdout_path(ct, v).exists()]
+    missing = [(ct, v) for ct, variants in partitions.items() for v in variants if (ct, v) not in targets]
+    if missing:
+        logger.warning("Sem conjunto de teste salvo (retreine): %s", missing)
+    return render_all(targets, max_workers=workers, on_event=progress)
+
+
+def train_joint_model():
+    """Treina o modelo conjunto (todos os tipos celulares) e registra as métricas por tipo."""
+    trainer = CryoModelTrainer(JOINT_MODEL)
+    X_test, y_test = trainer.train_and_save()
+    preds = trainer.model.predict(X_test)
+    for cell_type in sorted(X_test['cell_type'].unique()):
+        mask = (X_test['cell_type'] == cell_type).to_numpy()
+        r2 = r2_score(y_test[mask], preds[mask]) if mask.sum() > 1 else float('nan')
+        logger.info("[%s] %s: MAE=%.3f R²=%.3f (n=%d)", JOINT_MODEL, cell_type,
+                    mean_absolute_error(y_test[mask], preds[mask]), r2, mask.sum())
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Treina os modelos de viabilidade.")
+    parser.add_argument('--joint', action='store_true',
+                        help="Treina também o modelo conjunto (todos os tipos celulares)")
+    parser.add_argument('--changed-only', action='store_true',
+                        help="Treina apenas as variantes cujos dados mudaram desde o último treino")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Atualiza os modelos salvos com as linhas novas (continuação do boosting)")
+    parser.add_argument('--backend', action='append', default=[], metavar='[TIPO/VARIANTE=]NOME',
+                        help=f"Backend do modelo ({', '.join(BACKENDS)}), para todos os pares ou um par; "
+                             "pode ser repetido")
+    parser.add_argument('--analysis', action='store_true',
+                        help="Pré-gera os gráficos de análise após o treino (padrão: sob demanda no servidor)")
+    parser.add_argument('--analysis-only', action='store_true',
+                        help="Apenas pré-gera os gráficos de análise dos modelos já treinados")
+    parser.add_argument('--no-analysis', action='store_true',
+                        help="Treina sem gerar os gráficos de análise (padrão; mantido por compatibilidade)")
+    parser.add_argument('--analysis-workers', type=int, default=None,
+                        help="Processos da etapa de análise (padrão: número de CPUs)")
+    args = parser.parse_args()
+
     # Garantir diretórios existem
     MODELS_DIR.mkdir(exist_ok=True, parents=True)
 
-    logger.info("Iniciando treinamento de modelos...")
-    train_all_models()
\ No newline at end of file
+    try:
+        backends = parse_backends(args.backend)
+    except ValueError as e:
+        parser.error(str(e))
+
+    options = {'analysis': args.analysis and not args.no_analysis, 'analysis_workers': args.analysis_workers,
+               'incremental': args.incremental, 'backends': backends}
+    if args.analysis_only:
+        logger.info("Gerando análises dos modelos salvos...")
+        render_analyses(workers=args.analysis_workers)
+    elif args.changed_only:
+        logger.info("Iniciando treinamento de modelos...")
+        partitions = changed_partitions()
+        logger.info("Partições alteradas: %s", partitions or "nenhuma")
+        if partitions:
+            train_all_models(partitions=partitions, **options)
+    else:
+        logger.info("Iniciando treinamento de modelos...")
+        train_all_models(**options)
+    if args.joint:
+        train_joint_model()
\ No newline at end of file